@@ -22,7 +22,8 @@ Import (for RAG)
   from actor_mode_crawler_and_aggregator import get_filmography, load_gazetteer, lookup_locations
   works = get_filmography("한효주")  # List[WorkEntry]
   gaz = load_gazetteer("drama_list.csv", title_col="TITLE_NM", lat_col="LC_LA", lng_col="LC_LO")
-  for w in works: locs = lookup_locations(w.title, gaz)
+  for w in works: locs = lookup_locations(w.title, gaz)   # 퍼지 매칭은 gaz.ngrams(3-gram 역색인) 사용
+  locs[0].place_name, locs[0].extra("OPER_TIME")           # 드문 컬럼은 원본 파일 오프셋에서 지연 로딩
 
 Note
 ----
@@ -33,18 +34,23 @@ from __future__ import annotations
 
 import os
 import re
+import io
 import csv
+import sys
 import json
 import difflib
 import argparse
 from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Optional, Tuple
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util import Retry
 from bs4 import BeautifulSoup
 
+from page_cache import default_cache, not_blocked
+from title_index import TitleNgramIndex, guarded_match
+
 # ------------------------------
 # Debug toggle & helper
 # ------------------------------
@@ -100,7 +106,6 @@ TITLE_BRACKET_RE = re.compile(r"[《》]")
 NON_ALNUM_RE = re.compile(r"[^0-9A-Za-z가-힣]+", re.UNICODE)
 RATING_RE = re.compile(r"\d+(?:\.\d+)?\s*%")
 COUNT_RE  = re.compile(r"^[\d,]+\s*명$")
-TOKEN_RE = re.compile(r"[가-힣A-Za-z0-9]+")
 
 BAN_TOKENS = [
     "대한민국","국적","직업","배우","활동 기간","출생","제작발표회","촬영","에서",
@@ -275,33 +280,136 @@ def _guess_col(cols: list, candidates: list) -> Optional[str]:
             return lc[match[0]]
     return None
 
+class _CsvSource:
+    """원본 CSV 위치/인코딩/방언 — 레코드가 드문 컬럼을 바이트 오프셋으로 다시 읽을 때 사용 (가제티어당 1개 공유)"""
+    __slots__ = ("path", "encoding", "dialect", "fieldnames")
+
+    def __init__(self, path: str, encoding: str, dialect, fieldnames: List[str]):
+        self.path, self.encoding, self.dialect, self.fieldnames = path, encoding, dialect, fieldnames
+
+    def read_row(self, offset: int, length: int) -> Dict[str, str]:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            text = f.read(length).decode(self.encoding, errors="ignore")
+        fields = next(csv.reader(io.StringIO(text, newline=""), self.dialect), [])
+        return dict(zip(self.fieldnames, fields))
+
+class GazetteerRecord:
+    """
+    촬영지 1건 (compact). API에서 쓰는 필드만 보관하고, 나머지 컬럼(OPER_TIME, REST_TIME,
+    RELATE_PLACE_DC ...)은 .row / .extra() 호출 시 원본 파일 오프셋에서 읽는다.
+    기존 dict 레코드 호환: r["title"], r["lat"], r["lng"], r["row"].
+    (이 모듈 CLI / lookup_locations용. 서버는 dataset.py의 컬럼형 SpotTable을 쓴다)
+    """
+    __slots__ = ("title", "lat", "lng", "place_name", "address", "media_type", "place_type", "tel",
+                 "_src", "_off", "_len")
+
+    def __init__(self, title: str, lat: float, lng: float, row: Dict[str, Any],
+                 src: Any = None, off: int = -1, length: int = 0):
+        self.title, self.lat, self.lng = sys.intern(title), lat, lng
+        self.place_name = row.get("PLACE_NM") or None
+        self.address = row.get("ADDR") or None
+        self.media_type = sys.intern(row["MEDIA_TY"]) if row.get("MEDIA_TY") else None
+        self.place_type = sys.intern(row["PLACE_TY"]) if row.get("PLACE_TY") else None
+        self.tel = row.get("TEL_NO") or None
+        # CSV: _src=_CsvSource + (오프셋, 길이) / JSON: 이미 메모리에 있는 원본 dict
+        self._src, self._off, self._len = (src if src is not None else row), off, length
+
+    @property
+    def row(self) -> Dict[str, Any]:
+        """원본 전체 행 (CSV면 매 호출마다 파일에서 다시 읽음 — 핫패스에서 쓰지 말 것)"""
+        if isinstance(self._src, _CsvSource):
+            return self._src.read_row(self._off, self._len)
+        return self._src
+
+    def extra(self, col: str, default: Any = None) -> Any:
+        return self.row.get(col, default)
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+    def __repr__(self) -> str:
+        return f"GazetteerRecord({self.title!r}, {self.lat}, {self.lng}, {self.place_name!r})"
+
+def _csv_chunks(f, start: int):
+    """바이너리 파일 → (오프셋, 길이, bytes) 레코드 단위 (따옴표 안 줄바꿈이면 다음 줄과 합침)"""
+    off, buf, rec_start = start, [], start
+    for line in f:
+        if not buf:
+            rec_start = off
+        buf.append(line)
+        off += len(line)
+        chunk = b"".join(buf) if len(buf) > 1 else line
+        if chunk.count(b'"') % 2:
+            continue
+        buf = []
+        yield rec_start, len(chunk), chunk
+
+ENCODING_SNIFF_BYTES = 256 * 1024   # 인코딩 판별에 읽는 앞부분 크기 (전체 디코드 대신)
+
+def _sniff_encoding(prefix: bytes) -> str:
+    """앞부분만으로 utf-8/cp949 판별. 끝에서 잘린 멀티바이트 문자(최대 3바이트)는 utf-8 오류로 보지 않음."""
+    try:
+        prefix.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.reason != "unexpected end of data" or e.start < len(prefix) - 3:
+            return "cp949"
+    return "utf-8"
+
+def _load_csv_records(path: str, ext: str, title_col: Optional[str], lat_col: Optional[str],
+                      lng_col: Optional[str]) -> List[GazetteerRecord]:
+    with open(path, "rb") as f:
+        head = f.read(4)
+        f.seek(0)
+        start = 3 if head.startswith(b"\xef\xbb\xbf") else 0
+        f.seek(start)
+        enc = _sniff_encoding(f.read(ENCODING_SNIFF_BYTES))
+        f.seek(start)
+        sample = f.read(2048).decode(enc, errors="ignore")
+        dialect = csv.Sniffer().sniff(sample) if ext == ".csv" else csv.excel_tab
+        f.seek(start)
+
+        spans: List[Tuple[int, int]] = []
+        def lines():
+            for off, length, chunk in _csv_chunks(f, start):
+                spans.append((off, length))
+                yield chunk.decode(enc, errors="ignore")
+
+        reader = csv.reader(lines(), dialect)
+        cols = [c.strip() for c in next(reader, [])]
+        tcol = title_col or _guess_col(cols, ["TITLE_NM","title","작품명","work","작품","drama","드라마"])
+        latc = lat_col or _guess_col(cols, ["LC_LA","lat","latitude","위도"])
+        lngc = lng_col or _guess_col(cols, ["LC_LO","lng","long","lon","longitude","경도"])
+        if not (tcol and latc and lngc):
+            raise ValueError(f"Column mapping required. Found columns={cols}; need title/lat/lng.")
+        dprint(f"[gazetteer] cols: title={tcol}, lat={latc}, lng={lngc}")
+        src = _CsvSource(path, enc, dialect, cols)
+        records: List[GazetteerRecord] = []
+        for fields in reader:
+            row = dict(zip(cols, fields))   # 이 행 처리 동안만 유지
+            try:
+                title = (row.get(tcol) or "").strip()
+                lat = float((row.get(latc) or "").strip())
+                lng = float((row.get(lngc) or "").strip())
+            except Exception:
+                continue
+            off, length = spans[-1]
+            records.append(GazetteerRecord(title, lat, lng, row, src, off, length))
+    return records
+
+class GazetteerIndex(dict):
+    """정규화 제목키 → 레코드(GazetteerRecord) 목록 + 퍼지 매칭용 n-gram 역색인(.ngrams, 로딩 시 함께 생성)"""
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self.ngrams = TitleNgramIndex(self.keys())
+
 def load_gazetteer(path: str, title_col: Optional[str] = None, lat_col: Optional[str] = None, lng_col: Optional[str] = None) -> Dict[str, list]:
     if not os.path.exists(path):
         raise FileNotFoundError(path)
     ext = os.path.splitext(path)[1].lower()
-    records: list = []
+    records: List[GazetteerRecord] = []
     if ext in (".csv", ".tsv"):
-        with _open_text(path) as f:
-            sample = f.read(2048)
-            f.seek(0)
-            dialect = csv.Sniffer().sniff(sample) if ext == ".csv" else csv.excel_tab
-            reader = csv.DictReader(f, dialect=dialect)
-            cols = [c.strip() for c in (reader.fieldnames or [])]
-            tcol = title_col or _guess_col(cols, ["TITLE_NM","title","작품명","work","작품","drama","드라마"])
-            latc = lat_col or _guess_col(cols, ["LC_LA","lat","latitude","위도"])
-            lngc = lng_col or _guess_col(cols, ["LC_LO","lng","long","lon","longitude","경도"])
-            if not (tcol and latc and lngc):
-                raise ValueError(f"Column mapping required. Found columns={cols}; need title/lat/lng.")
-            dprint(f"[gazetteer] cols: title={tcol}, lat={latc}, lng={lngc}")
-            for row in reader:
-                try:
-                    title = (row.get(tcol) or "").strip()
-                    lat = float((row.get(latc) or "").strip())
-                    lng = float((row.get(lngc) or "").strip())
-                    rec = {"title": title, "lat": lat, "lng": lng, "row": row}
-                    records.append(rec)
-                except Exception:
-                    continue
+        records = _load_csv_records(path, ext, title_col, lat_col, lng_col)
     elif ext in (".json", ".ndjson"):
         with _open_text(path) as f:
             data = json.load(f)
@@ -314,8 +422,7 @@ def load_gazetteer(path: str, title_col: Optional[str] = None, lat_col: Optional
             lat = row.get(lat_col or "LC_LA") or row.get("lat") or row.get("위도") or row.get("latitude")
             lng = row.get(lng_col or "LC_LO") or row.get("lng") or row.get("경도") or row.get("longitude")
             try:
-                rec = {"title": title, "lat": float(lat), "lng": float(lng), "row": row}
-                records.append(rec)
+                records.append(GazetteerRecord(title, float(lat), float(lng), row))
             except Exception:
                 continue
     else:
@@ -323,41 +430,26 @@ def load_gazetteer(path: str, title_col: Optional[str] = None, lat_col: Optional
 
     index: Dict[str, list] = {}
     for rec in records:
-        key = normalize_title_key(rec["title"])
+        key = normalize_title_key(rec.title)
         if not key:
             continue
         index.setdefault(key, []).append(rec)
     dprint(f"[gazetteer] loaded records={len(records)}, keys={len(index)}")
-    return index
-
-def _tokens(s: str) -> List[str]:
-    return [t for t in TOKEN_RE.findall(s or "") if t]
+    return GazetteerIndex(index)
 
-def _jaccard(a: List[str], b: List[str]) -> float:
-    A, B = set(a), set(b)
-    if not A or not B: return 0.0
-    return len(A & B) / len(A | B)
-
-def lookup_locations(title: str, index: Dict[str, list], fuzzy: bool = True, *, cutoff: float = 0.8) -> list:
+def lookup_locations(title: str, index: Dict[str, list], fuzzy: bool = True, *, cutoff: float = 0.8,
+                     ngrams: Optional[TitleNgramIndex] = None) -> list:
     key = normalize_title_key(title)
     if key in index:
         dprint(f"[gazetteer] exact hit: '{title}' -> key='{key}' count={len(index[key])}")
         return index[key]
     if not fuzzy or not index:
         return []
-    candidates = difflib.get_close_matches(key, list(index.keys()), n=3, cutoff=cutoff)
-    dprint(f"[gazetteer] fuzzy for '{title}' key='{key}' -> cands={candidates}")
-    if not candidates:
-        return []
-    q_tokens = _tokens(title)
-    for cand in candidates:
-        c_tokens = _tokens(cand)
-        if _jaccard(q_tokens, c_tokens) < 0.6:
-            continue
-        if len("".join(c_tokens)) <= 2 and len(q_tokens) >= 2:
-            continue
-        return index.get(cand, [])
-    return []
+    # n-gram 역색인으로 후보만 평가 (load_gazetteer 결과면 .ngrams 재사용)
+    ngrams = ngrams or getattr(index, "ngrams", None) or TitleNgramIndex(index.keys())
+    cand = guarded_match(ngrams, title, key, cutoff=cutoff)
+    dprint(f"[gazetteer] fuzzy for '{title}' key='{key}' -> {cand}")
+    return index.get(cand, []) if cand else []
 
 # ------------------------------
 # Provider: NamuWiki (strict span id="드라마"/"영화")
@@ -372,12 +464,20 @@ class NamuWikiProvider:
 
     def fetch_html(self, actor: str) -> Optional[str]:
         url = self.BASE + requests.utils.quote(actor)
+        cache = default_cache()
         try:
             dbg("[namu] GET", url)
-            r = self.s.get(url, allow_redirects=True)
-            dbg("[namu] status=", r.status_code, "bytes=", len(r.text or ""))
-            if r.status_code == 200 and r.text and ("Just a moment" not in r.text):
-                return r.text
+            if cache is not None:
+                # 공용 페이지 캐시 (작품 메타 크롤러와 같은 저장소, 조건부 재검증)
+                try:
+                    return cache.fetch(url, self.s)   # 차단 페이지는 저장하지 않고 BlockedPage
+                except requests.RequestException as e:
+                    dbg("[namu] cache fetch failed:", e)
+            else:
+                r = self.s.get(url, allow_redirects=True)
+                dbg("[namu] status=", r.status_code, "bytes=", len(r.text or ""))
+                if r.status_code == 200 and not_blocked(r.text):
+                    return r.text
             # fallback: cloudscraper (optional)
             try:
                 import cloudscraper
@@ -388,6 +488,8 @@ class NamuWikiProvider:
                 r2 = scraper.get(url)
                 dbg("[namu] cloudscraper status=", r2.status_code, "bytes=", len(r2.text or ""))
                 if r2.status_code == 200 and r2.text:
+                    if cache is not None and not_blocked(r2.text):   # 챌린지 본문은 공용 캐시에 넣지 않음
+                        cache.store(url, r2.text, r2.headers)
                     return r2.text
             except Exception as e:
                 dbg("[namu] cloudscraper skip:", str(e))
@@ -630,15 +732,15 @@ if __name__ == "__main__":
                 locs = lookup_locations(w.title, gaz_idx, fuzzy=True, cutoff=0.8)
                 if locs:
                     item["locations"] = [{
-                        "lat": r["lat"],
-                        "lng": r["lng"],
-                        "title_src": r["title"],
+                        "lat": r.lat,
+                        "lng": r.lng,
+                        "title_src": r.title,
                         # optional metadata from your schema
-                        "place_name": r["row"].get("PLACE_NM"),
-                        "address": r["row"].get("ADDR"),
-                        "media_type": r["row"].get("MEDIA_TY"),
-                        "place_type": r["row"].get("PLACE_TY"),
-                        "tel": r["row"].get("TEL_NO"),
+                        "place_name": r.place_name,
+                        "address": r.address,
+                        "media_type": r.media_type,
+                        "place_type": r.place_type,
+                        "tel": r.tel,
                     } for r in locs]
             out.append(item)
         return out
@@ -666,4 +768,4 @@ if __name__ == "__main__":
             if gaz_idx:
                 locs = lookup_locations(w.title, gaz_idx, fuzzy=True, cutoff=0.8)
                 for i, r in enumerate(locs[:5], 1):
-                    print(f"    #{i} → ({r['lat']}, {r['lng']}) · src: {r['title']} · {r['row'].get('PLACE_NM')} · {r['row'].get('ADDR')}")
+                    print(f"    #{i} → ({r.lat}, {r.lng}) · src: {r.title} · {r.place_name} · {r.address}")
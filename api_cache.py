@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+api_cache.py
+------------
+외부 API 응답 캐시 (YouTube 검색 / TourAPI) — sqlite(WAL) 1개 파일, (ns, key) 기본키
+
+- get/put: 기본키 조회/행 단위 upsert → 캐시 크기와 무관 (CSV 전체 스캔·재작성 없음)
+- 여러 uvicorn 워커가 같은 파일을 공유: WAL + busy_timeout, 쓰기는 짧은 트랜잭션
+- compact(): updated_at 기준 보존 기간 지난 행 삭제 (TTL 지난 행도 API 실패 시 stale 응답용으로 잠시 보존)
+- migrate_csv(): 예전 CSV 캐시(키, updated_at, items_json)를 1회 가져옴
+
+Usage
+-----
+  cache = ApiCache("cache/api_cache.sqlite3")
+  cache.migrate_csv("yt", "cache/youtube_search_cache.csv", key_col="q")
+  cache.put("yt", "오징어 게임", items)
+  cache.get("yt", "오징어 게임")   # {"items": [...], "updated_at": "2025-...Z"} | None
+"""
+from __future__ import annotations
+
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+
+
+def _epoch(iso: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat((iso or "").replace("Z", "")).replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+class ApiCache:
+    def __init__(self, path: str, compact_every: int = 500):
+        self.path = path
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)   # timeout = 다른 워커 쓰기 대기
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+        CREATE TABLE IF NOT EXISTS api_cache (
+          ns TEXT NOT NULL, key TEXT NOT NULL, updated_at REAL NOT NULL, items TEXT NOT NULL,
+          PRIMARY KEY (ns, key)
+        );
+        CREATE INDEX IF NOT EXISTS api_cache_age ON api_cache (ns, updated_at);
+        CREATE TABLE IF NOT EXISTS api_cache_info (name TEXT PRIMARY KEY, value TEXT);
+        """)
+        self._db.commit()
+        self.compact_every = compact_every
+        self._puts = 0
+        self._retention: Dict[str, float] = {}   # ns → 보존 초 (compact 대상)
+
+    def get(self, ns: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT items, updated_at FROM api_cache WHERE ns=? AND key=?",
+                                   (ns, key)).fetchone()
+        if not row:
+            return None
+        try:
+            items = json.loads(row[0])
+        except ValueError:
+            items = []
+        return {"items": items, "updated_at": _iso(row[1])}
+
+    def put(self, ns: str, key: str, items: List[Any], updated_at: Optional[float] = None) -> None:
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO api_cache (ns, key, updated_at, items) VALUES (?,?,?,?)",
+                             (ns, key, updated_at or time.time(), json.dumps(items, ensure_ascii=False)))
+            self._puts += 1
+            due = self.compact_every and self._puts % self.compact_every == 0
+        if due:
+            self.compact()
+
+    def retain(self, ns: str, keep_sec: float) -> None:
+        """ns 행 보존 기간 (compact()가 이보다 오래된 행을 지움)"""
+        self._retention[ns] = keep_sec
+
+    def compact(self) -> int:
+        now, removed = time.time(), 0
+        with self._lock, self._db:
+            for ns, keep in self._retention.items():
+                removed += self._db.execute("DELETE FROM api_cache WHERE ns=? AND updated_at < ?",
+                                            (ns, now - keep)).rowcount
+        if removed:
+            print(f"[api_cache] compacted {removed} expired rows")
+        return removed
+
+    def count(self, ns: str) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM api_cache WHERE ns=?", (ns,)).fetchone()[0]
+
+    def migrate_csv(self, ns: str, csv_path: str, key_col: str) -> int:
+        """예전 CSV 캐시 → ns (파일별 1회, 이미 있는 키는 유지). 원본 CSV는 그대로 둔다."""
+        mark = f"csv_migrated:{ns}:{os.path.abspath(csv_path)}"
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM api_cache_info WHERE name=?", (mark,)).fetchone():
+                return 0
+        rows = []
+        if os.path.exists(csv_path):
+            with open(csv_path, "r", newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    key, ts = row.get(key_col), _epoch(row.get("updated_at") or "")
+                    if key and ts is not None:
+                        rows.append((ns, key, ts, row.get("items_json") or "[]"))
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR IGNORE INTO api_cache (ns, key, updated_at, items) VALUES (?,?,?,?)", rows)
+            self._db.execute("INSERT OR REPLACE INTO api_cache_info (name, value) VALUES (?, ?)", (mark, str(time.time())))
+        if rows:
+            print(f"[api_cache] migrated {len(rows)} rows from {csv_path} → {ns}")
+        return len(rows)
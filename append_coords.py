@@ -7,7 +7,7 @@ from datetime import datetime
 
 JSON_FILE = "촬영지_with_coords.json"
 CSV_FILE = "drama_list.csv"
-OUTPUT_FILE = "drama_list.csv"  # 덮어쓰기 (append 모드 아님)
+OUTPUT_FILE = "drama_list.csv"  # 기존 파일이면 신규 행만 뒤에 추가(앞부분 바이트 유지 → 서버 증분 반영)
 
 # ─────────────────────────────────────────────────────────────
 # 작품명 정규화
@@ -149,11 +149,22 @@ def append_places_to_csv():
     # 필드셋 정리(기존 헤더가 있으면 그대로, 없으면 신규의 키 사용)
     fieldnames = (reader[0].keys() if reader else new_rows[0].keys())
 
-    with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
-        writer.writeheader()
-        writer.writerows(reader)
-        writer.writerows(new_rows)
+    if reader and OUTPUT_FILE == CSV_FILE:
+        # 기존 행은 건드리지 않고 뒤에만 추가 (줄바꿈 형식도 기존 파일에 맞춤)
+        with open(CSV_FILE, "rb") as f:
+            raw = f.read()
+        eol = "\r\n" if b"\r\n" in raw[:4096] else "\n"
+        with open(OUTPUT_FILE, "a", newline="", encoding="utf-8") as f:
+            if raw and not raw.endswith(b"\n"):
+                f.write(eol)
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore", lineterminator=eol)
+            writer.writerows(new_rows)
+    else:
+        with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(reader)
+            writer.writerows(new_rows)
 
     print(f"4단계: drama_list.csv에 {len(new_rows)}개 추가 완료")
 
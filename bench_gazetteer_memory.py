@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+bench_gazetteer_memory.py
+-------------------------
+가제티어 레코드 상주 메모리 비교 (tracemalloc)
+
+- before: 기존 방식 {"title","lat","lng","row": DictReader 전체 행} 레코드
+- after : load_gazetteer() → GazetteerRecord(__slots__, 드문 컬럼은 파일 오프셋 지연 로딩)
+
+Usage
+-----
+  python bench_gazetteer_memory.py [drama_list.csv]
+"""
+from __future__ import annotations
+
+import csv
+import gc
+import sys
+import time
+import tracemalloc
+
+from actor_mode_crawler_and_aggregator import load_gazetteer, normalize_title_key
+
+
+def load_legacy(path: str) -> dict:
+    """변경 전 load_gazetteer(CSV 경로)와 같은 구조"""
+    index: dict = {}
+    with open(path, encoding="utf-8-sig") as f:
+        sample = f.read(2048)
+        f.seek(0)
+        reader = csv.DictReader(f, dialect=csv.Sniffer().sniff(sample))
+        for row in reader:
+            try:
+                rec = {"title": row["TITLE_NM"].strip(), "lat": float(row["LC_LA"]),
+                       "lng": float(row["LC_LO"]), "row": row}
+            except (KeyError, ValueError):
+                continue
+            key = normalize_title_key(rec["title"])
+            if key:
+                index.setdefault(key, []).append(rec)
+    return index
+
+
+def measure(label: str, fn, path: str):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    idx = fn(path)
+    dt = (time.perf_counter() - t0) * 1000
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = sum(len(v) for v in idx.values())
+    print(f"{label:<7} records={n:>6}  resident={current / 1e6:7.2f} MB  peak={peak / 1e6:7.2f} MB"
+          f"  per-spot={current / max(n, 1):7.0f} B  load={dt:6.0f} ms")
+    return idx, current
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "drama_list.csv"
+    _, before = measure("before", load_legacy, path)
+    idx, after = measure("after", load_gazetteer, path)
+    print(f"resident memory: {before / 1e6:.2f} MB → {after / 1e6:.2f} MB ({after / before:.0%})")
+    rec = next(iter(idx.values()))[0]
+    print(f"lazy column check: {rec.title} · {rec.place_name} · OPER_TIME={rec.extra('OPER_TIME')!r}")
@@ -0,0 +1,702 @@
+# -*- coding: utf-8 -*-
+"""
+course_builder.py
+-----------------
+지도 군집 + 추천 코스 빌더 (server.py 작품/배우 모드 공용)
+
+- NeighborGraph: 핀 좌표 BallTree 1회 반경 질의 → 이웃 그래프(CSR, km)
+  · 넓은 반경(60km) 지도 군집 / 좁은 반경(10km) 코스 군집 / 군집별 MST 가 전부 이 그래프 하나를 공유
+  · 군집 라벨은 DBSCAN(haversine)과 동일 (core = 이웃+자기 >= min_samples, core 연결요소, border는 낮은 라벨)
+- cluster_by_radius(): 넓은 반경 군집 → 핀마다 cluster 라벨
+- build_courses_from_pins(): 좁은 반경 군집 → MST로 먼 간선 끊기 → optimize_route 경로
+- optimize_route(): anytime 경로 최적화 (최소 삽입 → 2-opt/Or-opt, max_ms 예산, 하한 대비 품질 보고)
+- 군집마다 NumPy 쌍별 거리 행렬(km)을 한 번만 만들고 삽입/2-opt/kNN은 그 배열로 계산
+  (한 쌍씩 haversine 호출 없음)
+
+- CourseTable: 작품키별 (pins, clusters, courses) 미리 계산 테이블
+  · 스냅샷 교체 시 백그라운드에서 계산 (전체 재로딩 = 전 작품, 증분 반영 = 바뀐 작품만)
+  · 항목마다 작품 버전(title_rev)을 같이 저장 → 버전이 다르면 조회 안 됨(요청 경로에서 직접 계산)
+
+Usage
+-----
+  pins, clusters, courses = cluster_and_build_courses(pins)   # 그래프 1회로 두 레벨 + 코스
+
+  table = CourseTable(make_pins)            # make_pins(snapshot, title_key) -> pins
+  store.on_swap = table.on_swap             # DatasetStore 교체 훅
+  hit = table.get(title_key, snap.title_rev.get(title_key))
+
+  pins, clmap = cluster_by_radius(pins, eps_km=60.0)
+  courses = build_courses_from_pins(pins)          # [{id, title, center, spots, distance_km, polyline}]
+"""
+from __future__ import annotations
+
+import time
+import heapq
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+from sklearn.neighbors import BallTree
+
+from spatial_index import to_radians
+
+EARTH_R_KM = 6371.0
+_W_EPS = 1e-9   # 희소 그래프는 0 가중치를 '간선 없음'으로 보므로(같은 좌표 중복) 간선 가중치에 더해 둠
+
+
+def pairwise_km(lats, lngs) -> np.ndarray:
+    """(n,) 좌표 → (n, n) haversine 거리 행렬(km), 브로드캐스팅 1회"""
+    la = np.radians(np.asarray(lats, dtype=np.float64))
+    lo = np.radians(np.asarray(lngs, dtype=np.float64))
+    h = (np.sin((la[:, None] - la[None, :]) / 2) ** 2
+         + np.cos(la)[:, None] * np.cos(la)[None, :] * np.sin((lo[:, None] - lo[None, :]) / 2) ** 2)
+    return 2 * EARTH_R_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def _dist_matrix(points: List[Dict[str, Any]]) -> np.ndarray:
+    return pairwise_km([p['lat'] for p in points], [p['lng'] for p in points])
+
+
+def _valid(pins) -> List[Dict[str, Any]]:
+    return [p for p in pins if p.get("lat") is not None and p.get("lng") is not None]
+
+
+class NeighborGraph:
+    """좌표 n개의 radius_km 이내 이웃 그래프 (자기 자신 제외, 가중치 = 거리km + _W_EPS)"""
+
+    def __init__(self, lats, lngs, radius_km: float):
+        self.n, self.radius_km = len(lats), float(radius_km)
+        if not self.n:
+            self.graph = csr_matrix((0, 0))
+            return
+        X = to_radians(lats, lngs)
+        ind, dist = BallTree(X, metric="haversine").query_radius(
+            X, r=self.radius_km / EARTH_R_KM, return_distance=True)
+        rows = np.repeat(np.arange(self.n), [len(a) for a in ind])
+        cols = np.concatenate(ind)
+        d = np.concatenate(dist) * EARTH_R_KM
+        keep = rows != cols
+        self.graph = csr_matrix((d[keep] + _W_EPS, (rows[keep], cols[keep])), shape=(self.n, self.n))
+
+    @classmethod
+    def from_pins(cls, pins, radius_km: float) -> "NeighborGraph":
+        valid = _valid(pins)
+        return cls([p["lat"] for p in valid], [p["lng"] for p in valid], radius_km)
+
+    def within(self, eps_km: float) -> csr_matrix:
+        """eps_km 이하 간선만 남긴 부분 그래프 (추가 이웃 탐색 없음)"""
+        if eps_km >= self.radius_km:
+            return self.graph
+        g = self.graph.copy()
+        g.data[g.data > eps_km + _W_EPS] = 0
+        g.eliminate_zeros()
+        return g
+
+    def labels(self, eps_km: float, min_samples: int = 1) -> np.ndarray:
+        """DBSCAN(eps_km, min_samples, haversine)과 같은 라벨 (-1 = noise)"""
+        if eps_km > self.radius_km:
+            raise ValueError(f"eps_km={eps_km} > graph radius {self.radius_km}")
+        labels = np.full(self.n, -1, dtype=np.intp)
+        if not self.n:
+            return labels
+        g = self.within(eps_km)
+        core = np.flatnonzero(np.diff(g.indptr) + 1 >= min_samples)
+        if not len(core):
+            return labels
+        _, lab = connected_components(g[core][:, core], directed=False)
+        labels[core] = lab   # scipy는 낮은 인덱스부터 라벨을 매김 → DBSCAN 라벨 순서와 같음
+        for i in np.flatnonzero(labels < 0):
+            nb = g.indices[g.indptr[i]:g.indptr[i + 1]]
+            nb_lab = labels[nb][np.isin(nb, core)]
+            if len(nb_lab):
+                labels[i] = nb_lab.min()
+        return labels
+
+    def mst_edges(self, ids, eps_km: float) -> List[Tuple[int, int, float]]:
+        """ids(그래프 인덱스) 부분 그래프의 MST 간선 (ids 기준 로컬 인덱스, 거리km)"""
+        ids = np.asarray(ids, dtype=np.intp)
+        t = minimum_spanning_tree(self.within(eps_km)[ids][:, ids]).tocoo()
+        adj = defaultdict(list)
+        for i, j, w in zip(t.row.tolist(), t.col.tolist(), t.data.tolist()):
+            adj[i].append((w, j)); adj[j].append((w, i))
+        # 0번에서 Prim 순서로 나열 (방향 = 방문 노드 → 새 노드) — 이후 DFS/코스 순서가 밀집 Prim과 같게
+        seen, edges = {0}, []
+        pq = [(w, 0, j) for w, j in adj[0]]
+        heapq.heapify(pq)
+        while pq:
+            w, i, j = heapq.heappop(pq)
+            if j in seen:
+                continue
+            seen.add(j)
+            edges.append((i, j, w - _W_EPS))
+            for w2, k in adj[j]:
+                if k not in seen:
+                    heapq.heappush(pq, (w2, j, k))
+        return edges
+
+
+def cluster_by_radius(pins, eps_km=60.0, min_samples=1, graph: Optional[NeighborGraph] = None):
+    valid = _valid(pins)
+    if not valid:
+        return pins, {}
+    if graph is None or graph.n != len(valid) or graph.radius_km < eps_km:
+        graph = NeighborGraph.from_pins(pins, eps_km)
+    labels = graph.labels(eps_km, min_samples)
+    j = 0
+    for p in pins:
+        if p.get("lat") is not None and p.get("lng") is not None:
+            p["cluster"] = int(labels[j]) if labels[j] >= 0 else -1
+            j += 1
+        else:
+            p["cluster"] = -1
+    clmap = {}
+    for p in pins:
+        clmap.setdefault(p["cluster"], []).append(p)
+    return pins, clmap
+
+
+AUTO_EPS_SAMPLE = 2000   # 이보다 많으면 질의 점만 표본 추출 (트리는 전체 점으로)
+
+
+def _kNN_distances(points, k=1, sample: Optional[int] = AUTO_EPS_SAMPLE, seed: int = 0) -> np.ndarray:
+    """점마다 자기 자신 제외 k번째 최근접 거리(km) — BallTree(haversine) 질의, O(n log n).
+    sample 개를 넘으면 고정 시드로 뽑은 표본 점만 질의한다."""
+    n = len(points)
+    if n < 2:
+        return np.empty(0)
+    k = min(k, n - 1)
+    X = to_radians([p['lat'] for p in points], [p['lng'] for p in points])
+    Q = X
+    if sample and n > sample:
+        Q = X[np.random.default_rng(seed).choice(n, size=sample, replace=False)]
+    dist, _ = BallTree(X, metric="haversine").query(Q, k=k + 1)   # 0열 = 자기 자신(또는 같은 좌표)
+    return dist[:, k] * EARTH_R_KM
+
+
+def _auto_eps_km(points):
+    if len(points) < 3:
+        return 6.0
+    nn = _kNN_distances(points, k=1)
+    if not len(nn):
+        return 6.0
+    med = float(np.median(nn))
+    eps = med * 4.0
+    return max(1.2, min(8.0, eps))
+
+
+def _split_by_long_edges(n, mst_edges):
+    if not mst_edges:
+        return [list(range(n))]
+    lens = [d for (_,_,d) in mst_edges]
+    med = float(np.median(lens)) if lens else 0.0
+    thr = max(4.0, med*4.0)
+    g = defaultdict(list)
+    for i, j, d in mst_edges:
+        if d > thr:
+            continue
+        g[i].append(j)
+        g[j].append(i)
+    comps, seen = [], set()
+    for s in range(n):
+        if s in seen:
+            continue
+        if s not in g and n > 1:
+            continue
+        q = [s]
+        seen.add(s)
+        comp = []
+        while q:
+            u = q.pop()
+            comp.append(u)
+            for v in g[u]:
+                if v not in seen:
+                    seen.add(v)
+                    q.append(v)
+        if comp:
+            comps.append(comp)
+    if not comps and n >= 2:
+        i, j, _ = min(mst_edges, key=lambda x: x[2])
+        comps = [[i, j]]
+    return comps or [list(range(n))]
+
+
+def _expired(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.perf_counter() > deadline
+
+
+def path_length(path: List[int], D: np.ndarray) -> float:
+    if len(path) < 2:
+        return 0.0
+    p = np.asarray(path, dtype=np.intp)
+    return float(D[p[:-1], p[1:]].sum())
+
+
+def mst_weight(D: np.ndarray) -> float:
+    """밀집 Prim MST 총길이 — 모든 경로(스패닝 트리)의 하한"""
+    n = len(D)
+    if n <= 1:
+        return 0.0
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    best = D[0].copy()
+    best[0] = np.inf
+    total = 0.0
+    for _ in range(n - 1):
+        u = int(np.argmin(best))
+        total += float(best[u])
+        visited[u] = True
+        best[u] = np.inf
+        np.minimum(best, np.where(visited, np.inf, D[u]), out=best)
+    return total
+
+
+def _farthest_pair(D: np.ndarray) -> List[int]:
+    iu, ju = np.triu_indices(len(D), 1)   # 행 우선 순서 → 최장 쌍 동률이면 앞쪽 쌍
+    far = int(np.argmax(D[iu, ju]))
+    return [int(iu[far]), int(ju[far])]
+
+
+def _nearest_neighbor_path(D: np.ndarray, path: Optional[List[int]] = None,
+                           deadline: Optional[float] = None) -> List[int]:
+    """(path 끝에서) 가장 가까운 미방문 점을 차례로 붙임 — O(n²), 큰 n / 시간 초과 시 초기 경로.
+    deadline이 지나면 남은 점은 인덱스 순서로 그대로 뒤에 붙인다."""
+    n = len(D)
+    if not path:
+        # 임의 점에서 가장 먼 점 (O(n)) — 최장 쌍(O(n²)) 대신 끝점 근사
+        path = [int(np.argmax(D[0]))]
+    path = list(path)
+    unvis = np.ones(n, dtype=bool)
+    unvis[path] = False
+    while unvis.any():
+        if _expired(deadline):
+            path.extend(np.flatnonzero(unvis).tolist())
+            break
+        row = np.where(unvis, D[path[-1]], np.inf)
+        k = int(np.argmin(row))
+        path.append(k)
+        unvis[k] = False
+    return path
+
+
+def _cheapest_insertion_path(D: np.ndarray, deadline: Optional[float] = None) -> List[int]:
+    """가장 먼 두 점에서 시작해, 매 단계 (앞/뒤/사이) 삽입 비용 최소인 점을 행렬 연산으로 선택.
+    시간 초과 시 남은 점은 최근접 이웃으로 뒤에 붙인다."""
+    n = len(D)
+    if n <= 1:
+        return list(range(n))
+    path = _farthest_pair(D)
+    unvis = np.ones(n, dtype=bool)
+    unvis[path] = False
+    while unvis.any():
+        if _expired(deadline):
+            return _nearest_neighbor_path(D, path, deadline)
+        ks = np.flatnonzero(unvis)
+        a, b = np.asarray(path[:-1]), np.asarray(path[1:])
+        # 열 순서: 앞, 뒤, 사이(1..len-1) — 원래 스캔 순서와 같아 동률 처리도 같음
+        cost = np.column_stack([
+            D[ks, path[0]],
+            D[path[-1], ks],
+            D[np.ix_(ks, a)] + D[np.ix_(ks, b)] - D[a, b][None, :],
+        ])
+        r, c = np.unravel_index(int(np.argmin(cost)), cost.shape)
+        k = int(ks[r])
+        if c == 0:
+            path.insert(0, k)
+        elif c == 1:
+            path.append(k)
+        else:
+            path.insert(int(c) - 1, k)
+        unvis[k] = False
+    return path
+
+
+def _two_opt(path: List[int], D: np.ndarray, max_loops: int = 80,
+             deadline: Optional[float] = None) -> Tuple[List[int], bool]:
+    """
+    first-improvement 2-opt (양 끝점 고정). i마다 j 후보 전체의 이득을 한 번에 계산하고, 첫 개선 j를
+    적용한 뒤 그 다음 j부터 이어서 본다 (스칼라 이중 루프와 같은 순서/결과). 반환: (경로, 개선 여부)
+    """
+    p = np.asarray(path, dtype=np.intp)
+    m = len(p)
+    improved, loop, any_imp = True, 0, False
+    while improved and loop < max_loops:
+        improved = False; loop += 1
+        for i in range(1, m-2):
+            if _expired(deadline):
+                return p.tolist(), any_imp
+            start = i + 1
+            while start <= m - 2:
+                js = np.arange(start, m - 1)
+                before = D[p[i-1], p[i]] + D[p[js], p[js+1]]
+                after = D[p[i-1], p[js]] + D[p[i], p[js+1]]
+                hit = np.flatnonzero(after + 1e-9 < before)
+                if not len(hit):
+                    break
+                j = int(js[hit[0]])
+                p[i:j+1] = p[i:j+1][::-1].copy()
+                improved = any_imp = True
+                start = j + 1
+    return p.tolist(), any_imp
+
+
+def _two_opt_nbr(p: List[int], Dl: List[List[float]], nbr: List[List[int]],
+                 deadline: Optional[float] = None) -> bool:
+    """
+    이웃 목록 2-opt 1회 (큰 n용): 새 간선이 이웃 목록 안에 있는 뒤집기만 본다.
+    열린 경로라 앞/뒤 끝 구간 뒤집기(끝점 변경)도 포함. p를 제자리 수정.
+    """
+    m = len(p)
+    pos = [0] * m
+    for k, v in enumerate(p):
+        pos[v] = k
+    improved = False
+    for ap in range(m):
+        if _expired(deadline):
+            break
+        a = p[ap]
+        for c in nbr[a]:
+            cp = pos[c]
+            if cp > ap + 1:            # 새 간선 (a, c): p[ap+1..cp] 뒤집기
+                i, j = ap + 1, cp
+                gain = Dl[a][p[i]] - Dl[a][c]
+                if j < m - 1:
+                    gain += Dl[c][p[j+1]] - Dl[p[i]][p[j+1]]
+            elif cp < ap - 1:          # 새 간선 (c, a): p[cp..ap-1] 뒤집기
+                i, j = cp, ap - 1
+                gain = Dl[p[j]][a] - Dl[c][a]
+                if i > 0:
+                    gain += Dl[p[i-1]][c] - Dl[p[i-1]][p[j]]
+            else:
+                continue
+            if gain > 1e-9:
+                p[i:j+1] = p[i:j+1][::-1]
+                for k in range(i, j + 1):
+                    pos[p[k]] = k
+                improved = True
+                break
+    return improved
+
+
+def _or_opt(p: List[int], Dl: List[List[float]], nbr: List[List[int]],
+            deadline: Optional[float] = None, max_seg: int = 3) -> bool:
+    """Or-opt 1회: 길이 1~3 구간을 (정/역방향으로) 이웃 점 옆으로 옮겨 줄어들면 적용. p를 제자리 수정."""
+    m = len(p)
+    if m < 3:
+        return False
+    pos = {v: k for k, v in enumerate(p)}
+    improved = False
+    i = 0
+    while i < m:
+        if _expired(deadline):
+            break
+        moved = False
+        for L in range(1, max_seg + 1):
+            if i + L > m or L >= m - 1:
+                break
+            seg = p[i:i+L]
+            first, last = seg[0], seg[-1]
+            prev = p[i-1] if i > 0 else None
+            nxt = p[i+L] if i + L < m else None
+            gain_rm = ((Dl[prev][first] if prev is not None else 0.0)
+                       + (Dl[last][nxt] if nxt is not None else 0.0)
+                       - (Dl[prev][nxt] if prev is not None and nxt is not None else 0.0))
+            if gain_rm <= 1e-9:
+                continue
+            inseg = set(seg)
+            best = (1e-9, None)
+            for c in set(nbr[first]) | set(nbr[last]):
+                if c in inseg:
+                    continue
+                cp = pos[c]
+                for x, y in ((c, p[cp+1] if cp + 1 < m else None), (p[cp-1] if cp > 0 else None, c)):
+                    if x in inseg or y in inseg:
+                        continue
+                    for s1, s2 in ((first, last), (last, first)):
+                        add = ((Dl[x][s1] if x is not None else 0.0) + (Dl[s2][y] if y is not None else 0.0)
+                               - (Dl[x][y] if x is not None and y is not None else 0.0))
+                        if gain_rm - add > best[0]:
+                            best = (gain_rm - add, (x, s1 != first))
+            if best[1] is None:
+                continue
+            x, rev = best[1]
+            rest = p[:i] + p[i+L:]
+            k = 0 if x is None else rest.index(x) + 1
+            p[:] = rest[:k] + (seg[::-1] if rev else seg) + rest[k:]
+            pos = {v: k2 for k2, v in enumerate(p)}
+            improved = moved = True
+            break
+        if not moved:
+            i += 1
+    return improved
+
+
+class _LazyRows:
+    """행을 처음 볼 때만 만드는 행렬 뷰 — 큰 n에서 O(n²) 준비(tolist/argpartition)를 예산 밖으로 빼지 않게"""
+    __slots__ = ("_rows", "_make")
+
+    def __init__(self, n: int, make: Callable[[int], list]):
+        self._rows: List[Optional[list]] = [None] * n
+        self._make = make
+
+    def __getitem__(self, i: int) -> list:
+        r = self._rows[i]
+        if r is None:
+            r = self._rows[i] = self._make(i)
+        return r
+
+
+def _nbr_row(D: np.ndarray, i: int, k: int) -> List[int]:
+    row = D[i].copy()
+    row[i] = np.inf
+    return np.argpartition(row, k - 1)[:k].tolist()
+
+
+FULL_2OPT_MAX_N = 200      # 이하면 전수 2-opt(벡터화), 초과면 이웃 목록 2-opt
+INSERTION_MAX_N = 400      # 초과면 최소 삽입(O(n³)) 대신 최근접 이웃으로 초기 경로
+MST_BOUND_MAX_N = 1000     # 초과면 품질 보고용 MST 하한(O(n²))을 생략 (lower_bound_km = None)
+
+
+def optimize_route(D: np.ndarray, max_ms: Optional[float] = None, k_neighbors: int = 10,
+                   t0: Optional[float] = None) -> Tuple[List[int], Dict[str, Any]]:
+    """
+    anytime 경로 최적화 (열린 경로). max_ms 안에서 지금까지 찾은 가장 좋은 경로를 돌려준다.
+      최소 삽입(큰 n은 최근접 이웃) → [2-opt → Or-opt] 반복, 개선 없으면 수렴
+    t0: 예산 시작 시각(perf_counter) — 호출 쪽 거리 행렬 준비까지 예산에 넣으려면 그 전에 잰 값
+    반환 quality: length_km / initial_km / lower_bound_km(MST, 예산 소진·큰 n이면 None) / gap_pct(하한 대비 상한)
+                  / converged / passes / elapsed_ms
+    """
+    t0 = time.perf_counter() if t0 is None else t0
+    deadline = None if max_ms is None else t0 + max_ms / 1000.0
+    n = len(D)
+    if n <= 1:
+        return list(range(n)), {"length_km": 0.0, "initial_km": 0.0, "lower_bound_km": 0.0, "gap_pct": 0.0,
+                                "converged": True, "passes": 0, "elapsed_ms": 0.0}
+    if n <= INSERTION_MAX_N:
+        # 최소 삽입은 예산의 절반까지만 (넘으면 남은 점은 최근접 이웃) → 나머지는 개선 단계 몫
+        half = None if deadline is None else t0 + max_ms / 2000.0
+        path = _cheapest_insertion_path(D, half)
+    else:
+        path = _nearest_neighbor_path(D, deadline=deadline)
+    initial = path_length(path, D)
+    k = min(k_neighbors, n - 1)
+    # 행 리스트는 스칼라 조회가 빠르지만 만들고 해제하는 데 행마다 O(n) → 큰 n은 numpy 행 뷰 (해제 비용 없음)
+    Dl = _LazyRows(n, (lambda i: D[i]) if n > INSERTION_MAX_N else (lambda i: D[i].tolist()))
+    nbr = _LazyRows(n, lambda i: _nbr_row(D, i, k))
+    passes, converged = 0, False
+    while not _expired(deadline):
+        passes += 1
+        if n <= FULL_2OPT_MAX_N:
+            path, imp = _two_opt(path, D, max_loops=1, deadline=deadline)
+        else:
+            imp = _two_opt_nbr(path, Dl, nbr, deadline)
+        imp = _or_opt(path, Dl, nbr, deadline) or imp
+        if not imp and not _expired(deadline):
+            converged = True
+            break
+    length = path_length(path, D)
+    lb = None if n > MST_BOUND_MAX_N or _expired(deadline) else mst_weight(D)
+    return path, {
+        "length_km": round(length, 3),
+        "initial_km": round(initial, 3),
+        "lower_bound_km": None if lb is None else round(lb, 3),
+        "gap_pct": None if lb is None else (round((length - lb) / lb * 100, 1) if lb > 0 else 0.0),
+        "converged": converged,
+        "passes": passes,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2),
+    }
+
+
+def _guess_course_title(items):
+    toks_list = []
+    for it in items:
+        addr = (it.get('subtitle') or '').strip()
+        toks = [t for t in addr.split() if t]
+        toks_list.append(toks[:3])
+    if not toks_list:
+        return "코스"
+    c1 = Counter(t[0] for t in toks_list if len(t) >= 1)
+    city = c1.most_common(1)[0][0] if c1 else "코스"
+    c2 = Counter((t[0], t[1]) for t in toks_list if len(t) >= 2)
+    if c2 and c2.most_common(1)[0][1] >= 2:
+        city = " ".join(c2.most_common(1)[0][0])
+    return f"{city} 코스"
+
+
+def summarize_clusters(clmap) -> List[Dict[str, Any]]:
+    """cluster_by_radius의 clmap → 응답용 군집 요약 (noise 제외)"""
+    out = []
+    for lb, items in sorted(clmap.items()):
+        pts = _valid(items)
+        if lb < 0 or not pts:
+            continue
+        lats, lngs = [p["lat"] for p in pts], [p["lng"] for p in pts]
+        out.append({
+            "id": int(lb),
+            "count": len(pts),
+            "center": {"lat": sum(lats)/len(lats), "lng": sum(lngs)/len(lngs)},
+            "bbox": [min(lats), min(lngs), max(lats), max(lngs)],
+            "pins": [p.get("id") for p in pts],
+        })
+    return out
+
+
+def build_courses_from_pins(pins, eps_km_small=10.0, min_samples=2, graph: Optional[NeighborGraph] = None,
+                            max_ms: Optional[float] = None):
+    """max_ms: 경로 최적화 전체 시간 예산 (코스별로 남은 예산을 나눠 씀, None = 수렴까지)"""
+    valid = _valid(pins)
+    if not valid:
+        return []
+    if eps_km_small is None:
+        eps_km_small = _auto_eps_km(valid)
+    if graph is None or graph.n != len(valid) or graph.radius_km < eps_km_small:
+        graph = NeighborGraph.from_pins(pins, eps_km_small)
+    labels = graph.labels(eps_km_small, min_samples)
+
+    label_to_items: dict[int, list] = defaultdict(list)
+    for i, lb in enumerate(labels):
+        if lb < 0:
+            continue
+        label_to_items[int(lb)].append(i)
+
+    t_end = None if max_ms is None else time.perf_counter() + max_ms / 1000.0   # 거리 행렬 준비도 예산에 포함
+    jobs = []   # (군집 id, 코스 핀, 코스 거리 행렬)
+    for gid, gids in label_to_items.items():
+        if len(gids) < 2:
+            continue
+        items = [valid[i] for i in gids]
+        D = _dist_matrix(items)   # 군집당 1회 (삽입/2-opt/Or-opt)
+        subs = _split_by_long_edges(len(items), graph.mst_edges(gids, eps_km_small))
+        for sub in subs:
+            if len(sub) >= 2:
+                jobs.append((gid, [items[i] for i in sub], D[np.ix_(sub, sub)]))
+
+    courses = []
+    for n_left, (gid, sub_items, Dsub) in zip(range(len(jobs), 0, -1), jobs):
+        budget = None if t_end is None else max(0.0, (t_end - time.perf_counter()) * 1000.0 / n_left)
+        order, quality = optimize_route(Dsub, max_ms=budget)
+        ordered = [sub_items[k] for k in order]
+        path = [[p['lat'], p['lng']] for p in ordered]
+
+        cx = sum(p['lat'] for p in sub_items)/len(sub_items)
+        cy = sum(p['lng'] for p in sub_items)/len(sub_items)
+        title = _guess_course_title(sub_items)
+
+        courses.append({
+            "id": f"course_{gid}_{len(courses)}",
+            "title": title,
+            "center": {"lat": cx, "lng": cy},
+            "spots": [p['id'] for p in ordered],
+            "distance_km": round(quality["length_km"], 1),
+            "polyline": path,
+            "quality": {k: quality[k] for k in ("lower_bound_km", "gap_pct", "converged")},
+        })
+    courses.sort(key=lambda c: (c['center']['lat'], c['center']['lng']))
+    return courses
+
+
+def cluster_and_build_courses(pins, eps_km_big=60.0, eps_km_small=10.0, min_samples=2,
+                              max_ms: Optional[float] = None):
+    """
+    지도 군집(넓은 반경) + 코스(좁은 반경)를 이웃 그래프 1개로. max_ms = 경로 최적화 시간 예산.
+    반환: (cluster 라벨이 붙은 pins, 군집 요약 목록, 코스 목록)
+    """
+    valid = _valid(pins)
+    if not valid:
+        return pins, [], []
+    small = eps_km_small if eps_km_small is not None else _auto_eps_km(valid)
+    graph = NeighborGraph.from_pins(pins, max(eps_km_big, small))
+    pins, clmap = cluster_by_radius(pins, eps_km=eps_km_big, min_samples=1, graph=graph)
+    courses = build_courses_from_pins(pins, eps_km_small=small, min_samples=min_samples, graph=graph, max_ms=max_ms)
+    return pins, summarize_clusters(clmap), courses
+
+
+class CourseTable:
+    """
+    작품키 → (rev, pins, clusters, courses). 백그라운드 계산(워커 스레드 1개)과 요청 경로(get_or_build)가
+    같은 예산으로 계산하고, 같은 rev에는 먼저 저장된 결과만 쓴다 → 미리 계산 완료 여부와 무관하게 같은 코스 순서.
+    """
+
+    def __init__(self, make_pins: Callable[[Any, str], List[Dict[str, Any]]],
+                 eps_km_big: float = 60.0, eps_km_small: float = 10.0, max_ms: Optional[float] = None):
+        self.make_pins = make_pins
+        self.eps = (eps_km_big, eps_km_small)
+        self.max_ms = max_ms   # 작품당 경로 최적화 예산 (None = 수렴까지) — 요청 경로와 공용
+        self._rows: Dict[str, Tuple[int, list, list, list]] = {}
+        self._lock = threading.Lock()
+        self._pending: Optional[Tuple[Any, Optional[set]]] = None   # (최신 스냅샷, 계산할 키 / None=전체)
+        self._running = False
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, key: str, rev: Optional[int]) -> Optional[Tuple[list, list, list]]:
+        row = self._rows.get(key)
+        if row is None or rev is None or row[0] != rev:
+            return None
+        return row[1], row[2], row[3]
+
+    def _compute(self, snap, key: str) -> Tuple[list, list, list]:
+        return cluster_and_build_courses(self.make_pins(snap, key), *self.eps, max_ms=self.max_ms)
+
+    def _store(self, key: str, rev: int, result: Tuple[list, list, list]) -> Tuple[list, list, list]:
+        """같은 rev가 이미 있으면(다른 경로가 먼저 계산) 그것을 유지·반환 → 한 rev에 결과 1개"""
+        with self._lock:
+            row = self._rows.get(key)
+            if row is not None and row[0] == rev:
+                return row[1], row[2], row[3]
+            self._rows[key] = (rev, *result)   # dict 항목 1개 대입 → 조회와 경합 없음
+            return result
+
+    def get_or_build(self, snap, key: str, rev: Optional[int]) -> Tuple[list, list, list]:
+        """요청 경로: 저장된 결과가 없으면 같은 예산으로 계산해 저장 (rev 없으면 저장 안 함)"""
+        hit = self.get(key, rev)
+        if hit is not None:
+            return hit
+        result = self._compute(snap, key)
+        return result if rev is None else self._store(key, rev, result)
+
+    def build(self, snap, keys=None) -> int:
+        """snap 기준으로 keys(None=전 작품) 계산해 교체. 반환: 계산한 작품 수"""
+        keys = list(snap.title_rev) if keys is None else list(keys)
+        done = 0
+        for key in keys:
+            rev = snap.title_rev.get(key)
+            if rev is None or (key in self._rows and self._rows[key][0] == rev):
+                continue
+            self._store(key, rev, self._compute(snap, key))
+            done += 1
+        return done
+
+    def on_swap(self, old, new) -> None:
+        """DatasetStore.on_swap 훅: 바뀐 작품만(증분) 또는 전체를 백그라운드로"""
+        keys = None if new.changed_titles is None else set(new.changed_titles)
+        with self._lock:
+            if self._pending is not None:
+                prev = self._pending[1]
+                keys = None if (prev is None or keys is None) else (prev | keys)
+            self._pending = (new, keys)
+            if self._running:
+                return
+            self._running = True
+        threading.Thread(target=self._run, name="course-precompute", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                job, self._pending = self._pending, None
+                if job is None:
+                    self._running = False
+                    return
+            snap, keys = job
+            t0 = time.perf_counter()
+            try:
+                n = self.build(snap, keys)
+                if keys is None:   # 전체 재계산이면 사라진 작품 정리
+                    for k in [k for k in self._rows if k not in snap.title_rev]:
+                        self._rows.pop(k, None)
+                print(f"[courses] precomputed {n} titles (v{snap.version}) in {(time.perf_counter() - t0) * 1000:.0f} ms")
+            except Exception as e:
+                print(f"[courses] precompute failed: {e}")
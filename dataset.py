@@ -0,0 +1,568 @@
+# -*- coding: utf-8 -*-
+"""
+dataset.py
+----------
+촬영지 CSV(drama_list.csv) 단일 로더 → 불변 스냅샷
+
+- CSV는 한 번만 파싱: 작품 검색 / place 모드 / 주변 촬영지 / 배우 모드 모두 같은 스냅샷 사용
+- 스냅샷 = 컬럼형 테이블(SpotTable) + 공간 인덱스(SpotIndex) + 작품키 n-gram 역색인
+           + 자동완성 트라이 + 파일 식별 정보(mtime/size)
+- 컬럼: TITLE_NM / LC_LA / LC_LO 기본, 없으면 후보 이름으로 추정
+- DatasetStore: 버전 스냅샷 더블 버퍼링
+  · 새 스냅샷은 백그라운드에서 만들고 참조 1회 대입으로 교체 (빈 결과 구간 없음)
+  · 요청은 시작 시 잡은 스냅샷을 끝까지 사용
+  · 파일 감시(mtime/size 폴링, 안정화 1주기 대기) + 재로딩 합치기(동시 1회)
+  · 뒤에 행만 추가된 경우 추가분만 반영(apply_appends), 그 외엔 전체 재로딩
+- 바이너리 스냅샷(artifact): 컬럼 .npy(mmap) + 문자열 풀/자동완성 JSON + manifest(sha1/mtime)
+  · 서버 시작 시 CSV 파싱 없이 로딩, 원본 CSV와 안 맞으면(stale) CSV로 대체
+
+Usage
+-----
+  snap = load_dataset("drama_list.csv")
+  ids  = snap.title_ids("오징어 게임 시즌 1")
+  ids, d = snap.geo.radius(37.57, 126.98, 3.0)
+
+  store = DatasetStore("drama_list.csv")
+  store.start_watcher(2.0)
+  snap = store.get()
+
+  python dataset.py build --csv drama_list.csv --out cache/dataset   # 바이너리 스냅샷 빌드
+
+증분 반영
+---------
+append_coords.py는 기존 행 뒤에 SEQ_NO가 더 큰 행만 덧붙인다. 파일 끝 지문이 그대로면
+추가된 바이트만 파싱해 테이블/공간 인덱스/작품별 버전(title_rev)에 합친다.
+"""
+from __future__ import annotations
+
+import os
+import re
+import csv
+import json
+import shutil
+import difflib
+import io
+import hashlib
+import itertools
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from spatial_index import SpotIndex
+from spot_table import SpotTable
+from title_index import TitleNgramIndex, TitleSuggestTrie, guarded_match
+
+TITLE_COLS = ["TITLE_NM", "title", "작품명", "work", "작품", "drama", "드라마"]
+LAT_COLS   = ["LC_LA", "lat", "latitude", "위도"]
+LNG_COLS   = ["LC_LO", "lng", "long", "lon", "longitude", "경도"]
+
+TAIL_BYTES = 256   # 증분 반영 시 '앞부분 그대로인지' 확인할 끝부분 길이
+ARTIFACT_FORMAT = 1   # 바이너리 스냅샷 포맷 버전 (바뀌면 기존 artifact는 stale)
+
+_VERSION = itertools.count(1)
+
+
+def norm_title(s: str) -> str:
+    """작품명 정규화(강화): 공백/기호 제거 + 시즌/파트/편/부/말미 숫자 제거 + 소문자"""
+    s = (s or "").lower()
+
+    # 괄호 문자 제거
+    s = re.sub(r"[(){}\[\]〈〉《》「」『』【】]", "", s)
+
+    # 시즌/파트/편/부/회 표기 제거 (공백 유무 모두 허용)
+    s = re.sub(r"(시즌|season)\s*\d+", "", s, flags=re.IGNORECASE)
+    s = re.sub(r"(파트|part)\s*\d+",  "", s, flags=re.IGNORECASE)
+    s = re.sub(r"\d+\s*(편|부|회)\b",  "", s)
+
+    # 구분자/공백 제거
+    s = re.sub(r"[\s·\.\-_:~]+", "", s)
+
+    # 맨 끝의 숫자(예: 오징어게임2)도 제거
+    s = re.sub(r"\d+$", "", s)
+
+    return s.strip()
+
+
+def _guess_col(cols: List[str], candidates: List[str]) -> Optional[str]:
+    lc = {c.lower(): c for c in cols}
+    for cand in candidates:
+        if cand.lower() in lc:
+            return lc[cand.lower()]
+    match = difflib.get_close_matches(candidates[0].lower(), list(lc), n=1, cutoff=0.6)
+    return lc[match[0]] if match else None
+
+
+def _parse_coord(v: Any) -> Optional[float]:
+    try:
+        f = float(str(v).strip())
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(f) else f
+
+
+@dataclass(frozen=True)
+class CsvSchema:
+    """증분 파싱(파일 꼬리만 읽기)에 필요한 헤더/방언/인코딩 정보"""
+    fieldnames: Tuple[str, ...]
+    title_col: str
+    lat_col: str
+    lng_col: str
+    delimiter: str = ","
+    quotechar: str = '"'
+    encoding: str = "utf-8"
+
+
+def _decode(raw: bytes) -> Tuple[str, str]:
+    try:
+        return raw.decode("utf-8-sig"), "utf-8"
+    except UnicodeDecodeError:
+        return raw.decode("cp949", errors="ignore"), "cp949"
+
+
+def _tail_sig(raw: bytes) -> str:
+    """파일 끝 TAIL_BYTES 지문 — 다음 변경이 '뒤에 추가'인지 판별용"""
+    return hashlib.sha1(raw[-TAIL_BYTES:]).hexdigest()
+
+
+def _seq_of(row: Dict[str, str]) -> Optional[int]:
+    try:
+        return int(str(row.get("SEQ_NO") or "").strip())
+    except ValueError:
+        return None
+
+
+def _records(rows: Iterator[Dict[str, str]], schema: CsvSchema,
+             min_seq: Optional[int] = None) -> Iterator[Tuple[str, str, Dict[str, str], float, float]]:
+    """row → (정규화 작품키, 원제목, row, lat, lng). 좌표/제목 없는 행(+min_seq 이하 SEQ_NO)은 건너뜀."""
+    for row in rows:
+        if min_seq is not None:
+            seq = _seq_of(row)
+            if seq is not None and seq <= min_seq:
+                continue
+        lat, lng = _parse_coord(row.get(schema.lat_col)), _parse_coord(row.get(schema.lng_col))
+        if lat is None or lng is None:
+            continue
+        title = (row.get(schema.title_col) or "").strip()
+        if not title:
+            continue
+        # 숫자뿐인 제목(예: 1987)은 정규화 키가 ""가 되지만 그대로 둔다(기존 동작)
+        yield norm_title(title), title, row, lat, lng
+
+
+def parse_csv(text: str, encoding: str = "utf-8", title_col: Optional[str] = None,
+              lat_col: Optional[str] = None, lng_col: Optional[str] = None) -> Tuple[CsvSchema, List[tuple]]:
+    """CSV 전체 텍스트 → (스키마, 레코드 목록)"""
+    sample = text[:4096]
+    try:
+        dialect = csv.Sniffer().sniff(sample) if sample else csv.excel
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(text, newline=""), dialect=dialect)
+    cols = [c.strip() for c in (reader.fieldnames or [])]
+    tcol = title_col or _guess_col(cols, TITLE_COLS)
+    latc = lat_col or _guess_col(cols, LAT_COLS)
+    lngc = lng_col or _guess_col(cols, LNG_COLS)
+    if not (tcol and latc and lngc):
+        raise ValueError(f"Column mapping required. Found columns={cols}; need title/lat/lng.")
+    schema = CsvSchema(tuple(reader.fieldnames or ()), tcol, latc, lngc,
+                       dialect.delimiter, dialect.quotechar or '"', encoding)
+    return schema, list(_records(reader, schema))
+
+
+def _suggest_items(table: SpotTable, lo: int = 0) -> List[Tuple[str, str, int]]:
+    """행 [lo:] → (작품키, 대표 원제목, 촬영지 수). 대표 제목 = 그 작품키에서 가장 많이 쓰인 TITLE_NM."""
+    pairs = Counter(zip(table.title_code[lo:].tolist(), table.work_code[lo:].tolist()))
+    best: Dict[int, Tuple[int, int]] = {}
+    spots: Counter = Counter()
+    for (tc, wc), cnt in pairs.items():
+        spots[tc] += cnt
+        if tc not in best or cnt > best[tc][0]:
+            best[tc] = (cnt, wc)
+    return [(table.titles[tc], table.works[best[tc][1]], spots[tc]) for tc in spots]
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """한 시점의 CSV 내용 (읽기 전용). 교체는 참조 재할당으로만."""
+    path: str
+    version: int
+    mtime: float
+    size: int
+    table: SpotTable
+    geo: SpotIndex
+    ngrams: TitleNgramIndex = field(default_factory=TitleNgramIndex)   # 작품키 퍼지 매칭용
+    suggest: TitleSuggestTrie = field(default_factory=TitleSuggestTrie)  # 작품명 자동완성
+    schema: Optional[CsvSchema] = None
+    last_seq: int = -1                             # 반영된 최대 SEQ_NO
+    tail_sig: str = ""                             # 반영된 바이트 끝 지문
+    title_rev: Dict[str, int] = field(default_factory=dict)      # 작품키 → 마지막으로 바뀐 스냅샷 버전
+    changed_titles: Optional[FrozenSet[str]] = None              # 직전 대비 바뀐 작품키 (None = 전체 재로딩)
+    loaded_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def title_ids(self, title: str) -> np.ndarray:
+        """작품명(원문) → 정규화 키 일치 행 인덱스"""
+        return self.table.title_ids(norm_title(title))
+
+    def spot(self, i: int) -> Dict[str, Any]:
+        return self.table.spot(i)
+
+    def resolve_titles(self, titles: Iterable[str], cutoff: float = 0.8) -> Dict[str, Optional[str]]:
+        """작품명 여러 개 → 스냅샷 작품키. 정확 일치 우선, 없으면 lookup_locations와 같은 가드 퍼지 매칭"""
+        out: Dict[str, Optional[str]] = {}
+        for t in titles:
+            if t in out:
+                continue
+            key = norm_title(t)
+            if not key or key in self.ngrams:
+                out[t] = key or None
+                continue
+            out[t] = guarded_match(self.ngrams, t, key, cutoff=cutoff)
+        return out
+
+
+def empty_dataset(path: str = "") -> DatasetSnapshot:
+    table = SpotTable.from_records([])
+    return DatasetSnapshot(path=path, version=next(_VERSION), mtime=0.0, size=0,
+                           table=table, geo=SpotIndex(table.lat, table.lng))
+
+
+def load_dataset(path: str, title_col: Optional[str] = None, lat_col: Optional[str] = None,
+                 lng_col: Optional[str] = None) -> DatasetSnapshot:
+    """CSV 1회 파싱 → 스냅샷. 파일이 없으면 빈 스냅샷."""
+    if not os.path.exists(path):
+        return empty_dataset(path)
+    mtime = os.stat(path).st_mtime
+    with open(path, "rb") as f:
+        raw = f.read()
+    text, enc = _decode(raw)
+    schema, recs = parse_csv(text, enc, title_col, lat_col, lng_col)
+    table = SpotTable.from_records(recs)
+    version = next(_VERSION)
+    seqs = table.seq_no
+    return DatasetSnapshot(path=path, version=version, mtime=mtime, size=len(raw),
+                           table=table, geo=SpotIndex(table.lat, table.lng),
+                           ngrams=TitleNgramIndex(table.titles.values),
+                           suggest=TitleSuggestTrie.build(_suggest_items(table)), schema=schema,
+                           last_seq=int(seqs.max()) if len(seqs) else -1, tail_sig=_tail_sig(raw),
+                           title_rev={k: version for k in table.titles.values})
+
+
+def apply_appends(snap: DatasetSnapshot) -> Optional[DatasetSnapshot]:
+    """
+    파일 뒤에 행만 추가된 경우(append_coords.py) 추가분만 파싱해 기존 스냅샷에 덧붙인 새 스냅샷.
+    비용은 추가 행 수에 비례. 앞부분이 바뀌었거나 판단이 어려우면 None → 전체 재로딩.
+    추가분이 아직 쓰는 중인 한 줄뿐이면 snap 그대로 (다음 번에 다시).
+    """
+    if snap.schema is None or not snap.size:
+        return None
+    try:
+        st = os.stat(snap.path)
+        if st.st_size <= snap.size:
+            return None
+        with open(snap.path, "rb") as f:
+            start = max(0, snap.size - TAIL_BYTES)
+            f.seek(start)
+            head = f.read(snap.size - start)
+            if _tail_sig(head) != snap.tail_sig or not head.endswith(b"\n"):
+                return None
+            tail = f.read()
+    except OSError:
+        return None
+    tail = tail[:tail.rfind(b"\n") + 1]          # 쓰는 중인 마지막 줄은 다음 번에
+    if not tail:
+        return snap
+
+    sc = snap.schema
+    reader = csv.DictReader(io.StringIO(tail.decode(sc.encoding, errors="replace"), newline=""),
+                            fieldnames=list(sc.fieldnames), delimiter=sc.delimiter, quotechar=sc.quotechar)
+    recs = list(_records(reader, sc, min_seq=snap.last_seq))
+    table = snap.table.append(recs)
+    geo = snap.geo.extended([r[3] for r in recs], [r[4] for r in recs])
+    version = next(_VERSION)
+    changed = frozenset(r[0] for r in recs)
+    title_rev = dict(snap.title_rev)
+    title_rev.update({k: version for k in changed})
+    seqs = [q for q in (_seq_of(r[2]) for r in recs) if q is not None]
+    return DatasetSnapshot(path=snap.path, version=version, mtime=st.st_mtime, size=snap.size + len(tail),
+                           table=table, geo=geo, ngrams=snap.ngrams.with_keys(changed),
+                           suggest=snap.suggest.updated(_suggest_items(table, len(snap.table))),
+                           schema=sc, last_seq=max([snap.last_seq] + seqs),
+                           tail_sig=_tail_sig(head + tail), title_rev=title_rev, changed_titles=changed)
+
+
+# ------------------------------
+# 바이너리 스냅샷 (artifact)
+# ------------------------------
+# <out>/CURRENT           : 현재 빌드 디렉터리 이름 (교체는 os.replace 1회)
+# <out>/<build>/*.npy     : SpotTable 컬럼 (np.load mmap_mode="r")
+# <out>/<build>/strings.json  : 문자열 풀 + 자동완성 항목
+# <out>/<build>/manifest.json : 원본 CSV size/mtime/sha1, 스키마, last_seq, tail_sig
+# 공간 인덱스/n-gram 색인은 배열에서 바로 다시 만든다 (수 ms, 파싱 없음).
+
+def save_artifact(snap: DatasetSnapshot, out_dir: str) -> Optional[str]:
+    """스냅샷 → 새 빌드 디렉터리. 그 사이 CSV가 바뀌었으면 저장하지 않고 None."""
+    if snap.schema is None or not snap.size:
+        return None
+    with open(snap.path, "rb") as f:
+        raw = f.read(snap.size)
+    if len(raw) != snap.size or _tail_sig(raw) != snap.tail_sig:
+        return None
+    sha1 = hashlib.sha1(raw).hexdigest()
+    build = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{sha1[:8]}"   # 마이크로초까지 → 이름 순서 = 빌드 순서
+    tmp = os.path.join(out_dir, build + ".tmp")
+    os.makedirs(tmp, exist_ok=True)
+    for name, arr in snap.table.arrays().items():
+        np.save(os.path.join(tmp, name + ".npy"), np.ascontiguousarray(arr))
+    strings = dict(snap.table.pools(), suggest=snap.suggest.items())
+    with open(os.path.join(tmp, "strings.json"), "w", encoding="utf-8") as f:
+        json.dump(strings, f, ensure_ascii=False)
+    manifest = {
+        "format": ARTIFACT_FORMAT, "source": os.path.basename(snap.path),
+        "size": snap.size, "mtime": snap.mtime, "sha1": sha1, "n": len(snap),
+        "last_seq": snap.last_seq, "tail_sig": snap.tail_sig, "schema": asdict(snap.schema),
+        "built_at": datetime.utcnow().isoformat() + "Z",
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, os.path.join(out_dir, build))
+    cur = os.path.join(out_dir, "CURRENT")
+    prev = _read_current(out_dir)
+    tmp_cur = f"{cur}.{os.getpid()}.tmp"   # 프로세스별 임시 파일 — 동시 빌드는 마지막 교체가 이김
+    with open(tmp_cur, "w", encoding="utf-8") as f:
+        f.write(build)
+    os.replace(tmp_cur, cur)
+    _prune_builds(out_dir, keep={build, prev, _read_current(out_dir)}, older_than=prev)
+    return os.path.join(out_dir, build)
+
+
+def _read_current(out_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(out_dir, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _prune_builds(out_dir: str, keep: set, older_than: Optional[str]) -> None:
+    """
+    이전 빌드 정리. 직전 CURRENT(older_than)보다 오래된, manifest까지 다 쓴 빌드만 지운다.
+    → 다른 워커/`python dataset.py build`가 아직 쓰는 중인(.tmp, 또는 CURRENT 교체 전) 빌드는 건드리지 않음.
+    빌드 이름은 UTC 시각 접두어라 문자열 순서 = 시간 순서.
+    이미 mmap 중인 파일은 OS가 매핑 해제 시까지 유지 (Windows는 다음 기회에).
+    """
+    if not older_than:
+        return
+    for name in os.listdir(out_dir):
+        p = os.path.join(out_dir, name)
+        if (name in keep or name.endswith(".tmp") or name >= older_than or not os.path.isdir(p)
+                or not os.path.exists(os.path.join(p, "manifest.json"))):
+            continue
+        shutil.rmtree(p, ignore_errors=True)
+
+
+def load_artifact(art_dir: str, path: str) -> Optional[DatasetSnapshot]:
+    """
+    바이너리 스냅샷 로딩. 원본 CSV와 비교:
+      size/mtime 같음 → 그대로 / mtime만 다름 → 내용 sha1 확인
+      뒤에 행만 추가됨(앞부분 sha1 일치) → 로딩 후 apply_appends / 그 외 → None (CSV 파싱)
+    """
+    try:
+        with open(os.path.join(art_dir, "CURRENT"), encoding="utf-8") as f:
+            bdir = os.path.join(art_dir, f.read().strip())
+        with open(os.path.join(bdir, "manifest.json"), encoding="utf-8") as f:
+            m = json.load(f)
+        if m.get("format") != ARTIFACT_FORMAT:
+            return None
+        st = os.stat(path)
+        if (st.st_size, st.st_mtime) != (m["size"], m["mtime"]):
+            if st.st_size < m["size"]:
+                return None
+            with open(path, "rb") as f:
+                if hashlib.sha1(f.read(m["size"])).hexdigest() != m["sha1"]:
+                    return None
+        with open(os.path.join(bdir, "strings.json"), encoding="utf-8") as f:
+            strings = json.load(f)
+        arrays = {name: np.load(os.path.join(bdir, name + ".npy"), mmap_mode="r")
+                  for name in SpotTable.COLUMNS}
+        table = SpotTable.from_arrays(arrays, strings)
+        if len(table) != m["n"]:
+            return None
+        sc = m["schema"]
+        schema = CsvSchema(**dict(sc, fieldnames=tuple(sc["fieldnames"])))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    version = next(_VERSION)
+    snap = DatasetSnapshot(path=path, version=version, mtime=m["mtime"], size=m["size"],
+                           table=table, geo=SpotIndex(table.lat, table.lng),
+                           ngrams=TitleNgramIndex(table.titles.values),
+                           suggest=TitleSuggestTrie.build(strings.get("suggest", ())), schema=schema,
+                           last_seq=m["last_seq"], tail_sig=m["tail_sig"],
+                           title_rev={k: version for k in table.titles.values})
+    if st.st_size > m["size"]:
+        return apply_appends(snap)
+    return snap
+
+
+class DatasetStore:
+    """현재 스냅샷 보관 + 원자적 교체 + 파일 감시"""
+
+    def __init__(self, path: str, title_col: Optional[str] = None, lat_col: Optional[str] = None,
+                 lng_col: Optional[str] = None, artifact_dir: Optional[str] = None,
+                 on_swap: Optional[Callable[[Optional[DatasetSnapshot], DatasetSnapshot], None]] = None):
+        self.path = path
+        self.cols = (title_col, lat_col, lng_col)
+        self.artifact_dir = artifact_dir   # 있으면 첫 로딩은 바이너리 스냅샷, 전체 파싱 후엔 다시 저장
+        self.on_swap = on_swap
+        self.current: Optional[DatasetSnapshot] = None
+        self._loaded_id: Optional[Tuple[float, int]] = None   # 마지막으로 로딩에 성공한 파일 (mtime, size)
+        self._build_lock = threading.Lock()                    # 빌드는 동시에 1개만
+        self._state_lock = threading.Lock()
+        self._reloading = False
+        self._again = False
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def _file_id(self) -> Tuple[float, int]:
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime, st.st_size
+        except OSError:
+            return 0.0, 0
+
+    def get(self) -> DatasetSnapshot:
+        snap = self.current
+        return snap if snap is not None else self.reload()
+
+    def reload(self, force: bool = False) -> DatasetSnapshot:
+        """파일이 바뀌었으면 새 스냅샷을 만들어 교체. 실패 시 기존 스냅샷 유지."""
+        with self._build_lock:
+            old = self.current
+            fid = self._file_id()
+            if old is not None and not force and fid == self._loaded_id:
+                return old
+            incremental = from_artifact = False
+            try:
+                snap = apply_appends(old) if (old is not None and not force) else None
+                if snap is old is not None:
+                    return old   # 반쯤 쓰인 줄만 추가됨 → 교체 없음, _loaded_id도 그대로 (다음 감시에서 재시도)
+                incremental = snap is not None
+                if snap is None and old is None and self.artifact_dir:
+                    snap = load_artifact(self.artifact_dir, self.path)
+                    from_artifact = snap is not None
+                if snap is None:
+                    snap = load_dataset(self.path, *self.cols)
+                    self._save_artifact(snap)
+                self._loaded_id = fid   # 성공했을 때만 → 실패한 파일은 다음 감시에서 다시 시도
+            except Exception as e:
+                print(f"[gazetteer] load failed: {e}")
+                if old is not None:
+                    return old
+                snap = empty_dataset(self.path)
+            self.current = snap   # 단일 참조 대입 → 진행 중 요청은 기존 스냅샷 그대로
+        if from_artifact:
+            print(f"[gazetteer] loaded artifact: {self.artifact_dir} (v{snap.version}, title-keys={len(snap.table.titles)}, spots={len(snap)})")
+        elif incremental:
+            print(f"[gazetteer] appended: {self.path} (v{snap.version}, +{len(snap) - len(old)} spots, titles={len(snap.changed_titles)})")
+        else:
+            print(f"[gazetteer] loaded: {self.path} (v{snap.version}, title-keys={len(snap.table.titles)}, spots={len(snap)})")
+        if self.on_swap:
+            try:
+                self.on_swap(old, snap)
+            except Exception as e:
+                print(f"[gazetteer] on_swap failed: {e}")
+        return snap
+
+    def _save_artifact(self, snap: DatasetSnapshot) -> None:
+        if not self.artifact_dir:
+            return
+        try:
+            out = save_artifact(snap, self.artifact_dir)
+            if out:
+                print(f"[gazetteer] artifact saved: {out}")
+        except Exception as e:
+            print(f"[gazetteer] artifact save failed: {e}")
+
+    def reload_async(self) -> None:
+        """백그라운드 재로딩. 진행 중이면 끝난 뒤 1회만 더 (재로딩 폭주 방지)."""
+        with self._state_lock:
+            if self._reloading:
+                self._again = True
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload_loop, name="dataset-reload", daemon=True).start()
+
+    def _reload_loop(self) -> None:
+        while True:
+            try:
+                self.reload()
+            finally:
+                with self._state_lock:
+                    if not self._again:
+                        self._reloading = False
+                        return
+                    self._again = False
+
+    def start_watcher(self, interval: float = 2.0) -> None:
+        """drama_list.csv 변경 감시(append_coords.py / 수동 편집 모두). 값이 1주기 동안 안정되면 재로딩."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            last = self._file_id()
+            while not self._stop.wait(interval):
+                fid = self._file_id()
+                if fid != last:          # 쓰는 중일 수 있음 → 다음 주기에 재확인
+                    last = fid
+                    continue
+                if fid != self._loaded_id:
+                    self.reload_async()
+
+        self._watcher = threading.Thread(target=run, name="dataset-watch", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop.set()
+        self._watcher = None
+
+
+# ----------------- CLI -----------------
+
+def run_cli():
+    import argparse
+    import time
+
+    ap = argparse.ArgumentParser(description="drama_list.csv → binary dataset snapshot")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Parse CSV once and write the binary snapshot")
+    b.add_argument("--csv", default="drama_list.csv")
+    b.add_argument("--out", default="cache/dataset")
+    b.add_argument("--title-col", default=None)
+    b.add_argument("--lat-col", default=None)
+    b.add_argument("--lng-col", default=None)
+    c = sub.add_parser("check", help="Load the snapshot the way the server does")
+    c.add_argument("--csv", default="drama_list.csv")
+    c.add_argument("--out", default="cache/dataset")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.cmd == "build":
+        snap = load_dataset(args.csv, args.title_col, args.lat_col, args.lng_col)
+        t1 = time.perf_counter()
+        out = save_artifact(snap, args.out)
+        print(f"parsed {len(snap)} spots in {(t1 - t0) * 1000:.0f} ms → {out or '(not saved: empty or changed CSV)'}")
+    else:
+        snap = load_artifact(args.out, args.csv)
+        dt = (time.perf_counter() - t0) * 1000
+        print(f"artifact ok: {len(snap)} spots in {dt:.0f} ms" if snap else "artifact stale or missing")
+
+
+if __name__ == "__main__":
+    run_cli()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+filmography_cache.py
+--------------------
+배우명 → 필모그래피(List[WorkEntry]) 영속 캐시 (sqlite, WAL)
+
+- 성공 결과는 ttl_sec 동안 재조회하지 않는다
+- 실패/빈 결과(negative)는 사유 코드(fetch_error/empty)와 함께 기록, 재시도 간격은
+  neg_ttl_sec × 2^(연속 실패-1) (상한 neg_max_sec) → 없는 배우명은 캐시 조회 1번
+- 같은 배우의 동시 요청은 SingleFlight로 합쳐 나무위키 조회 1회
+- TTL이 지난 성공 항목은 재조회가 실패하면 그대로 다시 쓴다 (빈 결과로 덮어쓰지 않음)
+
+Usage
+-----
+  cache = FilmographyCache("cache/filmography.sqlite3", ttl_sec=7 * 86400)
+  works = cache.get("한효주", get_filmography)
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from typing import Callable, List, Optional, Tuple
+
+from actor_mode_crawler_and_aggregator import WorkEntry
+import singleflight
+
+
+def actor_key(name: str) -> str:
+    return re.sub(r"\s+", " ", (name or "").strip())
+
+
+class FilmographyCache:
+    def __init__(self, path: str, ttl_sec: float = 7 * 86400, neg_ttl_sec: float = 600,
+                 neg_max_sec: float = 7 * 86400):
+        self.ttl_sec, self.neg_ttl_sec, self.neg_max_sec = ttl_sec, neg_ttl_sec, neg_max_sec
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+        CREATE TABLE IF NOT EXISTS filmography (
+          actor TEXT PRIMARY KEY, ok INTEGER, works TEXT, fetched_at REAL, expires_at REAL,
+          reason TEXT, failures INTEGER DEFAULT 0
+        )
+        """)
+        cols = {r[1] for r in self._db.execute("PRAGMA table_info(filmography)")}
+        for col, ddl in (("reason", "TEXT"), ("failures", "INTEGER DEFAULT 0")):
+            if col not in cols:   # 이전 스키마 파일
+                self._db.execute(f"ALTER TABLE filmography ADD COLUMN {col} {ddl}")
+        self._db.commit()
+        self._flight = singleflight.group("filmography")   # 공용 지표(/healthz)에 포함
+        self.stats = {"hit": 0, "neg_hit": 0, "miss": 0, "stale_served": 0, "fetch_fail": 0}
+
+    def _row(self, key: str) -> Optional[Tuple[int, str, float, int]]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT ok, works, expires_at, failures FROM filmography WHERE actor=?", (key,)).fetchone()
+
+    def _put(self, key: str, works: List[WorkEntry]) -> None:
+        now = time.time()
+        data = json.dumps([{k: v for k, v in asdict(w).items() if k != "raw"} for w in works], ensure_ascii=False)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO filmography (actor, ok, works, fetched_at, expires_at, reason, failures) "
+                             "VALUES (?,1,?,?,?,NULL,0)", (key, data, now, now + self.ttl_sec))
+            self._db.commit()
+
+    def _fail(self, key: str, reason: str, row: Optional[Tuple[int, str, float, int]]) -> float:
+        """실패 기록 (만료된 성공 결과가 있으면 본문은 유지하고 재시도 시각만 미룸)"""
+        n = ((row[3] or 0) if row else 0) + 1
+        now = time.time()
+        retry_at = now + min(self.neg_max_sec, self.neg_ttl_sec * 2 ** (n - 1))
+        with self._lock:
+            if row and row[0]:
+                self._db.execute("UPDATE filmography SET expires_at=?, reason=?, failures=? WHERE actor=?",
+                                 (retry_at, reason, n, key))
+            else:
+                self._db.execute("INSERT OR REPLACE INTO filmography (actor, ok, works, fetched_at, expires_at, reason, failures) "
+                                 "VALUES (?,0,'[]',?,?,?,?)", (key, now, retry_at, reason, n))
+            self._db.commit()
+        return retry_at
+
+    @staticmethod
+    def _works(data: str) -> List[WorkEntry]:
+        return [WorkEntry(**d) for d in json.loads(data or "[]")]
+
+    def get(self, name: str, fetch: Callable[[str], List[WorkEntry]]) -> List[WorkEntry]:
+        key = actor_key(name)
+        if not key:
+            return []
+        row = self._row(key)
+        if row and row[2] > time.time():
+            self.stats["hit" if row[0] else "neg_hit"] += 1
+            return self._works(row[1])
+        return self._flight.do(key, self._refresh, key, name, fetch)
+
+    def _refresh(self, key: str, name: str, fetch: Callable[[str], List[WorkEntry]]) -> List[WorkEntry]:
+        row = self._row(key)   # 기다리는 사이 다른 리더가 채웠을 수 있음
+        if row and row[2] > time.time():
+            self.stats["hit" if row[0] else "neg_hit"] += 1
+            return self._works(row[1])
+        self.stats["miss"] += 1
+        reason = "empty"
+        try:
+            works = fetch(name)
+        except Exception as e:
+            print(f"[filmography] fetch failed for '{name}': {e}")
+            self.stats["fetch_fail"] += 1
+            works, reason = None, "fetch_error"
+        if works:
+            self._put(key, works)
+            return works
+        retry_at = self._fail(key, reason, row)
+        print(f"[filmography] '{name}' {reason} (failures={((row[3] or 0) if row else 0) + 1}) "
+              f"→ retry in {retry_at - time.time():.0f}s")
+        if row and row[0]:
+            # 만료된 성공 결과가 있으면 그대로 사용
+            self.stats["stale_served"] += 1
+            return self._works(row[1])
+        return []
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM filmography WHERE actor=?", (actor_key(name),))
+            self._db.commit()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+meta_store.py
+-------------
+작품 메타(나무위키 요약) 저장소 — sqlite(WAL) 1개 파일, 키 = sha1("정규화 제목|kind")
+
+- 키는 기존 cache/meta_<sha1>.json 파일명과 같은 규칙 → migrate_json_dir()로 1회 이전
+- fetched_at(수집 시각, epoch초) 컬럼으로 신선도 판단 (파일 mtime 대신)
+- get_many(): 여러 작품을 질의 1번으로 (필모그래피 목록용)
+- put(): 행 단위 INSERT OR REPLACE 트랜잭션 → 반쯤 쓰인 메타가 읽히지 않음
+- fail()/failure(): 수집 실패를 사유 코드와 함께 기록, 재시도는 지수 백오프 (성공 put() 시 삭제)
+
+Usage
+-----
+  store = MetaStore("cache/meta.sqlite3", ttl_sec=7 * 86400)
+  store.migrate_json_dir("cache")
+  store.get("오징어 게임", "drama")
+  store.get_many([("오징어 게임", "drama"), ("기생충", "film")])
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dataset import norm_title
+
+_IN_CHUNK = 500   # sqlite 바인딩 변수 상한(999) 아래로
+
+
+def meta_key(title: str, kind: Optional[str]) -> str:
+    return hashlib.sha1(f"{norm_title(title)}|{(kind or '').lower()}".encode("utf-8")).hexdigest()
+
+
+class MetaStore:
+    def __init__(self, path: str, ttl_sec: float = 7 * 86400,
+                 neg_ttl_sec: float = 1800, neg_max_sec: float = 7 * 86400):
+        self.path, self.ttl_sec = path, ttl_sec
+        self.neg_ttl_sec, self.neg_max_sec = neg_ttl_sec, neg_max_sec   # 실패 재시도 간격: neg_ttl × 2^(n-1), 상한 neg_max
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+        CREATE TABLE IF NOT EXISTS meta (
+          key TEXT PRIMARY KEY, title TEXT, kind TEXT, data TEXT NOT NULL, fetched_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta_info (name TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS meta_fail (
+          key TEXT PRIMARY KEY, title TEXT, kind TEXT, reason TEXT,
+          failures INTEGER NOT NULL, failed_at REAL NOT NULL, retry_at REAL NOT NULL
+        );
+        """)
+        self._db.commit()
+
+    def _fresh(self, fetched_at: float, now: float) -> bool:
+        return now - fetched_at <= self.ttl_sec
+
+    def entry(self, title: str, kind: Optional[str]) -> Optional[Tuple[dict, float]]:
+        """(메타, fetched_at) — 신선도 무관"""
+        with self._lock:
+            row = self._db.execute("SELECT data, fetched_at FROM meta WHERE key=?",
+                                   (meta_key(title, kind),)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def get(self, title: str, kind: Optional[str]) -> Optional[dict]:
+        e = self.entry(title, kind)
+        return e[0] if e and self._fresh(e[1], time.time()) else None
+
+    def get_many(self, items: Iterable[Tuple[str, Optional[str]]]) -> Dict[Tuple[str, Optional[str]], dict]:
+        """(제목, kind) 여러 개 → 신선한 메타만. IN 질의 1번(500개 단위)."""
+        keys: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        for t, k in items:
+            keys.setdefault(meta_key(t, k), []).append((t, k))
+        out: Dict[Tuple[str, Optional[str]], dict] = {}
+        if not keys:
+            return out
+        now = time.time()
+        ks = list(keys)
+        rows = []
+        with self._lock:
+            for i in range(0, len(ks), _IN_CHUNK):
+                part = ks[i:i + _IN_CHUNK]
+                rows += self._db.execute(
+                    f"SELECT key, data, fetched_at FROM meta WHERE key IN ({','.join('?' * len(part))})",
+                    part).fetchall()
+        for key, data, fetched_at in rows:
+            if self._fresh(fetched_at, now):
+                meta = json.loads(data)
+                for tk in keys[key]:
+                    out[tk] = meta
+        return out
+
+    def put(self, title: str, kind: Optional[str], data: dict, fetched_at: Optional[float] = None) -> None:
+        key = meta_key(title, kind)
+        with self._lock, self._db:   # with 커넥션 = 트랜잭션 (예외 시 롤백)
+            self._db.execute("INSERT OR REPLACE INTO meta (key, title, kind, data, fetched_at) VALUES (?,?,?,?,?)",
+                             (key, title, (kind or "").lower(),
+                              json.dumps(data, ensure_ascii=False), fetched_at or time.time()))
+            self._db.execute("DELETE FROM meta_fail WHERE key=?", (key,))
+
+    # --- negative cache (수집 실패) ---
+    def fail(self, title: str, kind: Optional[str], reason: str) -> float:
+        """실패 기록. 연속 실패마다 재시도 간격 2배(상한 neg_max_sec). 반환: retry_at"""
+        key, now = meta_key(title, kind), time.time()
+        with self._lock, self._db:
+            row = self._db.execute("SELECT failures FROM meta_fail WHERE key=?", (key,)).fetchone()
+            n = (row[0] if row else 0) + 1
+            retry_at = now + min(self.neg_max_sec, self.neg_ttl_sec * 2 ** (n - 1))
+            self._db.execute("INSERT OR REPLACE INTO meta_fail (key, title, kind, reason, failures, failed_at, retry_at) "
+                             "VALUES (?,?,?,?,?,?,?)", (key, title, (kind or "").lower(), reason, n, now, retry_at))
+        return retry_at
+
+    def failure(self, title: str, kind: Optional[str]) -> Optional[Dict[str, object]]:
+        """재시도 대기 중인 실패 {reason, failures, retry_at} (대기 끝났으면 None)"""
+        with self._lock:
+            row = self._db.execute("SELECT reason, failures, retry_at FROM meta_fail WHERE key=?",
+                                   (meta_key(title, kind),)).fetchone()
+        if not row or row[2] <= time.time():
+            return None
+        return {"reason": row[0], "failures": row[1], "retry_at": row[2]}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM meta").fetchone()[0]
+
+    def migrate_json_dir(self, cache_dir: str) -> int:
+        """cache_dir/meta_<sha1>.json → meta 테이블 (1회만, fetched_at = 파일 mtime). 원본 파일은 두고 이전 완료만 기록."""
+        with self._lock:
+            done = self._db.execute("SELECT value FROM meta_info WHERE name='json_migrated'").fetchone()
+        if done:
+            return 0
+        rows = []
+        for p in glob.glob(os.path.join(cache_dir, "meta_*.json")):
+            key = os.path.basename(p)[len("meta_"):-len(".json")]
+            try:
+                with open(p, encoding="utf-8") as f:
+                    data = json.load(f)
+                rows.append((key, data.get("title"), None, json.dumps(data, ensure_ascii=False), os.path.getmtime(p)))
+            except Exception as e:
+                print(f"[meta] skip {p}: {e}")
+        with self._lock, self._db:
+            # 이미 새 저장소에 있는 키(더 최신)는 덮지 않음
+            self._db.executemany("INSERT OR IGNORE INTO meta (key, title, kind, data, fetched_at) VALUES (?,?,?,?,?)", rows)
+            self._db.execute("INSERT OR REPLACE INTO meta_info (name, value) VALUES ('json_migrated', ?)",
+                             (str(time.time()),))
+        print(f"[meta] migrated {len(rows)} json files from {cache_dir}")
+        return len(rows)
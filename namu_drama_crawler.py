@@ -30,6 +30,8 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup, Tag
 
+from page_cache import BlockedPage, default_cache, not_blocked
+
 # ----------------- Helpers -----------------
 
 KO_LABELS = [
@@ -285,8 +287,14 @@ def fetch_html(url_or_keyword: str, session: Optional[requests.Session] = None,
     else:
         url = build_namu_url(url_or_keyword)
     session = session or build_session()
+    cache = default_cache()
+    if cache is not None:
+        # 공용 페이지 캐시: 신선하면 네트워크 없음, 아니면 조건부 GET(304 → 저장본)
+        return cache.fetch(url, session, timeout=timeout, accept=not_blocked)
     resp = session.get(url, timeout=timeout)
     resp.raise_for_status()
+    if not not_blocked(resp.text):
+        raise BlockedPage(f"unacceptable page body for {url}")   # 챌린지 페이지를 메타로 파싱하지 않음
     return resp.text
 
 def parse_namu_drama_from_html(html: str) -> Dict[str, Any]:
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+page_cache.py
+-------------
+나무위키 페이지 공용 캐시 (URL → zlib 압축 HTML, 내용 주소 저장)
+
+- 본문은 sha256(본문) 이름의 blob 파일 1개 → 같은 내용(리다이렉트/별칭 URL)은 blob 공유
+- URL 색인(sqlite, WAL): blob 해시 + ETag/Last-Modified + 마지막 확인 시각
+- fresh_sec 안에는 네트워크 없이 blob 반환, 지나면 If-None-Match/If-Modified-Since 재검증 → 304면 본문 재사용
+- 재검증 중 네트워크 오류면 이전 본문 반환 (없으면 예외 그대로)
+- 차단 페이지(Cloudflare "Just a moment")는 저장하지 않고 BlockedPage (accept 기본값 = not_blocked)
+
+namu_drama_crawler.fetch_html / NamuWikiProvider.fetch_html (→ 작품 메타, 필모그래피)가 같이 쓴다.
+
+Usage
+-----
+  cache = default_cache()                  # NAMU_PAGE_CACHE_DIR (기본 cache/pages, 빈 값이면 None)
+  html = cache.fetch(url, session)         # 200/304 외 상태는 requests.HTTPError, 차단 페이지는 BlockedPage
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Optional
+
+import requests
+
+PAGE_FRESH_SEC = float(os.environ.get("NAMU_PAGE_FRESH_SEC", "3600"))   # 이 시간 안에는 재검증도 안 함
+
+
+class BlockedPage(requests.RequestException):
+    """200 응답이지만 accept()가 거부한 본문 (차단/챌린지 페이지). response는 없음 → HTTP 상태 오류와 구분"""
+
+
+def not_blocked(text: Optional[str]) -> bool:
+    """나무위키 본문 판정: 비어 있거나 Cloudflare 챌린지 페이지면 False"""
+    return bool(text) and "Just a moment" not in text
+
+
+class PageCache:
+    def __init__(self, root: str, fresh_sec: float = PAGE_FRESH_SEC, level: int = 6):
+        self.root, self.fresh_sec, self.level = root, fresh_sec, level
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+        CREATE TABLE IF NOT EXISTS pages (
+          url TEXT PRIMARY KEY, sha TEXT, etag TEXT, last_modified TEXT,
+          fetched_at REAL, checked_at REAL
+        )
+        """)
+        self._db.commit()
+        self.stats = {"fresh": 0, "revalidated": 0, "fetched": 0, "stale_on_error": 0}
+
+    # --- blob ---
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.root, "blobs", sha[:2], sha + ".z")
+
+    def _read_blob(self, sha: str) -> Optional[str]:
+        try:
+            with open(self._blob_path(sha), "rb") as f:
+                return zlib.decompress(f.read()).decode("utf-8")
+        except (OSError, zlib.error):
+            return None
+
+    def _write_blob(self, text: str) -> str:
+        raw = text.encode("utf-8")
+        sha = hashlib.sha256(raw).hexdigest()
+        path = self._blob_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(zlib.compress(raw, self.level))
+            os.replace(tmp, path)
+        return sha
+
+    # --- index ---
+    def _entry(self, url: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            row = self._db.execute("SELECT sha, etag, last_modified, checked_at FROM pages WHERE url=?",
+                                   (url,)).fetchone()
+        return dict(zip(("sha", "etag", "last_modified", "checked_at"), row)) if row else None
+
+    def _touch(self, url: str) -> None:
+        with self._lock:
+            self._db.execute("UPDATE pages SET checked_at=? WHERE url=?", (time.time(), url))
+            self._db.commit()
+
+    def store(self, url: str, text: str, headers: Optional[Dict[str, str]] = None) -> None:
+        """본문 저장 (cloudscraper 등 다른 경로로 받은 본문도 여기로)"""
+        headers = headers or {}
+        sha = self._write_blob(text)
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO pages (url, sha, etag, last_modified, fetched_at, checked_at) "
+                             "VALUES (?,?,?,?,?,?)",
+                             (url, sha, headers.get("ETag"), headers.get("Last-Modified"), now, now))
+            self._db.commit()
+
+    def get(self, url: str) -> Optional[str]:
+        """네트워크 없이 저장본만 (신선도 무관)"""
+        e = self._entry(url)
+        return self._read_blob(e["sha"]) if e else None
+
+    def fetch(self, url: str, session: requests.Session, timeout: int = 20,
+              accept: Optional[Callable[[str], bool]] = not_blocked) -> str:
+        """
+        저장본이 fresh_sec 안이면 그대로, 아니면 조건부 GET.
+        accept(text)가 False인 200 응답(기본: 차단 페이지)은 저장하지 않고 BlockedPage.
+        """
+        e = self._entry(url)
+        cached = self._read_blob(e["sha"]) if e else None
+        if cached is not None and time.time() - e["checked_at"] < self.fresh_sec:
+            self.stats["fresh"] += 1
+            return cached
+
+        headers = {}
+        if cached is not None:
+            if e["etag"]:
+                headers["If-None-Match"] = e["etag"]
+            if e["last_modified"]:
+                headers["If-Modified-Since"] = e["last_modified"]
+        try:
+            resp = session.get(url, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            if cached is None:
+                raise
+            self.stats["stale_on_error"] += 1
+            return cached
+
+        if resp.status_code == 304 and cached is not None:
+            self.stats["revalidated"] += 1
+            self._touch(url)
+            return cached
+        resp.raise_for_status()
+        text = resp.text
+        if accept is not None and not accept(text):
+            raise BlockedPage(f"unacceptable page body for {url}")
+        self.stats["fetched"] += 1
+        self.store(url, text, resp.headers)
+        return text
+
+
+_DEFAULT: Optional[PageCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_cache() -> Optional[PageCache]:
+    """프로세스 공용 캐시. NAMU_PAGE_CACHE_DIR='' 이면 캐시 끔(None)."""
+    global _DEFAULT
+    root = os.environ.get("NAMU_PAGE_CACHE_DIR", os.path.join("cache", "pages"))
+    if not root:
+        return None
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None or _DEFAULT.root != root:
+            _DEFAULT = PageCache(root)
+        return _DEFAULT
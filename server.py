@@ -6,11 +6,14 @@ Endpoints
 - GET  /healthz
 - GET  /api/actor?name=배우
 - GET  /api/dramaMeta?title=작품명&kind=drama|film
-- POST /api/chat        { mode, keyword, query?, kind?, want_itinerary?, refresh? }
+- POST /api/chat        { mode, keyword, query?, kind?, want_itinerary?, refresh? }  (work 모드: ETag/If-None-Match → 304,
+                        actor 모드: keyword=배우 → 작품별 핀 병합 + 코스 + 메타)
 - POST /generate        (구버전 호환: /api/chat과 동일 응답)
 - GET  /api/stream      (SSE: csv_refresh_start / csv_stage / csv_refresh_done / csv_refresh_fail / csv_refresh_skip)
 - GET  /api/tour/nearby
 - GET  /api/youtube
+- GET  /api/titles/suggest?q=접두어|초성&k=8
+- POST /api/route/optimize { spots: [{id, lat, lng}], max_ms? }  (anytime 경로 최적화 + 품질 보고)
 
 Run:
   pip install fastapi uvicorn requests beautifulsoup4 lxml scikit-learn numpy
@@ -28,38 +31,53 @@ import hashlib
 import asyncio
 import subprocess
 import sys
+import time
 from datetime import datetime, timedelta
 from threading import Lock
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import urllib.parse
 
 import numpy as np
 import requests
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from sklearn.cluster import DBSCAN
-import heapq
-from collections import defaultdict
 from math import radians, sin, cos, asin, sqrt
 
 # ===== Repo deps =====
-from actor_mode_crawler_and_aggregator import load_gazetteer, get_filmography
-from namu_drama_crawler import crawl_one, build_namu_url
+from actor_mode_crawler_and_aggregator import get_filmography
+from namu_drama_crawler import crawl_one, build_namu_url, build_session
+from dataset import DatasetSnapshot, DatasetStore, norm_title
+from course_builder import INSERTION_MAX_N, CourseTable, cluster_and_build_courses, optimize_route, pairwise_km
+from filmography_cache import FilmographyCache
+import singleflight
+from page_cache import BlockedPage, default_cache
+from meta_store import MetaStore, meta_key
+from api_cache import ApiCache
+from tour_geo_cache import TourGeoCache
 
 # =============================================================================
 # 기본 설정
 # =============================================================================
-CSV_PATH      = os.environ.get("CSV_PATH", "drama_list.csv")
+# 상대 경로는 server.py 위치 기준 (실행 cwd와 무관)
+CSV_PATH      = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.environ.get("CSV_PATH", "drama_list.csv"))
 CSV_TITLE_COL = os.environ.get("CSV_TITLE_COL")
 CSV_LAT_COL   = os.environ.get("CSV_LAT_COL")
 CSV_LNG_COL   = os.environ.get("CSV_LNG_COL")
+CSV_WATCH_SEC = float(os.environ.get("CSV_WATCH_SEC", "2"))   # 0이면 파일 감시 끔
+_ARTIFACT_DIR = os.environ.get("DATASET_ARTIFACT_DIR", "cache/dataset")   # 빈 값이면 바이너리 스냅샷 안 씀
+DATASET_ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), _ARTIFACT_DIR) if _ARTIFACT_DIR else None
 
 CACHE_DIR         = os.environ.get("CACHE_DIR", "./cache")
 SEARCH_LOG        = os.environ.get("SEARCH_LOG", "search_log.json")
 META_TTL_DAYS     = int(os.environ.get("META_TTL_DAYS", "7"))
+META_DB           = os.environ.get("META_DB", os.path.join(CACHE_DIR, "meta.sqlite3"))
+META_NEG_TTL_SEC  = float(os.environ.get("META_NEG_TTL_SEC", "1800"))     # 수집 실패 첫 재시도 간격 (이후 2배씩)
+META_NEG_MAX_SEC  = float(os.environ.get("META_NEG_MAX_SEC", str(7 * 86400)))
+META_DEADLINE_SEC = float(os.environ.get("META_DEADLINE_SEC", "8"))       # 저장본 없는 메타 수집 최대 대기
+META_REFRESH_WORKERS = int(os.environ.get("META_REFRESH_WORKERS", "4"))
 REFRESH_TTL_DAYS  = int(os.environ.get("REFRESH_TTL_DAYS", "7"))
 PORT              = int(os.environ.get("PORT", "4000"))
 CORS_ALLOW_ORIG   = os.environ.get("CORS_ALLOW_ORIG", "*")
@@ -68,6 +86,25 @@ CORS_ALLOW_ORIG   = os.environ.get("CORS_ALLOW_ORIG", "*")
 COURSE_EPS_KM_SMALL = float(os.environ.get("COURSE_EPS_KM_SMALL", "8"))
 COURSE_MIN_SAMPLES  = int(os.environ.get("COURSE_MIN_SAMPLES", "1"))
 
+COURSE_PRECOMPUTE   = os.environ.get("COURSE_PRECOMPUTE", "1") == "1"   # 스냅샷 교체 시 작품별 코스 미리 계산
+COURSE_OPT_MS       = float(os.environ.get("COURSE_OPT_MS", "100"))       # 작품당 코스 경로 최적화 예산(ms) — 미리 계산·요청 경로 공용
+
+# 배우 모드 (필모그래피 → 가제티어 일괄 매칭)
+META_PROBE_WORKERS     = int(os.environ.get("META_PROBE_WORKERS", "8"))       # 메타 접미사 후보 동시 조회 수
+ACTOR_MAX_WORKS        = int(os.environ.get("ACTOR_MAX_WORKS", "40"))          # 메타를 수집할 작품 수 상한 (매칭은 전체)
+ACTOR_META_WORKERS     = int(os.environ.get("ACTOR_META_WORKERS", "4"))       # 작품 메타 동시 수집 상한
+ACTOR_META_TIMEOUT_SEC = float(os.environ.get("ACTOR_META_TIMEOUT_SEC", "20"))
+FILMO_CACHE_DB         = os.environ.get("FILMO_CACHE_DB", os.path.join(CACHE_DIR, "filmography.sqlite3"))
+FILMO_TTL_DAYS         = float(os.environ.get("FILMO_TTL_DAYS", "7"))
+FILMO_NEG_TTL_SEC      = float(os.environ.get("FILMO_NEG_TTL_SEC", "600"))   # 조회 실패/빈 결과 첫 재시도 간격 (이후 2배씩)
+FILMO_NEG_MAX_SEC      = float(os.environ.get("FILMO_NEG_MAX_SEC", str(7 * 86400)))
+# /api/route/optimize 점 수 상한 — 밀집 거리 행렬(n² float64, 계산 중 임시 배열 여러 개)이라 요청당 메모리 O(n²)
+ROUTE_OPT_MAX_SPOTS = int(os.environ.get("ROUTE_OPT_MAX_SPOTS", str(INSERTION_MAX_N)))
+
+# 작품 모드 응답 캐시 (작품키 + 스냅샷 작품 버전 기준)
+WORK_CACHE_SIZE    = int(os.environ.get("WORK_CACHE_SIZE", "512"))
+WORK_CACHE_TTL_SEC = int(os.environ.get("WORK_CACHE_TTL_SEC", "3600"))   # 메타 갱신 반영 주기
+
 os.makedirs(CACHE_DIR, exist_ok=True)
 
 # === [추가] import들 상단에
@@ -79,9 +116,17 @@ from pydantic import BaseModel
 from openai import OpenAI
 import json, re
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FutureTimeout
 
 EXEC = ThreadPoolExecutor(max_workers=4)  # 필요하면 3~6 사이에서 조정
+
+# 업스트림 호출 합치기 (같은 정규화 요청이 동시에 오면 1번만 호출, /healthz에 합쳐진 수)
+_SF_TRANSLATE = singleflight.group("translate")
+_SF_META      = singleflight.group("dramaMeta")
+_SF_YOUTUBE   = singleflight.group("youtube")
+_SF_TOUR      = singleflight.group("tour")
+_SF_GCS       = singleflight.group("gcs")
 _GROUP_CHAR_LIMIT = 12000  # 한 번에 보낼 총 글자 기준 늘리기(모델 여유 많음)
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "").strip()
@@ -115,7 +160,10 @@ class BotReq(BaseModel):
 class LRU(OrderedDict):
     def __init__(self, cap=5000):
         super().__init__(); self.cap=cap
-    def get(self, k): return super().get(k)
+    def get(self, k):
+        v = super().get(k)
+        if v is not None: self.move_to_end(k)
+        return v
     def put(self, k, v):
         if k in self: del self[k]
         super().update({k:v})
@@ -202,31 +250,41 @@ def translate_bulk_with_cache(texts: List[str], to_code: str) -> List[str]:
         uniq.setdefault(s, []).append(i)
 
     # 2) 캐시/DB 적중 분리
-    misses = []
-    miss_keys = []
+    found: Dict[str, str] = {}
+    misses: Dict[Tuple[str, str], str] = {}   # (언어, 원문 해시) → 원문
     for u in uniq.keys():
         k = (to_code, _h(u))
         hit = _cache_get(k)  # 아래 2) 참고
         if hit is None:
-            misses.append(u); miss_keys.append(k)
-
-    # 3) 미번역 → 그룹핑
-    groups = _pack(misses)  # _GROUP_CHAR_LIMIT 기준으로 묶음
+            misses[k] = u
+        else:
+            found[u] = hit
 
-    # 4) 병렬 요청
-    futs = [(g, EXEC.submit(_translate_group_json, g, to_code)) for g in groups]
-    for g, fut in futs:
-        outs = fut.result()
-        for src, out in zip(g, outs):
-            _cache_put((to_code, _h(src)), out, src)
+    # 3) 미번역 → 키 단위로 합쳐 병렬 요청: 다른 요청이 이미 번역 중인 키는 그 결과를 기다리고,
+    #    나머지만 묶어서(_GROUP_CHAR_LIMIT 기준) 번역
+    if misses:
+        done = _SF_TRANSLATE.do_many(misses, lambda keys: _translate_groups([misses[k] for k in keys], to_code))
+        for k, u in misses.items():
+            found[u] = done.get(k) or ""
 
-    # 5) 원순서 재조립
+    # 4) 원순서 재조립
     result = [""] * len(texts)
     for u, idxs in uniq.items():
-        v = _cache_get((to_code, _h(u))) or ""
+        v = found.get(u) or ""
         for i in idxs: result[i] = v
     return result
 
+def _translate_groups(texts: List[str], to_code: str) -> Dict[Tuple[str, str], str]:
+    futs = [(g, EXEC.submit(_translate_group_json, g, to_code)) for g in _pack(texts)]
+    out: Dict[Tuple[str, str], str] = {}
+    for g, fut in futs:
+        outs = fut.result()
+        for src, dst in zip(g, outs):
+            key = (to_code, _h(src))
+            _cache_put(key, dst, src)
+            out[key] = dst
+    return out
+
 # ---------- 스키마 & 라우트 ----------
 class TranslateReq(BaseModel):
     to: str                 # 'en' | 'jp' | 'ch'
@@ -284,26 +342,6 @@ def _is_fresh(ts_iso: str, ttl_days: int) -> bool:
     except Exception:
         return False
 
-def norm_title(s: str) -> str:
-    """작품명 정규화(강화): 공백/기호 제거 + 시즌/파트/편/부/말미 숫자 제거 + 소문자"""
-    s = (s or "").lower()
-
-    # 괄호 문자 제거
-    s = re.sub(r"[(){}\[\]〈〉《》「」『』【】]", "", s)
-
-    # 시즌/파트/편/부/회 표기 제거 (공백 유무 모두 허용)
-    s = re.sub(r"(시즌|season)\s*\d+", "", s, flags=re.IGNORECASE)
-    s = re.sub(r"(파트|part)\s*\d+",  "", s, flags=re.IGNORECASE)
-    s = re.sub(r"\d+\s*(편|부|회)\b",  "", s)
-
-    # 구분자/공백 제거
-    s = re.sub(r"[\s·\.\-_:~]+", "", s)
-
-    # 맨 끝의 숫자(예: 오징어게임2)도 제거
-    s = re.sub(r"\d+$", "", s)
-
-    return s.strip()
-
 def as_float(x) -> Optional[float]:
     try:
         if x is None:
@@ -326,51 +364,14 @@ def _haversine_km(a, b) -> float:
 # YouTube 캐시 + API
 # =============================================================================
 YOUTUBE_API_KEY = os.environ.get("YOUTUBE_API_KEY", "").strip()
-YT_CACHE_CSV      = os.environ.get("YT_CACHE_CSV", os.path.join(CACHE_DIR, "youtube_search_cache.csv"))
+YT_CACHE_CSV      = os.environ.get("YT_CACHE_CSV", os.path.join(CACHE_DIR, "youtube_search_cache.csv"))   # 예전 CSV 캐시 (이전용)
 YT_CACHE_TTL_DAYS = int(os.environ.get("YT_CACHE_TTL_DAYS", "7"))
-_yt_cache_lock    = Lock()
-
-def _ensure_yt_cache_file():
-    os.makedirs(os.path.dirname(YT_CACHE_CSV), exist_ok=True)
-    if not os.path.exists(YT_CACHE_CSV):
-        with open(YT_CACHE_CSV, "w", newline="", encoding="utf-8") as f:
-            csv.writer(f).writerow(["q", "updated_at", "items_json"])
 
 def _read_yt_cache(q_norm: str):
-    if not os.path.exists(YT_CACHE_CSV):
-        return None
-    with open(YT_CACHE_CSV, "r", newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            if row.get("q") == q_norm:
-                try:
-                    items = json.loads(row.get("items_json") or "[]")
-                except Exception:
-                    items = []
-                return {"items": items, "updated_at": row.get("updated_at")}
-    return None
+    return API_CACHE.get("yt", q_norm)
 
 def _write_yt_cache(q_norm: str, items: list):
-    tmp = YT_CACHE_CSV + ".tmp"
-    rows = []
-    if os.path.exists(YT_CACHE_CSV):
-        with open(YT_CACHE_CSV, "r", newline="", encoding="utf-8") as f:
-            rows = list(csv.DictReader(f))
-    written = False
-    for row in rows:
-        if row.get("q") == q_norm:
-            row["updated_at"] = _now_iso()
-            row["items_json"] = json.dumps(items, ensure_ascii=False)
-            written = True
-            break
-    if not written:
-        rows.append({"q": q_norm, "updated_at": _now_iso(), "items_json": json.dumps(items, ensure_ascii=False)})
-    with open(tmp, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=["q", "updated_at", "items_json"])
-        w.writeheader()
-        for row in rows:
-            w.writerow(row)
-    os.replace(tmp, YT_CACHE_CSV)
+    API_CACHE.put("yt", q_norm, items)
 
 def _yt_search_api(q: str, max_results: int = 8) -> list:
     if not YOUTUBE_API_KEY:
@@ -425,51 +426,26 @@ TOURAPI_KEY_RAW = os.environ.get("TOURAPI_KEY", "")
 TOURAPI_KEY = _decode_service_key(TOURAPI_KEY_RAW).strip()
 TOURAPI_FORCE_HTTP  = os.environ.get("TOURAPI_FORCE_HTTP", "1") == "1"   # 기본값 HTTP 강제
 TOURAPI_TIMEOUT_SEC = float(os.environ.get("TOURAPI_TIMEOUT", "8"))
-TOURAPI_CACHE_CSV   = os.path.join(CACHE_DIR, "tourapi_cache.csv")
+TOURAPI_CACHE_CSV   = os.path.join(CACHE_DIR, "tourapi_cache.csv")   # 예전 CSV 캐시 (이전용)
 TOURAPI_TTL_DAYS    = int(os.environ.get("TOURAPI_TTL_DAYS", "7"))
-_tour_cache_lock    = Lock()
 
-def _ensure_tour_cache_file():
-    os.makedirs(os.path.dirname(TOURAPI_CACHE_CSV), exist_ok=True)
-    if not os.path.exists(TOURAPI_CACHE_CSV):
-        with open(TOURAPI_CACHE_CSV, "w", newline="", encoding="utf-8") as f:
-            csv.writer(f).writerow(["key", "updated_at", "items_json"])
+# YouTube/TourAPI 응답 캐시 (sqlite WAL, 워커 간 공유). 예전 CSV 캐시는 최초 1회 가져옴
+API_CACHE_DB        = os.environ.get("API_CACHE_DB", os.path.join(CACHE_DIR, "api_cache.sqlite3"))
+API_CACHE_KEEP_DAYS = int(os.environ.get("API_CACHE_KEEP_DAYS", "30"))   # TTL 지나도 API 실패 시 stale 응답용으로 보존
+API_CACHE = ApiCache(API_CACHE_DB)
+API_CACHE.retain("yt", max(YT_CACHE_TTL_DAYS, API_CACHE_KEEP_DAYS) * 86400)
+API_CACHE.retain("tour", max(TOURAPI_TTL_DAYS, API_CACHE_KEEP_DAYS) * 86400)
+API_CACHE.migrate_csv("yt", YT_CACHE_CSV, key_col="q")
+API_CACHE.migrate_csv("tour", TOURAPI_CACHE_CSV, key_col="key")
+# TourAPI 공간 캐시: 요청 원을 완전히 덮는 예전 응답이 있으면 재사용 (같은 sqlite 파일)
+TOURAPI_FETCH_ROWS  = int(os.environ.get("TOURAPI_FETCH_ROWS", "100"))
+TOUR_GEO = TourGeoCache(API_CACHE_DB, ttl_sec=TOURAPI_TTL_DAYS * 86400)
 
 def _tour_cache_read(key: str):
-    if not os.path.exists(TOURAPI_CACHE_CSV):
-        return None
-    with open(TOURAPI_CACHE_CSV, "r", newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            if row.get("key") == key:
-                try:
-                    items = json.loads(row.get("items_json") or "[]")
-                except Exception:
-                    items = []
-                return {"items": items, "updated_at": row.get("updated_at")}
-    return None
+    return API_CACHE.get("tour", key)
 
 def _tour_cache_write(key: str, items: list):
-    tmp = TOURAPI_CACHE_CSV + ".tmp"
-    rows = []
-    if os.path.exists(TOURAPI_CACHE_CSV):
-        with open(TOURAPI_CACHE_CSV, "r", newline="", encoding="utf-8") as f:
-            rows = list(csv.DictReader(f))
-    written = False
-    for row in rows:
-        if row.get("key") == key:
-            row["updated_at"] = _now_iso()
-            row["items_json"] = json.dumps(items, ensure_ascii=False)
-            written = True
-            break
-    if not written:
-        rows.append({"key": key, "updated_at": _now_iso(), "items_json": json.dumps(items, ensure_ascii=False)})
-    with open(tmp, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=["key", "updated_at", "items_json"])
-        w.writeheader()
-        for row in rows:
-            w.writerow(row)
-    os.replace(tmp, TOURAPI_CACHE_CSV)
+    API_CACHE.put("tour", key, items)
 
 def _tour_bases():
     https = [
@@ -610,57 +586,58 @@ def _broadcast(event: dict):
 # =============================================================================
 # Gazetteer (CSV)
 # =============================================================================
-GAZ_IDX = None
+DATASETS = DatasetStore(CSV_PATH, title_col=CSV_TITLE_COL, lat_col=CSV_LAT_COL, lng_col=CSV_LNG_COL,
+                        artifact_dir=DATASET_ARTIFACT_DIR)
 
-def ensure_gazetteer():
-    """CSV 로딩(+제목 정규화 키로 병합)"""
-    global GAZ_IDX
-    if not os.path.exists(CSV_PATH):
-        GAZ_IDX = {}
-        return
-    try:
-        raw = load_gazetteer(
-            CSV_PATH,
-            title_col=CSV_TITLE_COL,
-            lat_col=CSV_LAT_COL,
-            lng_col=CSV_LNG_COL
-        )
-        merged = {}
-        for title_key, rows in (raw or {}).items():
-            nk = norm_title(title_key)
-            merged.setdefault(nk, []).extend(rows)
-        GAZ_IDX = merged
-        print(f"[gazetteer] loaded: {CSV_PATH} (norm-keys={len(GAZ_IDX)})")
-    except Exception as e:
-        print(f"[gazetteer] load failed: {e}")
-        GAZ_IDX = {}
+def ensure_gazetteer(force: bool = False) -> DatasetSnapshot:
+    """
+    현재 촬영지 스냅샷 반환(최초 1회 로딩).
+    force=True: 파일이 바뀌었으면 새 스냅샷을 만든 뒤 교체 — 교체 전까지는 기존 스냅샷으로 응답.
+    """
+    return DATASETS.reload() if force else DATASETS.get()
 
 
 def search_locations_via_gazetteer(drama_title: str) -> List[Dict[str, Any]]:
     """정규화된 작품명 키로 핀 목록 리턴"""
-    ensure_gazetteer()
-    if not GAZ_IDX:
-        return []
-
-    norm_q = norm_title(drama_title)
-    rows = GAZ_IDX.get(norm_q, [])
+    ds = ensure_gazetteer()
     hits: List[Dict[str, Any]] = []
-    for r in rows:
-        row = r.get("row", {}) if isinstance(r, dict) else {}
+    for i in ds.title_ids(drama_title).tolist():
+        s = ds.spot(i)
         hits.append({
             "title": drama_title,
-            "place_name": row.get("PLACE_NM") or row.get("place") or "",
-            "address": row.get("ADDR") or "",
-            "lat": as_float(r.get("lat")),
-            "lng": as_float(r.get("lng")),
-            "media_type": row.get("MEDIA_TY"),
-            "place_type": row.get("PLACE_TY"),
-            "tel": row.get("TEL_NO"),
-            "title_src": r.get("title"),
+            "place_name": s["place_name"],
+            "address": s["address"],
+            "lat": s["lat"],
+            "lng": s["lng"],
+            "media_type": s["media_type"],
+            "place_type": s["place_type"],
+            "tel": s["tel"],
+            "title_src": s["work_title"],
         })
     return hits
 
 
+def work_pins(ds: DatasetSnapshot, key: str) -> List[Dict[str, Any]]:
+    """작품키 → 작품 모드 지도 핀 (요청 경로/코스 미리 계산 공용)"""
+    pins: List[Dict[str, Any]] = []
+    for i in ds.table.title_ids(key).tolist():
+        s = ds.spot(i)
+        pins.append({
+            "id": f"pin_{len(pins)+1}",
+            "type": "spot",
+            "title": s["place_name"] or s["work_title"] or "",
+            "subtitle": s["address"] or "",
+            "lat": s["lat"], "lng": s["lng"]
+        })
+    return pins
+
+
+# 작품별 (핀, 군집, 코스) 미리 계산 테이블 — 스냅샷 교체 시 백그라운드 계산, 요청 경로도 같은 예산·같은 저장소
+COURSES = CourseTable(work_pins, eps_km_big=60.0, eps_km_small=10.0, max_ms=COURSE_OPT_MS)
+if COURSE_PRECOMPUTE:
+    DATASETS.on_swap = COURSES.on_swap
+
+
 # =============================================================================
 # 검색 로그 & CSV 최신화 파이프라인
 # =============================================================================
@@ -748,9 +725,7 @@ def ensure_fresh_data(title: str, refresh_requested: bool = False) -> None:
             return
 
         # CSV 재로딩 + 로그 저장(정규화 키)
-        global GAZ_IDX
-        GAZ_IDX = None
-        ensure_gazetteer()
+        ensure_gazetteer(force=True)
         log[key] = datetime.utcnow().isoformat()
         save_search_log(log)
 
@@ -760,241 +735,6 @@ def ensure_fresh_data(title: str, refresh_requested: bool = False) -> None:
         with _REFRESH_LOCK:
             _REFRESH_RUNNING.discard(key)
 
-# =============================================================================
-# 맵 군집 / 코스 빌더
-# =============================================================================
-def cluster_by_radius(pins, eps_km=60.0, min_samples=1):
-    coords = [(p["lat"], p["lng"]) for p in pins if p.get("lat") is not None and p.get("lng") is not None]
-    if not coords:
-        return pins, {}
-    X = np.radians(np.array(coords))
-    model = DBSCAN(eps=eps_km/6371.0, min_samples=min_samples, metric="haversine")
-    labels = model.fit_predict(X)
-    j = 0
-    for p in pins:
-        if p.get("lat") is not None and p.get("lng") is not None:
-            p["cluster"] = int(labels[j]) if labels[j] >= 0 else -1
-            j += 1
-        else:
-            p["cluster"] = -1
-    clmap = {}
-    for p in pins:
-        clmap.setdefault(p["cluster"], []).append(p)
-    return pins, clmap
-
-def _kNN_distances(points, k=1):
-    dists = []
-    for i, p in enumerate(points):
-        cand = []
-        for j, q in enumerate(points):
-            if i == j:
-                continue
-            d = _haversine_km((p['lat'], p['lng']), (q['lat'], q['lng']))
-            cand.append(d)
-        cand.sort()
-        if cand:
-            dists.append(cand[min(k-1, len(cand)-1)])
-    return dists
-
-def _auto_eps_km(points):
-    if len(points) < 3:
-        return 6.0
-    nn = _kNN_distances(points, k=1)
-    if not nn:
-        return 6.0
-    med = float(np.median(nn))
-    eps = med * 4.0
-    return max(1.2, min(8.0, eps))
-
-def _mst_edges_prim(points):
-    n = len(points)
-    if n <= 1:
-        return []
-    def dist(i, j):
-        pi, pj = points[i], points[j]
-        return _haversine_km((pi['lat'], pi['lng']), (pj['lat'], pj['lng']))
-    visited = [False]*n
-    visited[0] = True
-    pq = []
-    for j in range(1, n):
-        heapq.heappush(pq, (dist(0, j), 0, j))
-    edges = []
-    while pq and len(edges) < n-1:
-        d, i, j = heapq.heappop(pq)
-        if visited[i] and visited[j]:
-            continue
-        u = j if not visited[j] else i
-        v = i if u == j else j
-        if visited[u]:
-            continue
-        visited[u] = True
-        edges.append((i, j, d))
-        for k in range(n):
-            if not visited[k]:
-                heapq.heappush(pq, (dist(u, k), u, k))
-    return edges
-
-def _split_by_long_edges(points, mst_edges):
-    if not mst_edges:
-        return [list(range(len(points)))]
-    lens = [d for (_,_,d) in mst_edges]
-    med = float(np.median(lens)) if lens else 0.0
-    thr = max(4.0, med*4.0)
-    g = defaultdict(list)
-    for i, j, d in mst_edges:
-        if d > thr:
-            continue
-        g[i].append(j)
-        g[j].append(i)
-    comps, seen = [], set()
-    for s in range(len(points)):
-        if s in seen:
-            continue
-        if s not in g and len(points) > 1:
-            continue
-        q = [s]
-        seen.add(s)
-        comp = []
-        while q:
-            u = q.pop()
-            comp.append(u)
-            for v in g[u]:
-                if v not in seen:
-                    seen.add(v)
-                    q.append(v)
-        if comp:
-            comps.append(comp)
-    if not comps and len(points) >= 2:
-        i, j, _ = min(mst_edges, key=lambda x: x[2])
-        comps = [[i, j]]
-    return comps or [list(range(len(points)))]
-
-def _cheapest_insertion_path_with_2opt(items):
-    n = len(items)
-    if n <= 1:
-        return [items[0]['id']] if n == 1 else []
-
-    def D(i, j):
-        a, b = items[i], items[j]
-        return _haversine_km((a['lat'], a['lng']), (b['lat'], b['lng']))
-
-    far = (-1.0, 0, 1)
-    for i in range(n):
-        for j in range(i+1, n):
-            dij = D(i, j)
-            if dij > far[0]:
-                far = (dij, i, j)
-    path = [far[1], far[2]]
-    unvis = set(range(n)) - set(path)
-
-    while unvis:
-        best = (1e18, None, None)  # (delta, where, k)
-        for k in unvis:
-            delta_front = D(k, path[0])
-            if delta_front < best[0]:
-                best = (delta_front, ('front', 0), k)
-            delta_back = D(path[-1], k)
-            if delta_back < best[0]:
-                best = (delta_back, ('back', len(path)), k)
-            for i in range(len(path)-1):
-                a, b = path[i], path[i+1]
-                delta = D(a, k) + D(k, b) - D(a, b)
-                if delta < best[0]:
-                    best = (delta, ('mid', i+1), k)
-        _, where, k = best
-        if where[0] == 'front':
-            path.insert(0, k)
-        elif where[0] == 'back':
-            path.append(k)
-        else:
-            path.insert(where[1], k)
-        unvis.remove(k)
-
-    def seg_len_idx(i, j):
-        a, b = items[path[i]], items[path[j]]
-        return _haversine_km((a['lat'], a['lng']), (b['lat'], b['lng']))
-
-    improved, loop = True, 0
-    while improved and loop < 80:
-        improved = False; loop += 1
-        for i in range(1, len(path)-2):
-            for j in range(i+1, len(path)-1):
-                before = seg_len_idx(i-1, i) + seg_len_idx(j, j+1)
-                after  = seg_len_idx(i-1, j) + seg_len_idx(i, j+1)
-                if after + 1e-9 < before:
-                    path[i:j+1] = reversed(path[i:j+1])
-                    improved = True
-    return [items[k]['id'] for k in path]
-
-def _guess_course_title(items):
-    toks_list = []
-    for it in items:
-        addr = (it.get('subtitle') or '').strip()
-        toks = [t for t in addr.split() if t]
-        toks_list.append(toks[:3])
-    if not toks_list:
-        return "코스"
-    from collections import Counter
-    c1 = Counter(t[0] for t in toks_list if len(t) >= 1)
-    city = c1.most_common(1)[0][0] if c1 else "코스"
-    c2 = Counter((t[0], t[1]) for t in toks_list if len(t) >= 2)
-    if c2 and c2.most_common(1)[0][1] >= 2:
-        city = " ".join(c2.most_common(1)[0][0])
-    return f"{city} 코스"
-
-def build_courses_from_pins(pins, eps_km_small=10.0, min_samples=2):
-    valid = [p for p in pins if p.get("lat") is not None and p.get("lng") is not None]
-    if not valid:
-        return []
-    if eps_km_small is None:
-        eps_km_small = _auto_eps_km(valid)
-
-    X = np.radians(np.array([(p['lat'], p['lng']) for p in valid]))
-    model = DBSCAN(eps=eps_km_small/6371.0, min_samples=min_samples, metric="haversine")
-    labels = model.fit_predict(X)
-
-    label_to_items: dict[int, list] = defaultdict(list)
-    for p, lb in zip(valid, labels):
-        if lb < 0:
-            continue
-        label_to_items[int(lb)].append(p)
-
-    courses = []
-    for gid, items in label_to_items.items():
-        if len(items) < 2:
-            continue
-        idx_map = {i: items[i] for i in range(len(items))}
-        mst = _mst_edges_prim(items)
-        subs = _split_by_long_edges(items, mst)
-        for sub in subs:
-            sub_items = [idx_map[i] for i in sub]
-            if len(sub_items) < 2:
-                continue
-            order_ids = _cheapest_insertion_path_with_2opt(sub_items)
-            id2 = {p['id']: p for p in sub_items}
-            path, total = [], 0.0
-            for a, b in zip(order_ids, order_ids[1:]):
-                pa, pb = id2[a], id2[b]
-                total += _haversine_km((pa['lat'], pa['lng']), (pb['lat'], pb['lng']))
-                path.append([pa['lat'], pa['lng']])
-            last = id2[order_ids[-1]]
-            path.append([last['lat'], last['lng']])
-
-            cx = sum(p['lat'] for p in sub_items)/len(sub_items)
-            cy = sum(p['lng'] for p in sub_items)/len(sub_items)
-            title = _guess_course_title(sub_items)
-
-            courses.append({
-                "id": f"course_{gid}_{len(courses)}",
-                "title": title,
-                "center": {"lat": cx, "lng": cy},
-                "spots": order_ids,
-                "distance_km": round(total, 1),
-                "polyline": path
-            })
-    courses.sort(key=lambda c: (c['center']['lat'], c['center']['lng']))
-    return courses
-
 import uuid
 from jose import jwt, JWTError
 from passlib.hash import bcrypt
@@ -1108,29 +848,14 @@ def _write_courses(uid: str, items: list[dict]):
 # =============================================================================
 # 메타 캐시 & 나무위키 크롤러
 # =============================================================================
-def _meta_path(title: str, kind: Optional[str]) -> str:
-    key = hashlib.sha1(f"{norm_title(title)}|{(kind or '').lower()}".encode("utf-8")).hexdigest()
-    return os.path.join(CACHE_DIR, f"meta_{key}.json")
-
-def _load_meta(title: str, kind: Optional[str]) -> Optional[dict]:
-    p = _meta_path(title, kind)
-    if not os.path.exists(p):
-        return None
-    try:
-        mtime = datetime.utcfromtimestamp(os.path.getmtime(p))
-        if datetime.utcnow() - mtime > timedelta(days=META_TTL_DAYS):
-            return None
-        with open(p, encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return None
+META = MetaStore(META_DB, ttl_sec=META_TTL_DAYS * 86400, neg_ttl_sec=META_NEG_TTL_SEC, neg_max_sec=META_NEG_MAX_SEC)
+META.migrate_json_dir(CACHE_DIR)   # 기존 meta_<sha1>.json → sqlite (최초 1회)
 
 def _save_meta(title: str, kind: Optional[str], data: dict) -> None:
     try:
-        with open(_meta_path(title, kind), "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+        META.put(title, kind, data)
+    except Exception as e:
+        print(f"[WARN] meta save failed for '{title}': {e}")
 
 def _extract_poster_url(raw: dict) -> Optional[str]:
     u = None
@@ -1155,52 +880,89 @@ def _raw_to_meta(raw: dict, title_fallback: str, query_used: Optional[str]) -> d
         "_query_used": query_used,
     }
 
-def _fetch_meta_try_suffixes(user_title: str, suffixes: list[str]) -> Optional[dict]:
-    # 1) 원문+접미사들 2) 원문 그대로
+_NAMU_SESSION = build_session()   # 메타 조회 공용 세션 (커넥션 풀 재사용)
+_META_PROBE_POOL = ThreadPoolExecutor(max_workers=META_PROBE_WORKERS, thread_name_prefix="meta-probe")
+
+
+def _probe_meta(q: str, user_title: str) -> dict:
+    raw = crawl_one(q, session=_NAMU_SESSION, delay=0)   # ← 여기로 '오징어 게임 시즌1(드라마)' 같은 원문+접미사가 그대로 들어감
+    return _raw_to_meta(raw, user_title, q)
+
+
+def _fail_reason(e: Exception) -> str:
+    """메타 조회 실패 사유 코드"""
+    if isinstance(e, BlockedPage):
+        return "blocked"   # 200이지만 차단/챌린지 본문
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        code = e.response.status_code
+        if code == 404:
+            return "not_found"
+        if code in (200, 403, 429, 503):   # 200 = 본문 거부 (예전 page_cache 방식)
+            return "blocked"
+        return f"http_{code}"
+    if isinstance(e, (requests.Timeout, requests.ConnectionError)):
+        return "network"
+    return "parse_error"
+
+# 여러 후보가 서로 다른 이유로 실패하면 일시적 사유를 우선 기록
+_REASON_RANK = {"network": 0, "blocked": 1, "parse_error": 2}
+
+def _fetch_meta_try_suffixes(user_title: str, suffixes: list[str], errors: Optional[list] = None) -> Optional[dict]:
+    # 1) 원문+접미사들 2) 원문 그대로 — 후보는 동시에 조회, 판정은 이 우선순위대로
     queries = [f"{user_title}{s}" for s in suffixes] + [user_title]
+    futs = [_META_PROBE_POOL.submit(_probe_meta, q, user_title) for q in queries]
 
-    # 1차: 포스터 있는 결과만
-    for q in queries:
-        try:
-            raw = crawl_one(q, delay=0)   # ← 여기로 '오징어 게임 시즌1(드라마)' 같은 원문+접미사가 그대로 들어감
-            meta = _raw_to_meta(raw, user_title, q)
+    # 포스터 있는 첫 결과(앞 후보가 모두 끝난 뒤 확정), 없으면 포스터 없는 첫 성공
+    first = None
+    try:
+        for fut in futs:
+            try:
+                meta = fut.result()
+            except Exception as e:
+                if errors is not None:
+                    errors.append(_fail_reason(e))
+                continue
             if meta.get("poster"):
                 return meta
-        except Exception:
-            pass
-
-    # 2차: 포스터 없어도 첫 성공
-    for q in queries:
-        try:
-            raw = crawl_one(q, delay=0)
-            return _raw_to_meta(raw, user_title, q)
-        except Exception:
-            pass
-    return None
+            first = first or meta
+        return first
+    finally:
+        for fut in futs:
+            fut.cancel()   # 아직 시작 안 한 후보만 취소 (진행 중인 건 끝나서 페이지 캐시에 남음)
 
-def _fetch_meta_drama_suffix_then_plain(title):  # title == user_title
-    return _fetch_meta_try_suffixes(title, ["(드라마)", "(한국 드라마)", " (시즌3)"])
+def _fetch_meta_drama_suffix_then_plain(title, errors=None):  # title == user_title
+    return _fetch_meta_try_suffixes(title, ["(드라마)", "(한국 드라마)", " (시즌3)"], errors)
 
-def _fetch_meta_film_suffix_then_plain(title):   # title == user_title
-    return _fetch_meta_try_suffixes(title, ["(영화)", "(한국 영화)"])
+def _fetch_meta_film_suffix_then_plain(title, errors=None):   # title == user_title
+    return _fetch_meta_try_suffixes(title, ["(영화)", "(한국 영화)"], errors)
 
 def _fetch_meta(title: str, kind: Optional[str]) -> dict:
     kind_l = (kind or "").lower()
     meta = None
+    errors: List[str] = []
     if kind_l == "drama":
-        meta = _fetch_meta_drama_suffix_then_plain(title)
+        meta = _fetch_meta_drama_suffix_then_plain(title, errors)
     elif kind_l == "film":
-        meta = _fetch_meta_film_suffix_then_plain(title)
+        meta = _fetch_meta_film_suffix_then_plain(title, errors)
     else:
         try:
-            raw = crawl_one(title, delay=0)
-            meta = _raw_to_meta(raw, title, title)
-        except Exception:
+            meta = _probe_meta(title, title)
+        except Exception as e:
+            errors.append(_fail_reason(e))
             meta = None
 
     if meta:
         _save_meta(title, kind, meta)
         return meta
+    reason = min(errors, key=lambda r: _REASON_RANK.get(r, 9)) if errors else "not_found"
+    try:
+        retry_at = META.fail(title, kind, reason)
+        print(f"[meta] '{title}' failed ({reason}) → retry after {datetime.utcfromtimestamp(retry_at).isoformat()}Z")
+    except Exception as e:
+        print(f"[WARN] meta failure record failed for '{title}': {e}")
+    return _placeholder_meta(title, _negative=reason)
+
+def _placeholder_meta(title: str, **flags) -> dict:
     return {
         "title": title,
         "released": None,
@@ -1208,10 +970,154 @@ def _fetch_meta(title: str, kind: Optional[str]) -> dict:
         "cast": [],
         "_source": None,
         "_query_used": None,
+        **flags,
     }
 
+# 작품별 메타 수집 작업 (진행 중이면 같은 Future 재사용 → 같은 작품 크롤링은 동시에 1개)
+_META_REFRESH_POOL = ThreadPoolExecutor(max_workers=META_REFRESH_WORKERS, thread_name_prefix="meta-refresh")
+_META_TASKS: Dict[str, Future] = {}
+_META_TASKS_LOCK = Lock()
+
+def _meta_task(title: str, kind: Optional[str]) -> Future:
+    key = meta_key(title, kind)
+    with _META_TASKS_LOCK:
+        fut = _META_TASKS.get(key)
+        if fut is None:
+            fut = _META_TASKS[key] = _META_REFRESH_POOL.submit(_fetch_meta, title, kind)
+            fut.add_done_callback(lambda _f: _meta_task_done(key, _f))
+        return fut
+
+def _meta_task_done(key: str, fut: Future) -> None:
+    with _META_TASKS_LOCK:
+        if _META_TASKS.get(key) is fut:
+            del _META_TASKS[key]
+
 def get_drama_meta(title: str, kind: Optional[str]) -> dict:
-    return _load_meta(title, kind) or _fetch_meta(title, kind)
+    """
+    stale-while-revalidate:
+    - 신선한 저장본 → 그대로
+    - TTL 지난 저장본 → 즉시 반환(_stale=True) + 백그라운드 재수집
+    - 저장본 없음 → 수집을 META_DEADLINE_SEC까지만 기다리고, 넘으면 자리표시(_pending=True).
+      수집은 계속 진행되어 저장소에 채워지므로 다음 요청부터 반영.
+    - 최근 실패(백오프 대기 중) → 크롤링 없이 자리표시(_negative=사유)
+    """
+    try:
+        entry = META.entry(title, kind)
+        failed = META.failure(title, kind)
+    except Exception:
+        entry, failed = None, None
+    if entry is not None:
+        data, fetched_at = entry
+        if time.time() - fetched_at <= META.ttl_sec:
+            return data
+        if failed is None:
+            _meta_task(title, kind)
+        return {**data, "_stale": True}
+    if failed is not None:
+        return _placeholder_meta(title, _negative=failed["reason"])
+    try:
+        return _meta_task(title, kind).result(timeout=META_DEADLINE_SEC)
+    except FutureTimeout:
+        print(f"[meta] deadline {META_DEADLINE_SEC}s passed for '{title}' → placeholder")
+        return _placeholder_meta(title, _pending=True)
+
+# =============================================================================
+# 배우 모드: 필모그래피 → 작품키 일괄 매칭 → 핀 병합 + 코스 + 메타(병렬)
+# =============================================================================
+PAGES = default_cache()   # 나무위키 페이지 공용 캐시 (메타/필모그래피 크롤러가 같이 사용)
+FILMOGRAPHY = FilmographyCache(FILMO_CACHE_DB, ttl_sec=FILMO_TTL_DAYS * 86400,
+                               neg_ttl_sec=FILMO_NEG_TTL_SEC, neg_max_sec=FILMO_NEG_MAX_SEC)
+
+
+def cached_filmography(name: str):
+    """get_filmography + 영속 TTL 캐시 (실패는 negative 캐시, 동시 요청은 1회 조회)"""
+    return FILMOGRAPHY.get(name, get_filmography)
+
+
+_ACTOR_META_POOL = ThreadPoolExecutor(max_workers=ACTOR_META_WORKERS, thread_name_prefix="actor-meta")
+_ACTOR_KIND = {"drama": "tv", "tv": "tv", "film": "film", "movie": "film"}
+
+
+def _actor_metas(works: List[Dict[str, Any]]) -> None:
+    """작품별 메타를 제한된 풀에서 동시 수집 → works[i]["meta"] (앞 ACTOR_MAX_WORKS개만, 시간 초과/실패는 None)"""
+    want = [w for w in works if w["key"] and w["spots"]][:ACTOR_MAX_WORKS]
+    kind_of = lambda w: "drama" if w["kind"] == "tv" else "film"
+    try:
+        stored = META.get_many((w["title"], kind_of(w)) for w in want)   # 저장된 메타는 질의 1번
+    except Exception as e:
+        print(f"[WARN] meta batch read failed: {e}")
+        stored = {}
+    futs = {}
+    for w in want:
+        hit = stored.get((w["title"], kind_of(w)))
+        if hit is not None:
+            w["meta"] = hit
+        else:
+            futs[_ACTOR_META_POOL.submit(get_drama_meta, w["title"], kind_of(w))] = w   # stale/마감 처리 포함
+    done, _ = wait(futs, timeout=ACTOR_META_TIMEOUT_SEC)
+    for fut, w in futs.items():
+        if fut not in done:
+            print(f"[WARN] meta timeout for '{w['title']}'")
+            continue
+        try:
+            w["meta"] = fut.result()
+        except Exception as e:
+            print(f"[WARN] meta fetch failed for '{w['title']}': {e}")
+
+
+def actor_chat(name: str, kind: Optional[str] = None) -> Dict[str, Any]:
+    """배우 1명 → (작품 목록, 병합 핀, 군집, 코스). 클라이언트의 작품별 N회 검색을 1회로."""
+    works = cached_filmography(name)
+    want = _ACTOR_KIND.get((kind or "").lower())
+    works = [w for w in works if w.kind in ("tv", "film") and want in (None, w.kind)]
+
+    # 필모그래피 전체를 먼저 매칭 (상한은 메타 수집에만) → 긴 필모그래피도 촬영지 있는 작품을 놓치지 않음
+    ds = ensure_gazetteer()
+    keys = ds.resolve_titles([w.title for w in works])
+    groups = ds.table.title_ids_many({k for k in keys.values() if k})
+    works = [w for w in works if len(groups.get(keys.get(w.title), ()))]
+
+    items: List[Dict[str, Any]] = []
+    pins: List[Dict[str, Any]] = []
+    seen_keys, seen_pins = set(), {}
+    for w in works:
+        key = keys.get(w.title)
+        ids = groups.get(key, np.empty(0, dtype=np.intp)) if key not in seen_keys else np.empty(0, dtype=np.intp)
+        seen_keys.add(key)
+        items.append({"kind": w.kind, "title": w.title, "year": w.year, "role": w.role,
+                      "network": w.network, "key": key, "spots": len(ids), "meta": None})
+        for i in ids.tolist():
+            s = ds.spot(i)
+            # 같은 장소(좌표 + 장소명)는 작품이 달라도 핀 1개, works에 작품명 누적
+            dk = (round(s["lat"], 5), round(s["lng"], 5), s["place_name"] or "")
+            j = seen_pins.get(dk)
+            if j is not None:
+                if w.title not in pins[j]["works"]:
+                    pins[j]["works"].append(w.title)
+                continue
+            seen_pins[dk] = len(pins)
+            pins.append({
+                "id": f"pin_{len(pins)+1}",
+                "type": "spot",
+                "title": s["place_name"] or s["work_title"] or "",
+                "subtitle": s["address"] or "",
+                "lat": s["lat"], "lng": s["lng"],
+                "works": [w.title],
+            })
+
+    pins, clusters, courses = cluster_and_build_courses(pins, eps_km_big=60.0, eps_km_small=10.0, max_ms=COURSE_OPT_MS)
+    _actor_metas(items)
+    return {
+        "ok": True,
+        "mode": "actor",
+        "actor": name,
+        "works": items,
+        "pins": pins,
+        "clusters": clusters,
+        "courses": courses,
+        "pins_empty": len(pins) == 0,
+        "meta": None,
+    }
 
 # =============================================================================
 # FastAPI 앱
@@ -1245,126 +1151,59 @@ class GenReq(BaseModel):
     no_cache_write: Optional[bool] = False
 
 # ====== Nearby spots by lat/lng (place mode) ======
-def _iter_all_spots_from_gazetteer():
-    """GAZ_IDX 전체를 평탄화해서 spot dict 리스트 반환"""
-    ensure_gazetteer()
-    rows = []
-    for _, items in (GAZ_IDX or {}).items():
-        for r in items:
-            row = r.get("row", {}) if isinstance(r, dict) else {}
-            lat = as_float(r.get("lat")); lng = as_float(r.get("lng"))
-            if lat is None or lng is None:
-                continue
-            rows.append({
-                "place_name": row.get("PLACE_NM") or row.get("place") or "",
-                "address":     row.get("ADDR") or "",
-                "lat": lat, "lng": lng,
-                "media_type":  row.get("MEDIA_TY"),     # ex) 드라마/영화
-                "place_type":  row.get("PLACE_TY"),
-                "tel":         row.get("TEL_NO"),
-                "work_title":  r.get("title"),          # 원본 CSV의 작품명(정규화 전)
-            })
-    return rows
-
-# 상단 공용
-from functools import lru_cache
-import csv, math, os, sys
-
-CSV_PATH = os.path.join(os.path.dirname(__file__), "drama_list.csv")
-
-def haversine_km(lat1, lng1, lat2, lng2):
-    R = 6371.0088
-    dlat = math.radians(lat2 - lat1)
-    dlng = math.radians(lng2 - lng1)
-    a = (math.sin(dlat/2)**2 +
-         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng/2)**2)
-    return 2 * R * math.asin(math.sqrt(a))
-
-@lru_cache(maxsize=1)
-def load_drama_list():
-    rows = []
-    if not os.path.exists(CSV_PATH):
-        print(f"[place] CSV not found: {CSV_PATH}", file=sys.stderr)
-        return rows
-
-    with open(CSV_PATH, "r", encoding="utf-8-sig", newline="") as f:
-        sniffer = csv.Sniffer()
-        sample = f.read(4096)
-        f.seek(0)
-        dialect = sniffer.sniff(sample) if sample else csv.excel
-        reader = csv.DictReader(f, dialect=dialect)
-
-        for idx, r in enumerate(reader):
-            # 컬럼 후보 폭넓게
-            lat_raw = r.get("lat") or r.get("위도") or r.get("Latitude")
-            lng_raw = r.get("lng") or r.get("경도") or r.get("Longitude")
-            if lat_raw is None or lng_raw is None:
-                continue
-            try:
-                lat = float(str(lat_raw).strip())
-                lng = float(str(lng_raw).strip())
-            except:
-                continue
-
-            title = (r.get("place") or r.get("장소명") or r.get("title") or "촬영지").strip()
-            work  = (r.get("work")  or r.get("작품명")  or r.get("drama") or "").strip()
-            addr  = (r.get("addr")  or r.get("주소")   or "").strip()
-            pid   = (r.get("id")    or r.get("place_id") or f"csv_{idx}").strip()
-
-            rows.append({
-                "id": pid,
-                "title": title,
-                "work": work,
-                "addr": addr,
-                "lat": lat,
-                "lng": lng,
-            })
-
-    print(f"[place] CSV loaded: {len(rows)} rows", file=sys.stderr)
-    return rows
-
+def _spot_subtitle(s: dict) -> str:
+    meta = f'{s.get("work_title") or ""} · {s.get("media_type") or ""}'.strip(" ·")
+    return " / ".join([t for t in [meta, s.get("address")] if t])
 
 # === 공용: 임의 좌표 반경 내 촬영지 찾기 ===
-def find_nearby_spots(lat: float, lng: float, radius_km: float = 1.0, max_items: int = 20):
-    ensure_gazetteer()
-    rows = []
-    for _, items in (GAZ_IDX or {}).items():
-        for r in items:
-            row = r.get("row", {}) if isinstance(r, dict) else {}
-            la, ln = as_float(r.get("lat")), as_float(r.get("lng"))
-            if la is None or ln is None:
-                continue
-            rows.append({
-                "place_name": row.get("PLACE_NM") or row.get("place") or "",
-                "address":     row.get("ADDR") or "",
-                "lat": la, "lng": ln,
-                "media_type":  row.get("MEDIA_TY"),
-                "place_type":  row.get("PLACE_TY"),
-                "tel":         row.get("TEL_NO"),
-                "work_title":  r.get("title"),
-            })
-    center = (lat, lng)
+def find_nearby_spots(lat: float, lng: float, radius_km: float = 1.0, max_items: int = 20,
+                      media_type: Optional[str] = None):
+    ds = ensure_gazetteer()
+    ids, dists = ds.geo.radius(lat, lng, radius_km + 1e-9)
+    if media_type:
+        keep = ds.table.media_mask(ids, media_type)
+        ids, dists = ids[keep], dists[keep]
     out = []
-    for i, s in enumerate(rows):
-        d = _haversine_km(center, (s["lat"], s["lng"]))
-        if d <= radius_km + 1e-9:
-            meta = f'{s.get("work_title") or ""} · {s.get("media_type") or ""}'.strip(" ·")
-            subtitle = " / ".join([t for t in [meta, s.get("address")] if t])
-            out.append({
-                "id": f"near_{i}",
-                "type": "spot",
-                "title": s["place_name"] or "(이름 없음)",
-                "subtitle": subtitle,
-                "lat": s["lat"], "lng": s["lng"],
-                "dist_km": round(d, 2),
-                "work_title": s.get("work_title"),
-                "media_type": s.get("media_type"),
-                "place_type": s.get("place_type"),
-            })
-        
+    for i, d in zip(ids.tolist(), dists.tolist()):
+        s = ds.spot(i)
+        out.append({
+            "id": f"near_{i}",
+            "type": "spot",
+            "title": s["place_name"] or "(이름 없음)",
+            "subtitle": _spot_subtitle(s),
+            "lat": s["lat"], "lng": s["lng"],
+            "dist_km": round(d, 2),
+            "work_title": s.get("work_title"),
+            "media_type": s.get("media_type"),
+            "place_type": s.get("place_type"),
+        })
+    # 반올림 거리 동률은 이름순(기존 정렬 규칙 유지)
     out.sort(key=lambda x: (x["dist_km"], x["title"]))
     return out[:max_items]
 
+def find_place_pins(lat: float, lng: float, radius_km: float, fallback_k: int = 20):
+    """place 모드: 반경 안 촬영지(가까운 순), 0건이면 가장 가까운 fallback_k건"""
+    ds = ensure_gazetteer()
+    print(f"[place] q=({lat:.6f},{lng:.6f}), radius={radius_km}km, total={len(ds)}", file=sys.stderr)
+    ids, dists = ds.geo.radius(lat, lng, radius_km)
+    print(f"[place] inside_count={len(ids)}", file=sys.stderr)
+    if not len(ids):
+        ids, dists = ds.geo.nearest(lat, lng, fallback_k)
+    pins = []
+    for i, d in zip(ids.tolist(), dists.tolist()):
+        s = ds.spot(i)
+        work, addr = s.get("work_title") or "", s.get("address") or ""
+        pins.append({
+            "id": f"csv_{s['seq_no']}" if s.get("seq_no") else f"near_{i}",
+            "title": s["place_name"] or "촬영지",
+            "subtitle": " · ".join([v for v in [work, addr] if v]),
+            "lat": s["lat"], "lng": s["lng"],
+            "distance_km": round(d, 3),
+            "work": work,         # ★ 그룹핑용
+            "addr": addr,         # (선택)
+        })
+    return pins
+
 
 
 app = FastAPI(title="KTrip RAG Service", version="1.4")
@@ -1463,12 +1302,46 @@ def api_spots_nearby(
     lat: float = Query(...),
     lng: float = Query(...),
     radius_km: float = Query(5.0, ge=0.2, le=50.0),
-    max: int = Query(20, ge=1, le=300)
+    max: int = Query(20, ge=1, le=300),
+    media: Optional[str] = Query(None, description="drama | movie"),
 ):
-    items = find_nearby_spots(lat, lng, radius_km, max)
+    items = find_nearby_spots(lat, lng, radius_km, max, media_type=media)
     return {"ok": True, "items": items}
 
 
+@app.get("/api/titles/suggest")
+def api_titles_suggest(
+    q: str = Query("", description="작품명 접두어 또는 초성 (예: 오징, ㅇㅈㅇ)"),
+    k: int = Query(8, ge=1, le=10),
+):
+    # 스냅샷에 미리 만들어 둔 트라이 조회 → 접두어 길이만큼만 걷는다
+    items = ensure_gazetteer().suggest.suggest(q, limit=k)
+    return {"ok": True, "q": q, "items": items}
+
+
+class RouteReq(BaseModel):
+    spots: List[Dict[str, Any]]          # [{id, lat, lng}, ...]
+    max_ms: Optional[float] = None       # 없으면 COURSE_OPT_MS
+
+
+@app.post("/api/route/optimize")
+def api_route_optimize(req: RouteReq):
+    if len(req.spots) > ROUTE_OPT_MAX_SPOTS:
+        return JSONResponse({"ok": False, "error": f"too many spots (max {ROUTE_OPT_MAX_SPOTS})"}, status_code=400)
+    spots = [s for s in req.spots if s.get("lat") is not None and s.get("lng") is not None]
+    t0 = time.perf_counter()   # 예산은 거리 행렬 계산부터
+    try:
+        D = pairwise_km([float(s["lat"]) for s in spots], [float(s["lng"]) for s in spots])
+    except (TypeError, ValueError):
+        return JSONResponse({"ok": False, "error": "invalid lat/lng"}, status_code=400)
+    budget = COURSE_OPT_MS if req.max_ms is None else max(0.0, min(float(req.max_ms), 5000.0))
+    order, quality = optimize_route(D, max_ms=budget, t0=t0)
+    return {"ok": True,
+            "order": [spots[i].get("id", i) for i in order],
+            "distance_km": round(quality["length_km"], 1),
+            "quality": quality}
+
+
 @app.post("/api/auth/signup")
 def auth_signup(req: AuthReq, response: Response):
     try:
@@ -1600,6 +1473,28 @@ def del_course(cid: str, user=Depends(_get_current_user)):
 
 # tour API
 
+def _tour_refresh(key: str, lat: float, lng: float, radius: int, type: str, max: int) -> tuple:
+    """유형별로 공간 캐시(덮는 원)를 먼저 보고, 덮이지 않은 유형만 TourAPI 호출. 반환: (항목, API 호출 수)"""
+    merged, calls = {}, 0
+    radius_km = radius / 1000.0
+    for tid in _tour_type_ids(type):
+        items = TOUR_GEO.lookup(lat, lng, radius_km, tid)
+        if items is None:
+            # 넉넉히 받아 두면(TOURAPI_FETCH_ROWS) 잘린 응답이어도 덮는 반경이 커져 이웃 요청 재사용 ↑ (호출 수는 같음)
+            num = TOURAPI_FETCH_ROWS if TOURAPI_FETCH_ROWS > max else max
+            items = _tour_location_based(lat, lng, radius, tid, num)
+            TOUR_GEO.store(lat, lng, radius_km, tid, items, num)
+            calls += 1
+        for it in items:
+            cid = it.get("cid") or f"{it.get('lat')},{it.get('lng')},{tid}"
+            if cid not in merged:
+                merged[cid] = it
+    out = list(merged.values())
+    out.sort(key=lambda x: (x.get("dist_km") if x.get("dist_km") is not None else 9e9, x.get("title") or ""))
+
+    _tour_cache_write(key, out)
+    return out, calls
+
 @app.get("/api/tour/nearby")
 def api_tour_nearby(
     lat: float = Query(..., description="위도"),
@@ -1609,7 +1504,7 @@ def api_tour_nearby(
     max: int = Query(24, ge=1, le=100)
 ):
     """
-    한국관광공사 TourAPI(서버측 프록시 + CSV 캐시)
+    한국관광공사 TourAPI(서버측 프록시 + sqlite 캐시)
     - ok: True|False
     - items: [{title,addr,lat,lng,cid,ctype,thumb,dist_km}]
     - cached: True/False
@@ -1618,30 +1513,16 @@ def api_tour_nearby(
     if not TOURAPI_KEY:
         return {"ok": False, "error": "tourapi_key_missing"}
 
-    _ensure_tour_cache_file()
     key = f"{round(lat,5)}|{round(lng,5)}|{int(radius)}|{(type or 'all').lower()}"
-
-    with _tour_cache_lock:
-        cached = _tour_cache_read(key)
+    cached = _tour_cache_read(key)
 
     if cached and _is_fresh(cached.get("updated_at", ""), TOURAPI_TTL_DAYS):
         return {"ok": True, "cached": True, "stale": False, "items": cached["items"][:max]}
 
-    type_ids = _tour_type_ids(type)
     try:
-        merged = {}
-        for tid in type_ids:
-            items = _tour_location_based(lat, lng, radius, tid, max)
-            for it in items:
-                cid = it.get("cid") or f"{it.get('lat')},{it.get('lng')},{tid}"
-                if cid not in merged:
-                    merged[cid] = it
-        out = list(merged.values())
-        out.sort(key=lambda x: (x.get("dist_km") if x.get("dist_km") is not None else 9e9, x.get("title") or ""))
-
-        with _tour_cache_lock:
-            _tour_cache_write(key, out)
-        return {"ok": True, "cached": False, "stale": False, "items": out[:max]}
+        # 같은 (좌표, 반경, 유형, 개수) 동시 요청은 TourAPI 호출 1벌만
+        out, calls = _SF_TOUR.do((key, max), _tour_refresh, key, lat, lng, radius, type, max)
+        return {"ok": True, "cached": calls == 0, "stale": False, "items": out[:max], "api_calls": calls}
     except Exception as e:
         if cached:
             return {"ok": True, "cached": True, "stale": True, "items": cached["items"][:max], "warn": str(e)}
@@ -1649,12 +1530,18 @@ def api_tour_nearby(
 
 @app.get("/healthz")
 def healthz():
-    return {"ok": True, "csv_loaded": bool(GAZ_IDX)}
+    snap = DATASETS.current
+    return {"ok": True, "csv_loaded": bool(snap), "dataset_version": snap.version if snap else None,
+            "courses_precomputed": len(COURSES),
+            "filmography_cache": FILMOGRAPHY.stats,
+            "page_cache": PAGES.stats if PAGES is not None else None,
+            "singleflight": singleflight.metrics(),
+            "tour_geo_cache": TOUR_GEO.stats}
 
 
 @app.get("/api/actor")
 def api_actor(name: str = Query(..., description="배우 이름")):
-    works = get_filmography(name)
+    works = cached_filmography(name)
     items, seen = [], set()
     for w in works:
         if w.kind not in ("tv", "film"):
@@ -1678,7 +1565,7 @@ def api_drama_meta(
     kind: Optional[str] = Query(None, description="drama | film")
 ):
     try:
-        meta = get_drama_meta(title, kind)
+        meta = _SF_META.do(meta_key(title, kind), get_drama_meta, title, kind)
         return {"ok": True, **meta}
     except Exception as e:
         return {"ok": False, "error": str(e), "title": title, "kind": kind}
@@ -1686,31 +1573,37 @@ def api_drama_meta(
 @app.on_event("startup")
 def _startup():
     ensure_gazetteer()
-    _ensure_yt_cache_file()
-    _ensure_tour_cache_file()
+    if CSV_WATCH_SEC > 0:
+        DATASETS.start_watcher(CSV_WATCH_SEC)
+    API_CACHE.compact()
+    TOUR_GEO.compact(TOURAPI_TTL_DAYS * 86400)
+
+@app.on_event("shutdown")
+def _shutdown():
+    DATASETS.stop_watcher()
+
+def _yt_refresh(q_norm: str, max_results: int) -> list:
+    items = _yt_search_api(q_norm, max_results=max_results)
+    _write_yt_cache(q_norm, items)
+    return items
 
 @app.get("/api/youtube")
 def api_youtube(q: str = Query(..., min_length=1), max: int = Query(4, ge=1, le=15)):
     """
-    YouTube API 결과를 7일 CSV 캐시에 저장/재사용.
+    YouTube API 결과를 7일 캐시(sqlite)에 저장/재사용.
     - ok: True|False
     - items: [{id,title,channel,publishedAt,thumb}]
     - cached: True/False
     - stale: True/False (API 실패 시 오래된 캐시라도 내보낸 경우)
     """
-    _ensure_yt_cache_file()
-
     q_norm = q.strip()
-    with _yt_cache_lock:
-        cached = _read_yt_cache(q_norm)
+    cached = _read_yt_cache(q_norm)
 
     if cached and _is_fresh(cached.get("updated_at", ""), YT_CACHE_TTL_DAYS):
         return {"ok": True, "cached": True, "stale": False, "items": cached["items"][:max], "q": q_norm}
 
     try:
-        items = _yt_search_api(q_norm, max_results=max)
-        with _yt_cache_lock:
-            _write_yt_cache(q_norm, items)
+        items = _SF_YOUTUBE.do((q_norm, max), _yt_refresh, q_norm, max)   # 같은 검색어 동시 요청은 API 1회
         return {"ok": True, "cached": False, "stale": False, "items": items[:max], "q": q_norm}
     except Exception as e:
         if cached:
@@ -1721,6 +1614,14 @@ def api_youtube(q: str = Query(..., min_length=1), max: int = Query(4, ge=1, le=
 GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY", "").strip()
 GOOGLE_CX_ID   = os.environ.get("GOOGLE_CX_ID", "").strip()
 import httpx
+
+async def _gcs_fetch(url: str, params: dict) -> tuple:
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        res = await client.get(url, params=params)
+    if res.status_code != 200:
+        return res.status_code, res.text[:200], []
+    return 200, "", res.json().get("items", [])
+
 @app.get("/api/gcs")
 async def gcs_proxy(
     q: str = Query(""),
@@ -1741,28 +1642,63 @@ async def gcs_proxy(
         "fields": "items(title,link,snippet,pagemap)",
     }
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            res = await client.get(url, params=params)
-        if res.status_code != 200:
+        # 같은 검색 동시 요청은 CSE 호출 1번 (이벤트 루프 안 single-flight)
+        status, detail, items = await _SF_GCS.do_async((q, num, start, lr, safe), _gcs_fetch, url, params)
+        if status != 200:
             return JSONResponse(
-                {"ok": False, "error": f"google_cse_http_{res.status_code}", "detail": res.text[:200]},
+                {"ok": False, "error": f"google_cse_http_{status}", "detail": detail},
                 status_code=502,
             )
-        data = res.json()
-        return {"ok": True, "items": data.get("items", [])}
+        return {"ok": True, "items": items}
     except Exception as e:
         return JSONResponse({"ok": False, "error": "google_cse_proxy_fail", "detail": str(e)}, status_code=502)
 
+# =============================================================================
+# 작품(work) 모드 응답 캐시
+# =============================================================================
+# 핀/군집/코스는 가제티어가 바뀌기 전까지 같으므로 응답 전체를 캐시.
+# 키 = (작품키, kind, 입력 제목) + 값의 버전 = 스냅샷의 작품별 버전(title_rev)
+#  → 갱신 파이프라인이 붙인 작품만 버전이 바뀌어 그 작품만 무효화된다.
+_WORK_CACHE = LRU(WORK_CACHE_SIZE)   # key -> (rev, etag, payload, expires_at)
+_WORK_LOCK = Lock()
+
+def _work_cache_key(title: str, kind: Optional[str]) -> tuple:
+    return (norm_title(title), (kind or "").lower(), re.sub(r"\s+", " ", title))
+
+def _work_cache_get(key: tuple, rev: Optional[int]) -> Optional[tuple]:
+    with _WORK_LOCK:
+        hit = _WORK_CACHE.get(key)
+        if hit is None:
+            return None
+        if hit[0] != rev or hit[3] < time.time():
+            del _WORK_CACHE[key]
+            return None
+        return hit
+
+def _work_cache_put(key: tuple, rev: Optional[int], payload: dict) -> str:
+    body = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    etag = 'W/"%s"' % hashlib.sha1(body.encode("utf-8")).hexdigest()[:20]
+    with _WORK_LOCK:
+        _WORK_CACHE.put(key, (rev, etag, payload, time.time() + WORK_CACHE_TTL_SEC))
+    return etag
+
+def _etag_match(request: Optional[Request], etag: str) -> bool:
+    inm = request.headers.get("if-none-match", "") if request is not None else ""
+    return any(t.strip() in (etag, "*") for t in inm.split(",")) if inm else False
+
 @app.post("/api/chat")
-def api_chat(req: ChatReq):
+def api_chat(req: ChatReq, request: Request = None, response: Response = None):
     """
-    - mode == "work": 작품 검색 (핀 + 메타 + 추천 코스)
-    - mode == "actor": 프런트는 /api/actor 사용 권장(여긴 안전 응답)
+    - mode == "work": 작품 검색 (핀 + 메타 + 추천 코스) — 응답 캐시 + ETag/304
+    - mode == "actor": 배우 필모그래피 전체 (작품 목록 + 병합 핀 + 코스 + 작품별 메타) 1회 응답
     """
     print(req.mode)
     if req.mode == "actor":
-        return {"ok": True, "pins": [], "clusters": [], "pins_empty": True, "meta": None, "courses": []}
-        
+        name = (req.keyword or "").strip()
+        if not name:
+            return {"ok": False, "error": "keyword_required"}
+        return {**actor_chat(name, req.kind), "ts": datetime.utcnow().isoformat() + "Z"}
+
     elif req.mode == "place" or req.kind == "place":
         if req.lat is None or req.lng is None:
             raise HTTPException(status_code=400, detail="lat/lng required for place mode")
@@ -1770,58 +1706,7 @@ def api_chat(req: ChatReq):
         lat0, lng0 = float(req.lat), float(req.lng)
         radius = float(req.radius_km or 5.0)
 
-        rows = load_drama_list()
-        print(f"[place] q=({lat0:.6f},{lng0:.6f}), radius={radius}km, total={len(rows)}", file=sys.stderr)
-
-        # CSV가 비어있으면 즉시 빈 결과 반환
-        if not rows:
-            return {"ok": True, "mode": "place", "query": req.keyword or "",
-                    "pins_empty": True, "pins": [], "courses": [], "meta": None}
-
-        with_dist = []
-        for r in rows:
-            d = haversine_km(lat0, lng0, r["lat"], r["lng"])
-            with_dist.append((d, r))
-        with_dist.sort(key=lambda x: x[0])
-
-        # 1차: 반경 안
-        inside = [(d, r) for (d, r) in with_dist if d <= radius]
-        print(f"[place] inside_count={len(inside)}", file=sys.stderr)
-
-        # 2차: 반경 0건이면 가장 가까운 N건 fallback
-        picked = inside if inside else with_dist[:20]
-
-        nearest_pins = []
-        for i, (dist, r) in enumerate(picked):
-            # nearest_pins.append({
-            #     # "id": r["id"] or f"near_{i}",
-            #     # "title": r["title"],              # 장소명
-            #     # "work": r.get("work") or "",      # ✅ 작품명 추가
-            #     # "work_title": r.get("work") or "",# ✅ 호환용 키도 함께
-            #     # "addr": r.get("addr") or "",      # (있다면) 주소도 별도 키로
-            #     # "subtitle": " · ".join([v for v in [r["work"], r["addr"]] if v]),
-            #     # "lat": r["lat"],
-            #     # "lng": r["lng"],
-            #     # "distance_km": round(dist, 3),
-            #     "id": r["id"] or f"near_{i}",
-            #     "title": r["title"],
-            #     "subtitle": " · ".join([v for v in [r["work"], r["addr"]] if v]),
-            #     "lat": r["lat"],
-            #     "lng": r["lng"],
-            #     "distance_km": round(dist, 3),
-            #     # ✅ 추가: 그룹핑용 필드
-            #     "work": r["work"],     # 또는 "work_title": r["work"]
-            #     "addr": r["addr"],     # 주소도 분리 보관(선택)
-            # })
-            nearest_pins.append({
-                "id": r["id"] or f"near_{i}",
-                "title": r["title"],
-                "subtitle": " · ".join([v for v in [r["work"], r["addr"]] if v]),
-                "lat": r["lat"], "lng": r["lng"],
-                "distance_km": round(dist, 3),
-                "work": r["work"],         # ★ 그룹핑용
-                "addr": r["addr"],         # (선택)
-            })
+        nearest_pins = find_place_pins(lat0, lng0, radius)
         return {
             "ok": True,
             "mode": "place",
@@ -1840,21 +1725,23 @@ def api_chat(req: ChatReq):
     refresh_requested = bool(req.refresh or req.update or req.persist_cache)
     ensure_fresh_data(title, refresh_requested=refresh_requested)
 
-    # 이후는 항상 CSV(가제티어) 기반 조회
-    locs = search_locations_via_gazetteer(title)
-    pins: List[Dict[str, Any]] = []
-    for loc in locs:
-        lat, lng = as_float(loc.get("lat")), as_float(loc.get("lng"))
-        if lat is None or lng is None:
-            continue
-        pins.append({
-            "id": f"pin_{len(pins)+1}",
-            "type": "spot",
-            "title": loc.get("place_name") or loc.get("title") or "",
-            "subtitle": loc.get("address") or "",
-            "lat": lat, "lng": lng
-        })
-    pins, _ = cluster_by_radius(pins, eps_km=60.0, min_samples=1)
+    # 캐시: 같은 스냅샷 작품 버전이면 재계산 없이 그대로
+    ds = ensure_gazetteer()
+    ckey = _work_cache_key(title, req.kind)
+    rev = ds.title_rev.get(ckey[0])
+    hit = _work_cache_get(ckey, rev)
+    if hit is not None:
+        _, etag, payload, _ = hit
+        if response is not None:
+            response.headers["ETag"] = etag
+            response.headers["X-Cache"] = "HIT"
+        if _etag_match(request, etag):
+            return Response(status_code=304, headers={"ETag": etag, "X-Cache": "HIT"})
+        return {**payload, "ts": datetime.utcnow().isoformat() + "Z"}
+
+    # 이후는 항상 CSV(가제티어) 기반 조회. 같은 작품 버전의 코스는 미리 계산분이든 요청 중 계산분이든 1개만
+    # (이웃 그래프 1회 → 지도 군집(60km) + 코스 군집(10km) + MST)
+    pins, clusters, courses = COURSES.get_or_build(ds, ckey[0], rev)
     pins_empty = len(pins) == 0
 
     try:
@@ -1863,20 +1750,25 @@ def api_chat(req: ChatReq):
         print(f"[WARN] meta fetch failed for '{title}': {e}")
         meta = None
 
-    courses = build_courses_from_pins(pins)
-    return {
+    payload = {
         "ok": True,
         "pins": pins,
-        "clusters": [],
+        "clusters": clusters,
         "courses": courses,
         "pins_empty": pins_empty,
         "meta": meta,
-        "ts": datetime.utcnow().isoformat() + "Z"
     }
+    # 메타 수집 실패/대기 중(자리표시)·stale 응답은 캐시하지 않음 → 다음 요청에서 갱신본 반영
+    if meta and meta.get("_source") and not meta.get("_stale"):
+        etag = _work_cache_put(ckey, rev, payload)
+        if response is not None:
+            response.headers["ETag"] = etag
+            response.headers["X-Cache"] = "MISS"
+    return {**payload, "ts": datetime.utcnow().isoformat() + "Z"}
 
 @app.post("/generate")
-def generate(req: GenReq):
-    return api_chat(ChatReq(**req.dict()))
+def generate(req: GenReq, request: Request = None, response: Response = None):
+    return api_chat(ChatReq(**req.dict()), request, response)
 
 @app.get("/api/stream")
 async def stream():
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+singleflight.py
+---------------
+같은 키의 동시 호출 합치기 (Go singleflight 방식)
+
+- 첫 호출(리더)만 fn을 실행, 나머지는 리더가 끝날 때까지 기다렸다가 같은 결과/예외를 받는다
+- 결과는 보관하지 않는다 (캐시는 호출하는 쪽 몫) → 끝난 뒤 호출은 다시 실행
+- do(): 동기 핸들러(스레드풀)용, do_async(): async 핸들러(이벤트 루프)용
+- do_many(): 키 여러 개를 한 번에 — 진행 중인 키는 기다리고 나머지만 fn(키 목록) 1번으로 실행 (묶음 API용)
+  (do_async의 fn은 별도 태스크로 실행 → 어느 호출자가 취소돼도 나머지는 결과를 받는다)
+- group(name): 이름별 공용 인스턴스, metrics(): 이름별 호출/실행/합쳐진 수
+
+결과 객체는 기다리던 호출자 모두가 같은 것을 받으므로 호출 쪽에서 고치지 말 것.
+
+Usage
+-----
+  sf = group("dramaMeta")
+  meta = sf.do(("drama", "오징어게임"), get_drama_meta, "오징어 게임", "drama")
+  data = await group("gcs").do_async(("q", 1), fetch_cse, "q")
+  out = group("translate").do_many(keys, lambda mine: translate(mine))   # {키: 값}
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List
+
+
+class _Call:
+    __slots__ = ("done", "value", "err", "dups")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.err: BaseException | None = None
+        self.dups = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async: Dict[Hashable, asyncio.Future] = {}   # 이벤트 루프 스레드에서만 접근
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0}
+
+    def _count(self, leader: bool) -> None:
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["executions" if leader else "coalesced"] += 1
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.dups += 1
+        self._count(leader)
+        if not leader:
+            call.done.wait()
+            if call.err is not None:
+                raise call.err
+            return call.value
+        try:
+            call.value = fn(*args, **kwargs)
+            return call.value
+        except BaseException as e:
+            call.err = e
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def do_many(self, keys: Iterable[Hashable],
+                fn: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> Dict[Hashable, Any]:
+        """
+        키 단위로 합치는 묶음 실행. 다른 호출이 진행 중인 키는 그 결과를 기다리고,
+        나머지 키(이 호출이 리더)만 모아 fn(키 목록) → {키: 값} 1번 실행. 반환: 모든 키의 값 (fn이 빠뜨린 키는 None)
+        통계는 키 단위 (executions = 이 호출이 실행한 키 수).
+        """
+        own: Dict[Hashable, _Call] = {}
+        waits: Dict[Hashable, _Call] = {}
+        with self._lock:
+            for k in dict.fromkeys(keys):
+                call = self._calls.get(k)
+                if call is None:
+                    own[k] = self._calls[k] = _Call()
+                else:
+                    call.dups += 1
+                    waits[k] = call
+            self._stats["calls"] += len(own) + len(waits)
+            self._stats["executions"] += len(own)
+            self._stats["coalesced"] += len(waits)
+        out: Dict[Hashable, Any] = {}
+        if own:
+            try:
+                values = fn(list(own)) or {}
+                for k, call in own.items():
+                    out[k] = call.value = values.get(k)
+            except BaseException as e:
+                for call in own.values():
+                    call.err = e
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise
+            finally:
+                with self._lock:
+                    for k in own:
+                        self._calls.pop(k, None)
+                for call in own.values():
+                    call.done.set()
+        for k, call in waits.items():
+            call.done.wait()
+            if call.err is not None:
+                raise call.err
+            out[k] = call.value
+        return out
+
+    async def do_async(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        task = self._async.get(key)
+        leader = task is None
+        self._count(leader)
+        if leader:
+            # 요청 태스크와 분리된 태스크로 실행 → 리더 요청이 취소돼도(클라이언트 끊김) 작업과 다른 호출자는 계속
+            task = self._async[key] = asyncio.ensure_future(fn(*args, **kwargs))
+            task.add_done_callback(lambda t: self._finish(key, t))
+        # shield: 기다리던 호출자(리더 포함)가 취소되면 그 호출자만 CancelledError
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._async.get(key) is task:
+            self._async.pop(key, None)
+        # exception() 조회 = 기다린 호출자가 없을 때 "never retrieved" 경고도 방지
+        if not task.cancelled() and task.exception() is not None:
+            with self._lock:
+                self._stats["errors"] += 1
+
+    def inflight(self) -> int:
+        with self._lock:
+            return len(self._calls) + len(self._async)
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "inflight": len(self._calls) + len(self._async)}
+
+
+_GROUPS: Dict[str, SingleFlight] = {}
+_GROUPS_LOCK = threading.Lock()
+
+
+def group(name: str) -> SingleFlight:
+    with _GROUPS_LOCK:
+        sf = _GROUPS.get(name)
+        if sf is None:
+            sf = _GROUPS[name] = SingleFlight(name)
+        return sf
+
+
+def metrics() -> Dict[str, Dict[str, int]]:
+    with _GROUPS_LOCK:
+        groups = list(_GROUPS.values())
+    return {sf.name: sf.metrics() for sf in groups}
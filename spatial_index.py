@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+spatial_index.py
+----------------
+촬영지 좌표용 공간 인덱스 (BallTree + haversine, 단위구 라디안 좌표)
+
+- 가제티어 로딩 시 1회 빌드 → 이후 질의는 O(log n)
+- radius(lat, lng, km)  : 반경 내 (인덱스, 거리km) — 가까운 순
+- nearest(lat, lng, k)  : k-최근접 (인덱스, 거리km) — 가까운 순
+- extended(lats, lngs)  : 뒤에 점을 붙인 새 인덱스. 트리는 그대로 두고 작은 델타 버퍼만
+                          벡터 탐색하다가, 델타가 커지면(기본 10%) 그때 트리를 다시 만든다.
+
+Usage
+-----
+  idx = SpotIndex(lats, lngs)
+  ids, dists = idx.radius(37.57, 126.98, 5.0)
+  ids, dists = idx.nearest(37.57, 126.98, k=20)
+  idx2 = idx.extended(new_lats, new_lngs)   # 새 점 인덱스는 len(idx)부터
+"""
+from __future__ import annotations
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+EARTH_R_KM = 6371.0
+DELTA_REBUILD_RATIO = 0.1   # 델타가 트리 크기의 이 비율(최소 256)을 넘으면 재빌드
+
+
+def to_radians(lats: Sequence[float], lngs: Sequence[float]) -> np.ndarray:
+    """(lat, lng) 도 단위 → BallTree(haversine) 입력용 (n, 2) 라디안 배열"""
+    return np.radians(np.column_stack([
+        np.asarray(lats, dtype=np.float64),
+        np.asarray(lngs, dtype=np.float64),
+    ]))
+
+
+def _haversine_rad(q: np.ndarray, pts: np.ndarray) -> np.ndarray:
+    """라디안 한 점 q(2,) → pts(n,2) 중심각(라디안)"""
+    h = (np.sin((pts[:, 0] - q[0]) / 2) ** 2
+         + np.cos(q[0]) * np.cos(pts[:, 0]) * np.sin((pts[:, 1] - q[1]) / 2) ** 2)
+    return 2 * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+class SpotIndex:
+    """불변 공간 인덱스. 입력 순서의 정수 인덱스를 그대로 돌려준다."""
+
+    def __init__(self, lats: Sequence[float], lngs: Sequence[float], leaf_size: int = 40,
+                 _tree: Optional[BallTree] = None, _base: int = 0, _delta: Optional[np.ndarray] = None):
+        self.leaf_size = leaf_size
+        if _tree is not None or _delta is not None:
+            self._tree, self._base = _tree, _base
+            self._delta = _delta if _delta is not None else np.empty((0, 2))
+        else:
+            pts = to_radians(lats, lngs)
+            self._base = len(pts)
+            self._tree = BallTree(pts, leaf_size=leaf_size, metric="haversine") if self._base else None
+            self._delta = np.empty((0, 2))
+        self.size = self._base + len(self._delta)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def extended(self, lats: Sequence[float], lngs: Sequence[float]) -> "SpotIndex":
+        """점 추가본 반환 (비용 = 추가 점 수에 비례, 델타 임계 초과 시에만 트리 재빌드)"""
+        add = to_radians(lats, lngs)
+        if not len(add):
+            return self
+        delta = np.vstack([self._delta, add])
+        if len(delta) > max(256, int(self._base * DELTA_REBUILD_RATIO)):
+            pts = np.vstack([np.asarray(self._tree.data), delta]) if self._tree is not None else delta
+            return SpotIndex([], [], self.leaf_size,
+                             _tree=BallTree(pts, leaf_size=self.leaf_size, metric="haversine"),
+                             _base=len(pts))
+        return SpotIndex([], [], self.leaf_size, _tree=self._tree, _base=self._base, _delta=delta)
+
+    def radius(self, lat: float, lng: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.size or radius_km < 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        q = to_radians([lat], [lng])
+        r = radius_km / EARTH_R_KM
+        ind, dist = np.empty(0, dtype=np.intp), np.empty(0)
+        if self._tree is not None:
+            ti, td = self._tree.query_radius(q, r=r, return_distance=True, sort_results=True)
+            ind, dist = ti[0], td[0]
+        if len(self._delta):
+            dd = _haversine_rad(q[0], self._delta)
+            hit = np.flatnonzero(dd <= r)
+            if len(hit):
+                ind = np.concatenate([ind, hit + self._base])
+                dist = np.concatenate([dist, dd[hit]])
+                order = np.argsort(dist, kind="stable")
+                ind, dist = ind[order], dist[order]
+        return ind, dist * EARTH_R_KM
+
+    def nearest(self, lat: float, lng: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(int(k), self.size)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        q = to_radians([lat], [lng])
+        ind, dist = np.empty(0, dtype=np.intp), np.empty(0)
+        if self._tree is not None:
+            td, ti = self._tree.query(q, k=min(k, self._base), sort_results=True)
+            ind, dist = ti[0], td[0]
+        if len(self._delta):
+            dd = _haversine_rad(q[0], self._delta)
+            ind = np.concatenate([ind, np.arange(len(dd)) + self._base])
+            dist = np.concatenate([dist, dd])
+            order = np.argsort(dist, kind="stable")[:k]
+            ind, dist = ind[order], dist[order]
+        return ind, dist * EARTH_R_KM
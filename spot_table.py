@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+spot_table.py
+-------------
+가제티어 촬영지 컬럼형 테이블 (NumPy)
+
+- 좌표: float64 배열 (lat, lng)
+- 작품키/원제목/매체/장소유형: 인터닝된 정수 코드 + 문자열 풀
+- 장소명/주소/전화: 공용 텍스트 풀 코드
+- 거리/작품/매체 필터는 전부 벡터 연산 (행 단위 dict 재생성 없음)
+- 작품키 → 행: CSR 색인(작품 코드순 정렬 행 + 코드별 오프셋) → 단건 조회 O(k), append 시 병합으로 확장
+
+Usage
+-----
+  table = SpotTable.from_records(records)   # [(norm_key, raw_title, row, lat, lng), ...]
+  ids   = table.title_ids("오징어게임")
+  ids, d = table.within(37.57, 126.98, 3.0, ids=table.media_ids("drama"))
+  spot  = table.spot(ids[0])
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+EARTH_R_KM = 6371.0
+
+
+class StringPool:
+    """문자열 인터닝 풀 (코드 0 = 빈 문자열)"""
+
+    def __init__(self):
+        self.values: List[str] = [""]
+        self._codes: Dict[str, int] = {"": 0}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+    def intern(self, s: Optional[str]) -> int:
+        s = (s or "").strip()
+        code = self._codes.get(s)
+        if code is None:
+            code = len(self.values)
+            self._codes[s] = code
+            self.values.append(s)
+        return code
+
+    def lookup(self, s: Optional[str]) -> int:
+        """없는 값이면 -1 (필터 결과 0건)"""
+        return self._codes.get((s or "").strip(), -1)
+
+    @classmethod
+    def from_values(cls, values: List[str]) -> "StringPool":
+        """저장해 둔 values(코드 순서) → 풀 복원"""
+        pool = cls()
+        pool.values = list(values) or [""]
+        pool._codes = {v: i for i, v in enumerate(pool.values)}
+        return pool
+
+
+def haversine_many_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """한 점 → 여러 점 haversine 거리(km), 벡터 연산"""
+    la1, lo1 = np.radians(lat), np.radians(lng)
+    la2, lo2 = np.radians(lats), np.radians(lngs)
+    h = np.sin((la2 - la1) / 2) ** 2 + np.cos(la1) * np.cos(la2) * np.sin((lo2 - lo1) / 2) ** 2
+    return 2 * EARTH_R_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+_COLUMNS = {
+    "lat": np.float64, "lng": np.float64,
+    "seq_no": np.int64,        # 없으면 -1
+    "title_code": np.int32,    # → titles (정규화 작품키)
+    "work_code": np.int32,     # → works (원본 TITLE_NM)
+    "media_code": np.int16,    # → media
+    "ptype_code": np.int16,    # → place_types
+    "place_code": np.int32,    # → texts
+    "addr_code": np.int32,     # → texts
+    "tel_code": np.int32,      # → texts
+}
+
+
+class SpotTable:
+    """
+    불변 컬럼형 촬영지 테이블. 행 인덱스 = 공간 인덱스 순서.
+    append()는 뒤에 행만 붙인 새 테이블을 돌려준다: 컬럼 버퍼/문자열 풀은 append-only로 공유하고
+    각 테이블은 자기 길이(n)만큼의 view만 보므로 기존 테이블은 그대로 유효하다.
+    """
+
+    def __init__(self, bufs: Dict[str, np.ndarray], n: int,
+                 titles: StringPool, works: StringPool, media: StringPool,
+                 place_types: StringPool, texts: StringPool, used: Optional[List[int]] = None,
+                 title_index: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        self._bufs, self.n = bufs, n
+        self._used = used if used is not None else [n]   # 같은 버퍼를 쓰는 테이블끼리 공유하는 사용 길이
+        for name in _COLUMNS:
+            setattr(self, name, bufs[name][:n])
+        self.titles, self.works, self.media = titles, works, media
+        self.place_types, self.texts = place_types, texts
+        # 작품키 CSR 색인: _title_rows[_title_off[c]:_title_off[c+1]] = 코드 c의 행 (오름차순)
+        self._title_rows, self._title_off = title_index or self._build_title_index()
+        self._title_rows.flags.writeable = False   # title_ids()는 이 배열의 view를 돌려줌
+
+    def _build_title_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        codes = np.asarray(self.title_code, dtype=np.intp)
+        rows = np.argsort(codes, kind="stable").astype(np.intp)
+        off = np.zeros(len(self.titles) + 1, dtype=np.intp)
+        np.cumsum(np.bincount(codes, minlength=len(self.titles)), out=off[1:])
+        return rows, off
+
+    def _extend_title_index(self, new_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """기존 색인 + 뒤에 붙은 행(코드 new_codes) 병합 — 정렬 없이 O(n + k)"""
+        n, c = self.n, len(self.titles)   # 풀은 공유라 이 테이블 이후 늘었을 수 있음
+        old_off = np.concatenate([self._title_off, np.full(c + 1 - len(self._title_off), self._title_off[-1])])
+        add = np.zeros(c + 1, dtype=np.intp)
+        np.cumsum(np.bincount(new_codes, minlength=c), out=add[1:])   # 코드 c 앞에 끼어드는 새 행 수
+        rows = np.empty(n + len(new_codes), dtype=np.intp)
+        old_code = np.repeat(np.arange(c), np.diff(old_off))
+        rows[np.arange(n) + add[old_code]] = self._title_rows
+        order = np.argsort(new_codes, kind="stable")
+        rows[old_off[new_codes[order] + 1] + np.arange(len(order))] = n + order
+        return rows, old_off + add
+
+    def __len__(self) -> int:
+        return self.n
+
+    # ---------- 빌드 ----------
+    def _encode(self, records: Iterable[Tuple[str, str, Dict[str, Any], float, float]]) -> Dict[str, list]:
+        cols: Dict[str, list] = {k: [] for k in _COLUMNS}
+        for norm_key, raw_title, row, lat, lng in records:
+            row = row or {}
+            try:
+                seq = int(str(row.get("SEQ_NO") or "").strip())
+            except ValueError:
+                seq = -1
+            cols["lat"].append(lat); cols["lng"].append(lng); cols["seq_no"].append(seq)
+            cols["title_code"].append(self.titles.intern(norm_key))
+            cols["work_code"].append(self.works.intern(raw_title))
+            cols["media_code"].append(self.media.intern((row.get("MEDIA_TY") or "").lower()))
+            cols["ptype_code"].append(self.place_types.intern(row.get("PLACE_TY")))
+            cols["place_code"].append(self.texts.intern(row.get("PLACE_NM") or row.get("place")))
+            cols["addr_code"].append(self.texts.intern(row.get("ADDR")))
+            cols["tel_code"].append(self.texts.intern(row.get("TEL_NO")))
+        return cols
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, str, Dict[str, Any], float, float]]) -> "SpotTable":
+        empty = cls({k: np.empty(0, dtype=t) for k, t in _COLUMNS.items()}, 0,
+                    StringPool(), StringPool(), StringPool(), StringPool(), StringPool())
+        cols = empty._encode(records)
+        bufs = {k: np.asarray(cols[k], dtype=t) for k, t in _COLUMNS.items()}
+        return cls(bufs, len(cols["lat"]), empty.titles, empty.works, empty.media,
+                   empty.place_types, empty.texts)
+
+    def append(self, records: Iterable[Tuple[str, str, Dict[str, Any], float, float]]) -> "SpotTable":
+        """행 추가본 반환 (비용 = 추가 행 수에 비례, 용량 초과 시에만 2배 재할당)"""
+        cols = self._encode(records)
+        k = len(cols["lat"])
+        if not k:
+            return self
+        n, bufs, used = self.n, self._bufs, self._used
+        if used[0] != n or n + k > len(bufs["lat"]):
+            # 버퍼 뒤쪽을 이미 다른 테이블이 썼거나 용량 부족 → 새 버퍼(2배)로
+            cap = max(2 * n, n + k, 64)
+            nb = {}
+            for name, t in _COLUMNS.items():
+                arr = np.empty(cap, dtype=t)
+                arr[:n] = bufs[name][:n]
+                nb[name] = arr
+            bufs, used = nb, [n]
+        for name, t in _COLUMNS.items():
+            bufs[name][n:n + k] = np.asarray(cols[name], dtype=t)
+        used[0] = n + k
+        index = self._extend_title_index(np.asarray(cols["title_code"], dtype=np.intp))
+        return SpotTable(bufs, n + k, self.titles, self.works, self.media, self.place_types, self.texts, used,
+                         title_index=index)
+
+    # ---------- 직렬화 (바이너리 스냅샷) ----------
+    COLUMNS = tuple(_COLUMNS)
+    _POOLS = ("titles", "works", "media", "place_types", "texts")
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in _COLUMNS}
+
+    def pools(self) -> Dict[str, List[str]]:
+        return {name: getattr(self, name).values for name in self._POOLS}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], pools: Dict[str, List[str]]) -> "SpotTable":
+        """arrays는 np.load(mmap_mode="r") 결과 그대로 사용 가능 (append 시 새 버퍼로 복사됨)"""
+        n = len(arrays["lat"])
+        if any(len(arrays[name]) != n for name in _COLUMNS):
+            raise ValueError("column length mismatch")
+        return cls({name: arrays[name] for name in _COLUMNS}, n,
+                   *(StringPool.from_values(pools[name]) for name in cls._POOLS))
+
+    # ---------- 벡터 필터 ----------
+    def _title_rows_of(self, code: int) -> np.ndarray:
+        if code < 0 or code + 1 >= len(self._title_off):
+            return np.empty(0, dtype=np.intp)
+        return self._title_rows[self._title_off[code]:self._title_off[code + 1]]
+
+    def title_ids(self, norm_key: str) -> np.ndarray:
+        """작품키 → 행 인덱스 (CSR 색인 조회, O(k))"""
+        return self._title_rows_of(self.titles.lookup(norm_key))
+
+    def title_ids_many(self, norm_keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """작품키 여러 개 → 키별 행 인덱스 (없는 키는 제외)"""
+        out: Dict[str, np.ndarray] = {}
+        for k in norm_keys:
+            c = self.titles.lookup(k)
+            if c >= 0:
+                out[k] = self._title_rows_of(c)
+        return out
+
+    def media_ids(self, media_type: str) -> np.ndarray:
+        code = self.media.lookup((media_type or "").lower())
+        if code < 0:
+            return np.empty(0, dtype=np.intp)
+        return np.flatnonzero(self.media_code == code)
+
+    def media_mask(self, ids: np.ndarray, media_type: str) -> np.ndarray:
+        code = self.media.lookup((media_type or "").lower())
+        return self.media_code[ids] == code
+
+    def distances_km(self, lat: float, lng: float, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        if ids is None:
+            return haversine_many_km(lat, lng, self.lat, self.lng)
+        return haversine_many_km(lat, lng, self.lat[ids], self.lng[ids])
+
+    def within(self, lat: float, lng: float, radius_km: float,
+               ids: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(선택 ids 중) 반경 내 행 — 가까운 순 (ids, dist_km)"""
+        if ids is None:
+            ids = np.arange(len(self))
+        d = self.distances_km(lat, lng, ids)
+        keep = d <= radius_km
+        ids, d = ids[keep], d[keep]
+        order = np.argsort(d, kind="stable")
+        return ids[order], d[order]
+
+    # ---------- 행 뷰 ----------
+    def spot(self, i: int) -> Dict[str, Any]:
+        i = int(i)
+        seq = int(self.seq_no[i])
+        return {
+            "seq_no":     seq if seq >= 0 else None,
+            "place_name": self.texts[self.place_code[i]],
+            "address":    self.texts[self.addr_code[i]],
+            "lat": float(self.lat[i]), "lng": float(self.lng[i]),
+            "media_type": self.media[self.media_code[i]] or None,
+            "place_type": self.place_types[self.ptype_code[i]] or None,
+            "tel":        self.texts[self.tel_code[i]] or None,
+            "work_title": self.works[self.work_code[i]],
+            "title_key":  self.titles[self.title_code[i]],
+        }
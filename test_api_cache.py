@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""api_cache.ApiCache — get/put, 보존 기간 compact, 예전 CSV 캐시 1회 이전"""
+import csv
+import time
+
+import pytest
+
+from api_cache import ApiCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def test_get_put_by_namespace(tmp_path, clock):
+    cache = ApiCache(str(tmp_path / "a.sqlite3"))
+    assert cache.get("yt", "오징어 게임") is None
+    cache.put("yt", "오징어 게임", [{"videoId": "a"}])
+    cache.put("tour", "오징어 게임", [])
+    cache.put("yt", "오징어 게임", [{"videoId": "b"}], updated_at=clock[0] - 60)   # 같은 키 → 교체
+    assert cache.get("yt", "오징어 게임") == {"items": [{"videoId": "b"}], "updated_at": "2023-11-14T22:12:20Z"}
+    assert cache.get("tour", "오징어 게임")["items"] == []
+    assert cache.count("yt") == 1 and cache.count("tour") == 1
+
+
+def test_compact_uses_per_namespace_retention(tmp_path, clock):
+    cache = ApiCache(str(tmp_path / "a.sqlite3"), compact_every=0)
+    cache.retain("yt", 100)
+    for i, age in enumerate((0, 99, 101, 500)):
+        cache.put("yt", f"q{i}", [], updated_at=clock[0] - age)
+        cache.put("tour", f"q{i}", [], updated_at=clock[0] - age)   # retain 없음 → 지우지 않음
+    assert cache.compact() == 2
+    assert cache.count("yt") == 2 and cache.get("yt", "q2") is None
+    assert cache.count("tour") == 4
+
+
+def test_put_triggers_compact_every_n(tmp_path, clock):
+    cache = ApiCache(str(tmp_path / "a.sqlite3"), compact_every=3)
+    cache.retain("yt", 100)
+    cache.put("yt", "old", [], updated_at=clock[0] - 200)
+    cache.put("yt", "a", [])
+    assert cache.count("yt") == 2
+    cache.put("yt", "b", [])
+    assert cache.count("yt") == 2 and cache.get("yt", "old") is None
+
+
+def test_migrate_csv_once(tmp_path, clock):
+    path = tmp_path / "youtube_search_cache.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["q", "updated_at", "items_json"])
+        w.writerow(["오징어 게임", "2023-11-01T00:00:00Z", '[{"videoId": "csv"}]'])
+        w.writerow(["더 글로리", "2023-11-02T00:00:00Z", '[{"videoId": "csv"}]'])
+        w.writerow(["깨진 행", "not-a-date", "[]"])
+    cache = ApiCache(str(tmp_path / "a.sqlite3"))
+    cache.put("yt", "더 글로리", [{"videoId": "sqlite"}])        # 이미 있는 키는 유지
+    assert cache.migrate_csv("yt", str(path), key_col="q") == 2
+    assert cache.get("yt", "오징어 게임") == {"items": [{"videoId": "csv"}], "updated_at": "2023-11-01T00:00:00Z"}
+    assert cache.get("yt", "더 글로리")["items"] == [{"videoId": "sqlite"}]
+    assert cache.migrate_csv("yt", str(path), key_col="q") == 0   # 같은 파일은 1번만
+    assert cache.migrate_csv("yt", str(tmp_path / "none.csv"), key_col="q") == 0
+    assert cache.count("yt") == 2
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""course_builder.optimize_route — 작은 n 전수 탐색 대비 품질, 하한, max_ms 예산"""
+import itertools
+import time
+
+import numpy as np
+import pytest
+
+from course_builder import MST_BOUND_MAX_N, mst_weight, optimize_route, pairwise_km, path_length
+
+
+def _points(rng, n, span=0.2):
+    return pairwise_km(37 + rng.random(n) * span, 127 + rng.random(n) * span)
+
+
+def _brute_force(D):
+    return min(path_length(list(p), D) for p in itertools.permutations(range(len(D))))
+
+
+def test_small_n_close_to_brute_force():
+    rng = np.random.default_rng(3)
+    for _ in range(150):
+        n = int(rng.integers(2, 8))
+        D = _points(rng, n)
+        best = _brute_force(D)
+        path, q = optimize_route(D)
+        assert sorted(path) == list(range(n))
+        length = path_length(path, D)
+        assert q["length_km"] == pytest.approx(length, abs=1e-3)
+        assert best - 1e-9 <= length <= best * 1.10
+        assert q["converged"] and q["lower_bound_km"] <= best + 1e-3
+        assert q["length_km"] <= q["initial_km"] + 1e-9
+
+
+def test_mst_is_lower_bound():
+    rng = np.random.default_rng(5)
+    for n in (2, 5, 7):
+        D = _points(rng, n)
+        assert mst_weight(D) <= _brute_force(D) + 1e-9
+
+
+@pytest.mark.parametrize("n", [300, 1200])
+def test_budget_is_honoured(n):
+    D = _points(np.random.default_rng(n), n, span=1.0)
+    t0 = time.perf_counter()
+    path, q = optimize_route(D, max_ms=30, t0=t0)
+    elapsed = (time.perf_counter() - t0) * 1000
+    assert sorted(path) == list(range(n))
+    assert elapsed < 30 + 60   # 한 번의 개선 단계/마무리 정도만 넘을 수 있음
+    if n > MST_BOUND_MAX_N:
+        assert q["lower_bound_km"] is None and q["gap_pct"] is None
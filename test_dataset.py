@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""dataset — 뒤에 추가된 행만 반영(apply_appends)과 DatasetStore 재로딩"""
+import os
+
+import numpy as np
+
+import dataset
+from dataset import DatasetStore, apply_appends, load_artifact, load_dataset, save_artifact
+
+HEADER = "SEQ_NO,MEDIA_TY,TITLE_NM,PLACE_NM,ADDR,LC_LA,LC_LO\n"
+
+
+def _row(seq, title, place, lat=37.5, lng=127.0):
+    return f"{seq},drama,{title},{place},서울특별시 중구 {place}로 {seq},{lat + seq * 0.001:.6f},{lng + seq * 0.001:.6f}\n"
+
+
+def _write(path, rows, mode="w"):
+    with open(path, mode, encoding="utf-8", newline="") as f:
+        f.write(("" if mode == "a" else HEADER) + "".join(rows))
+
+
+def _base(tmp_path):
+    path = tmp_path / "spots.csv"
+    _write(path, [_row(i, "오징어 게임" if i % 2 else "더 글로리", f"장소{i}") for i in range(1, 11)])
+    return str(path)
+
+
+def _same_table(a, b):
+    assert len(a) == len(b)
+    for key in b.titles.values:
+        assert np.array_equal(a.title_ids(key), b.title_ids(key)), key
+    np.testing.assert_allclose(a.lat, b.lat)
+    np.testing.assert_allclose(a.lng, b.lng)
+
+
+def test_appended_rows_match_full_reload(tmp_path):
+    path = _base(tmp_path)
+    snap = load_dataset(path)
+    _write(path, [_row(11, "미스터 션샤인", "장소11"), _row(12, "오징어 게임", "장소12")], mode="a")
+    new = apply_appends(snap)
+    assert new is not None and new is not snap
+    assert len(new) == len(snap) + 2
+    assert new.changed_titles == {"미스터션샤인", "오징어게임"}
+    assert new.last_seq == 12
+    assert new.title_rev["미스터션샤인"] == new.version and new.title_rev["더글로리"] == snap.version
+    _same_table(new.table, load_dataset(path).table)
+    assert new.ngrams.close_matches("미스터션샤인", cutoff=0.8) == ["미스터션샤인"]
+
+
+def test_half_written_line_is_deferred(tmp_path):
+    path = _base(tmp_path)
+    snap = load_dataset(path)
+    line = _row(11, "미스터 션샤인", "장소11")
+    _write(path, [line[:15]], mode="a")
+    assert apply_appends(snap) is snap          # 아직 쓰는 중 → 그대로
+    _write(path, [line[15:]], mode="a")
+    new = apply_appends(snap)
+    assert len(new) == len(snap) + 1
+    assert new.size == len(open(path, "rb").read())
+
+
+def test_rewritten_or_truncated_file_needs_full_reload(tmp_path):
+    path = _base(tmp_path)
+    snap = load_dataset(path)
+    _write(path, [_row(i, "다른 작품", f"곳{i}") for i in range(1, 4)])   # 더 짧게 다시 씀
+    assert apply_appends(snap) is None
+    _write(path, [_row(i, "다른 작품", f"곳{i}") for i in range(1, 30)])  # 길지만 앞부분이 다름
+    assert apply_appends(snap) is None
+
+
+def test_rows_at_or_below_last_seq_are_skipped(tmp_path):
+    path = _base(tmp_path)
+    snap = load_dataset(path)
+    _write(path, [_row(5, "오징어 게임", "중복"), _row(10, "더 글로리", "중복"), _row(11, "더 글로리", "새 장소")],
+           mode="a")
+    new = apply_appends(snap)
+    assert len(new) == len(snap) + 1
+    assert new.spot(len(new) - 1)["place_name"] == "새 장소"
+    assert new.changed_titles == {"더글로리"}
+
+
+def test_store_defers_partial_line_and_retries_failed_load(tmp_path, monkeypatch):
+    path = _base(tmp_path)
+    store = DatasetStore(path)
+    first = store.get()
+    line = _row(11, "미스터 션샤인", "장소11")
+    _write(path, [line[:10]], mode="a")
+    assert store.reload() is first               # 전체 재파싱으로 넘어가지 않음
+    _write(path, [line[10:]], mode="a")
+    second = store.reload()
+    assert len(second) == len(first) + 1 and second.changed_titles == {"미스터션샤인"}
+
+    # 로딩 실패 후 같은 파일(그대로)은 다음 reload에서 다시 시도
+    _write(path, [_row(i, "더 글로리", f"곳{i}") for i in range(1, 4)])
+
+    def broken(*args, **kwargs):
+        raise ValueError("boom")
+
+    with monkeypatch.context() as m:
+        m.setattr(dataset, "load_dataset", broken)
+        assert store.reload() is second
+    third = store.reload()
+    assert len(third) == 3
+    st = os.stat(path)
+    assert store._loaded_id == (st.st_mtime, st.st_size)
+    assert store.reload() is third
+
+
+# ---------- 바이너리 스냅샷 (artifact) ----------
+def test_artifact_round_trip_and_appends(tmp_path):
+    path, art = _base(tmp_path), str(tmp_path / "art")
+    snap = load_dataset(path)
+    out = save_artifact(snap, art)
+    assert out and os.path.basename(out) == open(os.path.join(art, "CURRENT")).read()
+
+    loaded = load_artifact(art, path)
+    _same_table(loaded.table, snap.table)
+    assert loaded.schema == snap.schema and loaded.last_seq == snap.last_seq
+    assert loaded.suggest.suggest("오징", limit=5) == snap.suggest.suggest("오징", limit=5)
+
+    # 저장 뒤 CSV에 행이 추가됐으면 artifact + 추가분
+    _write(path, [_row(11, "미스터 션샤인", "장소11")], mode="a")
+    grown = load_artifact(art, path)
+    _same_table(grown.table, load_dataset(path).table)
+
+    # 앞부분이 바뀌었으면 쓰지 않음
+    _write(path, [_row(i, "다른 작품", f"곳{i}") for i in range(1, 30)])
+    assert load_artifact(art, path) is None
+
+
+def test_prune_keeps_previous_and_in_progress_builds(tmp_path):
+    path, art = _base(tmp_path), str(tmp_path / "art")
+    os.makedirs(os.path.join(art, "20000101T000000-0000aaaa.tmp"))   # 다른 프로세스가 쓰는 중
+    os.makedirs(os.path.join(art, "19990101T000000-0000bbbb"))       # manifest 없음 (미완성)
+    builds = []
+    for i in range(11, 14):   # 내용이 달라야 빌드 이름(sha)이 다름
+        _write(path, [_row(i, "미스터 션샤인", f"장소{i}")], mode="a")
+        builds.append(os.path.basename(save_artifact(load_dataset(path), art)))
+    later = os.path.join(art, "29990101T000000-0000cccc")             # CURRENT 교체 전의 동시 빌드
+    os.makedirs(later)
+    open(os.path.join(later, "manifest.json"), "w").write("{}")
+    _write(path, [_row(14, "미스터 션샤인", "장소14")], mode="a")
+    builds.append(os.path.basename(save_artifact(load_dataset(path), art)))
+
+    left = set(os.listdir(art))
+    assert builds[-1] in left and builds[-2] in left               # 현재 + 직전 CURRENT
+    assert builds[0] not in left and builds[1] not in left         # 직전보다 오래된 완성 빌드만 정리
+    assert {"20000101T000000-0000aaaa.tmp", "19990101T000000-0000bbbb", os.path.basename(later)} <= left
+    assert len(load_artifact(art, path)) == len(load_dataset(path))
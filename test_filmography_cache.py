@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""filmography_cache.FilmographyCache — TTL 안 재조회 없음, 만료 후 재조회, 실패 시 이전 결과 사용"""
+import json
+import time
+
+import pytest
+
+from actor_mode_crawler_and_aggregator import WorkEntry
+from filmography_cache import FilmographyCache
+
+WORKS = [WorkEntry(kind="tv", title="오징어 게임", year=2021, role="성기훈"),
+         WorkEntry(kind="film", title="기생충", year=2019, raw={"x": 1})]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+class Fetch:
+    def __init__(self, result):
+        self.result, self.calls = result, 0
+
+    def __call__(self, name):
+        self.calls += 1
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def test_hit_within_ttl_and_refetch_after(tmp_path, clock):
+    cache = FilmographyCache(str(tmp_path / "f.sqlite3"), ttl_sec=100)
+    fetch = Fetch(WORKS)
+    first = cache.get(" 이정재 ", fetch)
+    clock[0] += 99
+    cached = cache.get("이정재", fetch)
+    assert [(w.title, w.year, w.role) for w in cached] == [(w.title, w.year, w.role) for w in first]
+    assert cached[1].raw is None   # raw(디버그용)는 저장하지 않음
+    assert fetch.calls == 1 and cache.stats["hit"] == 1
+    clock[0] += 2
+    cache.get("이정재", fetch)
+    assert fetch.calls == 2 and cache.stats["miss"] == 2
+
+
+def test_stale_served_when_refetch_fails(tmp_path, clock):
+    path = str(tmp_path / "f.sqlite3")
+    cache = FilmographyCache(path, ttl_sec=100)
+    cache.get("이정재", Fetch(WORKS))
+    clock[0] += 101
+    for result in (RuntimeError("down"), []):   # 조회 실패/빈 결과 모두 덮어쓰지 않음
+        out = cache.get("이정재", Fetch(result))
+        assert [w.title for w in out] == ["오징어 게임", "기생충"]
+        clock[0] += 10 ** 6
+    assert cache.stats["stale_served"] == 2 and cache.stats["fetch_fail"] == 1
+    # 다른 프로세스(새 인스턴스)에서도 본문이 남아 있음
+    assert len(FilmographyCache(path, ttl_sec=100).get("이정재", Fetch(RuntimeError("down")))) == 2
+
+
+def test_invalidate(tmp_path, clock):
+    cache = FilmographyCache(str(tmp_path / "f.sqlite3"))
+    fetch = Fetch(WORKS)
+    cache.get("이정재", fetch)
+    cache.invalidate("이정재")
+    cache.get("이정재", fetch)
+    assert fetch.calls == 2
+
+
+# ---------- negative cache ----------
+def test_negative_backoff(tmp_path, clock):
+    cache = FilmographyCache(str(tmp_path / "f.sqlite3"), neg_ttl_sec=10, neg_max_sec=35)
+    fetch = Fetch([])
+    for wait in (10, 20, 35, 35):
+        assert cache.get("없는 배우", fetch) == []
+        calls = fetch.calls
+        clock[0] += wait - 1
+        assert cache.get("없는 배우", fetch) == []      # 대기 중 → 조회 안 함
+        assert fetch.calls == calls
+        clock[0] += 1
+    assert cache.stats["neg_hit"] == 4 and fetch.calls == 4
+    row = cache._row("없는 배우")
+    assert row[0] == 0 and row[3] == 4
+
+    fetch.result = WORKS                              # 성공하면 실패 수 초기화
+    assert len(cache.get("없는 배우", fetch)) == 2
+    assert cache._row("없는 배우")[3] == 0
+
+
+def test_failed_refetch_backs_off_but_keeps_works(tmp_path, clock):
+    cache = FilmographyCache(str(tmp_path / "f.sqlite3"), ttl_sec=100, neg_ttl_sec=10)
+    cache.get("이정재", Fetch(WORKS))
+    clock[0] += 101
+    down = Fetch(RuntimeError("down"))
+    assert len(cache.get("이정재", down)) == 2
+    clock[0] += 9
+    assert len(cache.get("이정재", down)) == 2 and down.calls == 1   # 재시도 대기 중엔 성공 결과로 응답
+    ok, works, _, failures = cache._row("이정재")
+    assert ok == 1 and failures == 1 and len(json.loads(works)) == 2
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""meta_store.MetaStore — fetched_at 신선도, get_many, JSON 캐시 1회 이전"""
+import json
+import os
+import time
+
+import pytest
+
+from meta_store import MetaStore, meta_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def test_freshness_uses_fetched_at(tmp_path, clock):
+    store = MetaStore(str(tmp_path / "m.sqlite3"), ttl_sec=100)
+    store.put("오징어 게임", "drama", {"summary": "a"})
+    store.put("기생충", "film", {"summary": "b"}, fetched_at=clock[0] - 101)
+    assert store.get("오징어게임", "DRAMA") == {"summary": "a"}   # 제목 정규화 + kind 소문자
+    assert store.get("오징어 게임", "film") is None
+    assert store.get("기생충", "film") is None and store.entry("기생충", "film")[0] == {"summary": "b"}
+    clock[0] += 101
+    assert store.get("오징어 게임", "drama") is None
+    assert len(store) == 2
+
+
+def test_get_many_returns_fresh_only(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr("meta_store._IN_CHUNK", 3)   # 여러 IN 질의로 나뉘는 경로
+    store = MetaStore(str(tmp_path / "m.sqlite3"), ttl_sec=100)
+    titles = ["오징어 게임", "더 글로리", "미스터 션샤인", "도깨비", "시그널", "비밀의 숲", "나의 아저씨"]
+    for i, t in enumerate(titles):
+        store.put(t, "drama", {"i": i}, fetched_at=clock[0] - (200 if i == 5 else 0))
+    items = [(t, "drama") for t in titles] + [("킹덤", "drama"), ("더글로리", "drama")]
+    got = store.get_many(items)
+    want = {(t, "drama"): {"i": i} for i, t in enumerate(titles) if i != 5}
+    assert got == {**want, ("더글로리", "drama"): {"i": 1}}   # 같은 키의 다른 표기도 채움
+    assert store.get_many([]) == {}
+
+
+def test_migrate_json_dir_once(tmp_path, clock):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    old = cache_dir / f"meta_{meta_key('오징어 게임', 'drama')}.json"
+    old.write_text(json.dumps({"title": "오징어 게임", "summary": "old"}, ensure_ascii=False), encoding="utf-8")
+    os.utime(old, (clock[0] - 50, clock[0] - 50))
+    kept = cache_dir / f"meta_{meta_key('기생충', 'film')}.json"
+    kept.write_text(json.dumps({"title": "기생충", "summary": "json"}, ensure_ascii=False), encoding="utf-8")
+    (cache_dir / "meta_broken.json").write_text("{", encoding="utf-8")
+
+    store = MetaStore(str(tmp_path / "m.sqlite3"), ttl_sec=100)
+    store.put("기생충", "film", {"summary": "sqlite"})        # 이미 있는 키는 덮지 않음
+    assert store.migrate_json_dir(str(cache_dir)) == 2
+    assert store.entry("오징어 게임", "drama") == ({"title": "오징어 게임", "summary": "old"}, clock[0] - 50)
+    assert store.get("기생충", "film") == {"summary": "sqlite"}
+    assert old.exists()                                        # 원본은 그대로
+    assert store.migrate_json_dir(str(cache_dir)) == 0         # 2번째부터는 건너뜀
+
+
+# ---------- negative cache ----------
+def test_failure_backoff_doubles_up_to_cap(tmp_path, clock):
+    store = MetaStore(str(tmp_path / "m.sqlite3"), neg_ttl_sec=10, neg_max_sec=35)
+    waits = []
+    for _ in range(4):
+        waits.append(store.fail("킹덤", "drama", "fetch_error") - clock[0])
+    assert waits == [10, 20, 35, 35]
+    f = store.failure("킹덤", "drama")
+    assert f == {"reason": "fetch_error", "failures": 4, "retry_at": clock[0] + 35}
+    clock[0] += 35
+    assert store.failure("킹덤", "drama") is None     # 대기 끝 → 재시도 허용
+    assert store.fail("킹덤", "drama", "empty") - clock[0] == 35   # 연속 실패 수는 유지
+
+    store.put("킹덤", "drama", {"summary": "ok"})     # 성공하면 실패 기록 삭제
+    store.fail("킹덤", "drama", "blocked")
+    assert store.failure("킹덤", "drama")["failures"] == 1
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""singleflight.SingleFlight.do_async — 리더 요청이 취소돼도 합쳐진 호출자는 결과를 받는지"""
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_leader_cancel_does_not_fail_followers():
+    async def main():
+        sf = SingleFlight("t")
+        started, release = asyncio.Event(), asyncio.Event()
+        runs = 0
+
+        async def fetch():
+            nonlocal runs
+            runs += 1
+            started.set()
+            await release.wait()
+            return "value"
+
+        leader = asyncio.ensure_future(sf.do_async("k", fetch))
+        await started.wait()
+        followers = [asyncio.ensure_future(sf.do_async("k", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*followers)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        await asyncio.sleep(0)   # done 콜백
+        return results, runs, sf.metrics()
+
+    results, runs, m = asyncio.run(main())
+    assert results == ["value"] * 3
+    assert runs == 1
+    assert m["executions"] == 1 and m["coalesced"] == 3
+    assert m["errors"] == 0 and m["inflight"] == 0
+
+
+def test_error_shared_and_counted_once():
+    async def main():
+        sf = SingleFlight("t")
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream")
+
+        res = await asyncio.gather(*(sf.do_async("k", boom) for _ in range(4)), return_exceptions=True)
+        await asyncio.sleep(0)
+        return res, sf.metrics()
+
+    res, m = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in res)
+    assert m["executions"] == 1 and m["errors"] == 1 and m["inflight"] == 0
+
+
+def test_do_many_coalesces_overlapping_keys():
+    import threading
+    import time
+
+    sf = SingleFlight("t")
+    batches = []
+    first_started = threading.Event()
+
+    def run(keys):
+        batches.append(sorted(keys))
+        first_started.set()
+        time.sleep(0.1)
+        return {k: k.upper() for k in keys}
+
+    out = {}
+    t1 = threading.Thread(target=lambda: out.__setitem__(1, sf.do_many(["a", "b", "c"], run)))
+    t1.start()
+    first_started.wait()
+    out[2] = sf.do_many(["b", "c", "d", "d"], run)
+    t1.join()
+    assert out[1] == {"a": "A", "b": "B", "c": "C"}
+    assert out[2] == {"b": "B", "c": "C", "d": "D"}
+    assert batches == [["a", "b", "c"], ["d"]]
+    m = sf.metrics()
+    assert m["executions"] == 4 and m["coalesced"] == 2 and m["inflight"] == 0
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""title_index — n-gram 후보 매칭이 difflib.get_close_matches와 같은 결과인지 (실제 작품키 전체 대상)"""
+import difflib
+import os
+import random
+
+import pytest
+
+from dataset import load_dataset
+from title_index import TitleNgramIndex, TitleSuggestTrie
+
+CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "drama_list.csv")
+
+
+@pytest.fixture(scope="module")
+def keys():
+    if not os.path.exists(CSV):
+        pytest.skip("drama_list.csv 없음")
+    return [k for k in load_dataset(CSV).table.titles.values if k]
+
+
+def _queries(keys, k=250, seed=0):
+    rnd = random.Random(seed)
+    out = []
+    for key in rnd.sample(keys, min(k, len(keys))):
+        i = rnd.randrange(len(key))
+        out += [key, key[:i] + key[i + 1:], key + "시즌", key + "드라마", key[:i] + "의" + key[i:]]
+    return out
+
+
+@pytest.mark.parametrize("cutoff", [0.8, 0.6])
+def test_close_matches_equals_difflib(keys, cutoff):
+    ng = TitleNgramIndex(keys)
+    for q in _queries(keys, k=250 if cutoff > 0.7 else 60):
+        assert ng.close_matches(q, n=3, cutoff=cutoff) == difflib.get_close_matches(q, keys, n=3, cutoff=cutoff), q
+
+
+def test_with_keys_matches_fresh_index(keys):
+    base, extra = keys[: len(keys) // 2], keys[len(keys) // 2:]
+    grown = TitleNgramIndex(base).with_keys(extra)
+    fresh = TitleNgramIndex(keys)
+    for q in _queries(keys, k=80, seed=1):
+        assert grown.close_matches(q, cutoff=0.8) == fresh.close_matches(q, cutoff=0.8)
+
+
+# ---------- 자동완성 트라이 ----------
+def _trie_items(rnd, n, prefix):
+    syll = "가나다라마바사아자차카타파하오징어게임더글로리"
+    out = {}
+    while len(out) < n:
+        title = "".join(rnd.choice(syll) for _ in range(rnd.randint(2, 6))) + " " + prefix + str(len(out))
+        out[title.replace(" ", "")] = (title, rnd.randint(1, 40))
+    return [(k, t, s) for k, (t, s) in out.items()]
+
+
+def _all_prefixes(trie):
+    seen = set()
+    for title, key in trie.entries:
+        for form in trie._forms(key, title):
+            for i in range(1, len(form) + 1):
+                seen.add(form[:i])
+    return sorted(seen)
+
+
+def test_suggest_updated_equals_rebuild():
+    rnd = random.Random(7)
+    base = _trie_items(rnd, 120, "a")
+    new = _trie_items(rnd, 15, "b")
+    bumps = [(k, t, rnd.randint(1, 30)) for k, t, _ in rnd.sample(base, 25)]   # 기존 작품에 촬영지 추가
+
+    old = TitleSuggestTrie.build(base, k=5)
+    before = {p: old.suggest(p) for p in _all_prefixes(old)}
+    grown = old.updated(new + bumps)
+
+    score = {k: s for k, _, s in base + new}
+    for k, _, add in bumps:
+        score[k] += add
+    titles = {k: t for k, t, _ in base + new}
+    fresh = TitleSuggestTrie.build([(k, titles[k], s) for k, s in score.items()], k=5)
+    for p in _all_prefixes(fresh):
+        assert grown.suggest(p) == fresh.suggest(p), p
+    assert {p: old.suggest(p) for p in before} == before   # 기존 트라이는 그대로
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""tour_geo_cache.TourGeoCache — 덮는 원 재사용, 잘린 응답의 경계 제외, TTL, 포함된 원 정리"""
+import math
+import time
+
+import pytest
+
+from tour_geo_cache import EARTH_R_KM, TourGeoCache
+
+LAT, LNG = 37.5, 127.0
+KM_PER_DEG = EARTH_R_KM * math.pi / 180
+
+
+def _at(km, title, bearing_deg=0.0):
+    """(LAT, LNG)에서 km 떨어진 항목 (북쪽/동쪽 성분)"""
+    b = math.radians(bearing_deg)
+    dlat = km * math.cos(b) / KM_PER_DEG
+    dlng = km * math.sin(b) / (KM_PER_DEG * math.cos(math.radians(LAT)))
+    return {"title": title, "lat": LAT + dlat, "lng": LNG + dlng}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def geo(tmp_path, clock):
+    return TourGeoCache(str(tmp_path / "g.sqlite3"), ttl_sec=100)
+
+
+def test_covered_request_is_filtered_and_sorted(geo):
+    items = [_at(2.5, "c"), _at(0.5, "a", 90), _at(0.8, "b", 180), _at(4.0, "far")]
+    assert geo.store(LAT, LNG, 5.0, 12, items, num=100) == 5.0     # 다 받음 → 요청 반경 전체
+    # 중심을 북쪽으로 1km 옮긴 반경 2km 원: dist(1) + 2 <= 5 → 덮임
+    c = _at(1.0, "center")
+    out = geo.lookup(c["lat"], c["lng"], 2.0, 12)
+    assert [(it["title"], it["dist_km"]) for it in out] == [("a", 1.12), ("c", 1.5), ("b", 1.8)]   # 새 중심 기준
+    assert geo.lookup(c["lat"], c["lng"], 4.5, 12) is None          # 1 + 4.5 > 5
+    assert geo.lookup(LAT, LNG, 1.0, 32) is None                    # 다른 유형
+    assert geo.stats == {"covered": 1, "uncovered": 2, "stored": 1}
+
+
+def test_truncated_response_excludes_boundary_ring(geo):
+    items = [_at(0.5, "a"), _at(1.0, "b"), _at(3.0, "t1", 90), _at(3.0, "t2", 270)]
+    cover = geo.store(LAT, LNG, 10.0, 12, items, num=4)             # numOfRows만큼 옴 → 잘렸을 수 있음
+    assert cover == pytest.approx(1.0, abs=1e-6)                     # 3km 동률 고리는 불완전
+    assert geo.lookup(LAT, LNG, 1.0, 12) is not None
+    assert geo.lookup(LAT, LNG, 2.0, 12) is None
+    assert geo.store(LAT, LNG, 10.0, 39, [_at(3.0, "x"), _at(3.0, "y", 90)], num=2) == 0.0   # 전부 동률
+
+
+def test_ttl_expiry(geo, clock):
+    geo.store(LAT, LNG, 5.0, 12, [_at(1.0, "a")], num=100)
+    clock[0] += 100
+    assert geo.lookup(LAT, LNG, 1.0, 12) is not None
+    clock[0] += 1
+    assert geo.lookup(LAT, LNG, 1.0, 12) is None
+    assert geo.compact(keep_sec=50) == 1
+
+
+def test_store_replaces_contained_circles(geo, clock):
+    geo.store(LAT, LNG, 1.0, 12, [_at(0.5, "small")], num=100)
+    geo.store(LAT, LNG, 1.0, 32, [_at(0.5, "other type")], num=100)
+    off = _at(8.0, "off")
+    geo.store(off["lat"], off["lng"], 5.0, 12, [], num=100)           # 겹치지만 포함되지 않음
+    clock[0] += 1
+    geo.store(LAT, LNG, 5.0, 12, [_at(0.5, "big")], num=100)
+    rows = geo._db.execute("SELECT type_id, radius_km FROM tour_cover ORDER BY type_id, radius_km").fetchall()
+    assert rows == [(12, 5.0), (12, 5.0), (32, 1.0)]
+    assert [it["title"] for it in geo.lookup(LAT, LNG, 1.0, 12)] == ["big"]
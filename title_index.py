@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+title_index.py
+--------------
+정규화 작품키용 문자 n-gram(기본 3-gram) 역색인
+
+- 퍼지 후보 검색 시 질의와 n-gram을 공유하는 키만 본다 (전체 키 SequenceMatcher 스캔 없음)
+- close_matches(): difflib.get_close_matches 와 결과가 같다 — cutoff > (n-1)/n(3-gram: 2/3)이면
+  gram 공유 키만 평가해도 빠지는 키가 없고(아래 설명), 그 이하 cutoff는 전체 키를 평가
+- with_keys(): 키를 추가한 새 인덱스 (기존 인덱스는 그대로)
+- guarded_match(): 퍼지 후보 + 토큰 Jaccard/짧은 토큰 가드 (배우 모드 작품 매칭 공용 규칙)
+
+TitleSuggestTrie — 작품명 자동완성
+- 정규화 키 / 원제목 / 초성(ㅇㅈㅇㄱㅇ) 세 형태를 한 트라이에 넣음
+- 노드마다 상위 k개(촬영지 수 순)를 미리 계산 → 조회는 접두어 길이만큼만 걷는다
+- updated(): 바뀐 작품 경로의 노드만 복사(path copying)한 새 트라이
+
+Usage
+-----
+  ng = TitleNgramIndex(index.keys())
+  ng.close_matches("오징어게임", n=3, cutoff=0.8)
+  guarded_match(ng, "오징어 게임 2", "오징어게임2")     # 가드 통과한 키 | None
+
+  trie = TitleSuggestTrie.build([("오징어게임", "오징어 게임", 84), ...])
+  trie.suggest("ㅇㅈㅇ", limit=5)
+"""
+from __future__ import annotations
+
+import re
+import difflib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class TitleNgramIndex:
+    """키 → 정수 id, n-gram → id 목록(postings)"""
+
+    def __init__(self, keys: Iterable[str] = (), n: int = 3):
+        self.n = n
+        self.keys: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._post: Dict[str, List[int]] = {}
+        for k in keys:
+            self._add(k, self._post)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._ids
+
+    def grams(self, s: str) -> Set[str]:
+        """앞 2칸/뒤 1칸 패딩(pg_trgm 방식) → 짧은 제목도 앞글자 gram 공유"""
+        p = " " * (self.n - 1) + (s or "") + " "
+        return {p[i:i + self.n] for i in range(len(p) - self.n + 1)}
+
+    def _add(self, key: str, post: Dict[str, List[int]]) -> None:
+        if not key or key in self._ids:
+            return
+        kid = len(self.keys)
+        self._ids[key] = kid
+        self.keys.append(key)
+        for g in self.grams(key):
+            post.setdefault(g, []).append(kid)
+
+    def with_keys(self, keys: Iterable[str]) -> "TitleNgramIndex":
+        """새 키 추가본. 키 목록/postings dict는 얕은 복사(전체 키·gram 수에 비례, 목록 자체는 공유),
+        새 키가 닿는 gram의 postings 목록만 깊은 복사."""
+        new = [k for k in dict.fromkeys(keys) if k and k not in self._ids]
+        if not new:
+            return self
+        out = TitleNgramIndex(n=self.n)
+        out.keys, out._ids = list(self.keys), dict(self._ids)
+        post = dict(self._post)
+        for k in new:
+            for g in out.grams(k):
+                post[g] = list(post.get(g, ()))
+        for k in new:
+            out._add(k, post)
+        out._post = post
+        return out
+
+    def candidates(self, query: str, limit: Optional[int] = 50) -> List[str]:
+        """n-gram 공유 개수 많은 순 후보 키 (공유 0개 키는 아예 보지 않음, limit=None이면 전부)"""
+        hits: Counter = Counter()
+        for g in self.grams(query):
+            for kid in self._post.get(g, ()):
+                hits[kid] += 1
+        return [self.keys[kid] for kid, _ in hits.most_common(limit)]
+
+    def close_matches(self, query: str, n: int = 3, cutoff: float = 0.6) -> List[str]:
+        """
+        difflib.get_close_matches(query, keys, n, cutoff)와 같은 결과.
+        gram을 하나도 공유하지 않는 두 문자열은 일치 블록이 모두 n-1글자 이하이고 블록 앞마다 불일치 글자가
+        있어야 하므로(앞 패딩 때문에 첫 글자도 불일치) ratio <= (n-1)/n. 따라서 cutoff가 그보다 크면
+        gram 공유 키 전부(개수 제한 없음)만 평가해도 빠지는 키가 없다. 아니면 전체 키를 평가.
+        """
+        if not query:
+            return []
+        pool = self.candidates(query, limit=None) if cutoff > (self.n - 1) / self.n else self.keys
+        sm = difflib.SequenceMatcher()
+        sm.set_seq2(query)
+        scored = []
+        for cand in pool:
+            sm.set_seq1(cand)
+            if sm.real_quick_ratio() >= cutoff and sm.quick_ratio() >= cutoff:
+                r = sm.ratio()
+                if r >= cutoff:
+                    scored.append((r, cand))
+        scored.sort(reverse=True)   # difflib과 같은 (점수, 키) 내림차순
+        return [c for _, c in scored[:n]]
+
+
+_TOKEN_RE = re.compile(r"[가-힣A-Za-z0-9]+")
+
+
+def _tokens(s: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(s or "") if t]
+
+
+def _jaccard(a: List[str], b: List[str]) -> float:
+    A, B = set(a), set(b)
+    if not A or not B:
+        return 0.0
+    return len(A & B) / len(A | B)
+
+
+def guarded_match(ngrams: TitleNgramIndex, title: str, key: str,
+                  cutoff: float = 0.8, n: int = 3) -> Optional[str]:
+    """정규화 키 key의 퍼지 후보 중 가드를 통과한 첫 키 (원제목 title과 후보 키의 토큰 Jaccard >= 0.6,
+    여러 토큰 제목이 2글자 이하 키로 붙는 것 금지). 속편/같은 접두어 시리즈 오매칭 방지."""
+    q_tokens = _tokens(title)
+    for cand in ngrams.close_matches(key, n=n, cutoff=cutoff):
+        c_tokens = _tokens(cand)
+        if _jaccard(q_tokens, c_tokens) < 0.6:
+            continue
+        if len("".join(c_tokens)) <= 2 and len(q_tokens) >= 2:
+            continue
+        return cand
+    return None
+
+
+# ------------------------------
+# 자동완성 트라이
+# ------------------------------
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_SUGGEST_STRIP_RE = re.compile(r"[\s·\.\-_:~(){}\[\]〈〉《》「」『』【】]+")
+
+
+def choseong(s: str) -> str:
+    """한글 음절 → 초성 (그 외 문자는 그대로)"""
+    out = []
+    for ch in s or "":
+        c = ord(ch)
+        out.append(_CHOSEONG[(c - 0xAC00) // 588] if 0xAC00 <= c <= 0xD7A3 else ch)
+    return "".join(out)
+
+
+def suggest_key(s: str) -> str:
+    """자동완성 비교용: 소문자 + 공백/구분자/괄호 제거"""
+    return _SUGGEST_STRIP_RE.sub("", (s or "").lower())
+
+
+class _Node:
+    __slots__ = ("kids", "top")
+
+    def __init__(self, kids: Optional[Dict[str, "_Node"]] = None, top: Tuple[int, ...] = ()):
+        self.kids = kids if kids is not None else {}
+        self.top = top   # 이 접두어로 시작하는 작품 id 상위 k개 (점수 내림차순)
+
+
+class TitleSuggestTrie:
+    """불변 자동완성 트라이. 점수 = 작품별 촬영지 수."""
+
+    def __init__(self, k: int = 10):
+        self.k = k
+        self.root = _Node()
+        self.entries: List[Tuple[str, str]] = []   # id → (표시 제목, 정규화 키)
+        self.score: List[int] = []
+        self._eid: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _forms(key: str, title: str) -> Set[str]:
+        raw = suggest_key(title)
+        return {f for f in (key, raw, choseong(raw)) if f}
+
+    def _rank(self, ids: Iterable[int]) -> Tuple[int, ...]:
+        return tuple(sorted(set(ids), key=lambda e: (-self.score[e], self.entries[e][0]))[: self.k])
+
+    def _append(self, eid: int, form: str) -> None:
+        """build 전용: 점수 내림차순으로 넣으므로 top은 뒤에 붙이기만 하면 된다."""
+        node = self.root
+        for ch in (None,) + tuple(form):
+            if ch is not None:
+                node = node.kids.setdefault(ch, _Node())
+            if len(node.top) < self.k and eid not in node.top:
+                node.top += (eid,)
+
+    def _insert(self, eid: int, form: str) -> None:
+        """form 경로의 노드를 복사하며 top 재계산 → 기존 트라이는 그대로 둔다."""
+        node = self.root = _Node(dict(self.root.kids), self.root.top)
+        node.top = self._rank(node.top + (eid,))
+        for ch in form:
+            child = node.kids.get(ch)
+            child = _Node(dict(child.kids), child.top) if child is not None else _Node()
+            node.kids[ch] = child
+            child.top = self._rank(child.top + (eid,))
+            node = child
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, str, int]], k: int = 10) -> "TitleSuggestTrie":
+        """items: (정규화 키, 표시 제목, 촬영지 수)"""
+        t = cls(k)
+        for key, title, spots in items:
+            if key in t._eid:
+                continue
+            t._eid[key] = len(t.entries)
+            t.entries.append((title or key, key))
+            t.score.append(int(spots))
+        for eid in sorted(range(len(t.entries)), key=lambda e: (-t.score[e], t.entries[e][0])):
+            title, key = t.entries[eid]
+            for form in t._forms(key, title):
+                t._append(eid, form)
+        return t
+
+    def updated(self, deltas: Iterable[Tuple[str, str, int]]) -> "TitleSuggestTrie":
+        """
+        deltas: (정규화 키, 표시 제목, 추가된 촬영지 수). 점수는 늘기만 하므로
+        바뀐 작품 경로의 top만 다시 매기면 된다 — 비용은 바뀐 작품 수에 비례.
+        """
+        deltas = list(deltas)
+        if not deltas:
+            return self
+        t = TitleSuggestTrie(self.k)
+        t.root, t.entries, t.score, t._eid = self.root, list(self.entries), list(self.score), dict(self._eid)
+        for key, title, added in deltas:
+            eid = t._eid.get(key)
+            if eid is None:
+                eid = t._eid[key] = len(t.entries)
+                t.entries.append((title or key, key))
+                t.score.append(0)
+            t.score[eid] += int(added)
+            for form in t._forms(key, t.entries[eid][0]):
+                t._insert(eid, form)
+        return t
+
+    def items(self) -> List[Tuple[str, str, int]]:
+        """build() 입력 형태 (작품키, 표시 제목, 촬영지 수) — 저장/복원용"""
+        return [(key, title, self.score[e]) for e, (title, key) in enumerate(self.entries)]
+
+    def suggest(self, q: str, limit: int = 10) -> List[Dict[str, object]]:
+        node = self.root
+        qk = suggest_key(q)
+        if not qk:
+            return []
+        for ch in qk:
+            node = node.kids.get(ch)
+            if node is None:
+                return []
+        return [{"title": self.entries[e][0], "key": self.entries[e][1], "spots": self.score[e]}
+                for e in node.top[:limit]]
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+tour_geo_cache.py
+-----------------
+TourAPI locationBasedList 결과의 공간 캐시 (원 단위 coverage + 격자 타일 색인, sqlite WAL)
+
+TourAPI는 원(중심, 반경) 질의만 받고 거리순(arrange=E)으로 numOfRows개를 준다. 그래서 한 번의 응답이
+"빠짐없이" 보장하는 범위(cover_km)는
+  - 결과 수 < numOfRows  → 요청 반경 전체
+  - 결과 수 = numOfRows  → 가장 먼 결과보다 "엄격히" 가까운 결과까지의 거리
+                          (가장 먼 거리와 같은 거리의 항목은 잘려 나갔을 수 있어 경계 고리는 제외)
+새 요청 원(c, r)이 저장된 원(c0, cover_km) 안에 완전히 들어가면(dist(c, c0) + r <= cover_km)
+저장된 항목을 새 중심 기준으로 다시 거르고(dist_km <= r) 거리순 정렬해 돌려준다 — API 호출 없음.
+
+- 색인: 중심 좌표의 TILE_DEG 격자 칸. 조회는 MAX_COVER_KM 이내 칸들만 본다.
+- 콘텐츠 유형(12/32/39)별로 따로 저장 → 'all' 요청은 덮이지 않은 유형만 API 호출
+- store(): 새 원 안에 완전히 들어가는 예전 원은 지움 (같은 지역 반복 저장으로 행이 늘지 않게)
+
+Usage
+-----
+  geo = TourGeoCache("cache/api_cache.sqlite3", ttl_sec=7 * 86400)
+  items = geo.lookup(37.57, 126.98, 2.0, 12)          # None = 덮는 캐시 없음
+  geo.store(37.57, 126.98, 3.0, 12, items, num=100)
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+EARTH_R_KM = 6371.0
+TILE_DEG = 0.25        # 색인 격자 (약 28km × 22km)
+MAX_COVER_KM = 50.0    # TourAPI radius 상한 50000m → 저장 원 반경 상한
+_TIE_KM = 1e-6         # 이 안쪽 거리 차는 같은 거리로 봄 (좌표 반올림 오차)
+
+
+def _hav_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    h = (math.sin((p2 - p1) / 2) ** 2
+         + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_R_KM * math.asin(math.sqrt(min(1.0, h)))
+
+
+def _tile(lat: float, lng: float) -> str:
+    return f"{math.floor(lat / TILE_DEG)}:{math.floor(lng / TILE_DEG)}"
+
+
+def _tiles_near(lat: float, lng: float, km: float) -> List[str]:
+    """(lat, lng)에서 km 이내에 중심이 있을 수 있는 격자 칸들"""
+    dlat = km / 111.0
+    dlng = km / (111.0 * max(0.1, math.cos(math.radians(lat))))
+    i0, i1 = math.floor((lat - dlat) / TILE_DEG), math.floor((lat + dlat) / TILE_DEG)
+    j0, j1 = math.floor((lng - dlng) / TILE_DEG), math.floor((lng + dlng) / TILE_DEG)
+    return [f"{i}:{j}" for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+
+
+class TourGeoCache:
+    def __init__(self, path: str, ttl_sec: float = 7 * 86400):
+        self.ttl_sec = ttl_sec
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+        CREATE TABLE IF NOT EXISTS tour_cover (
+          id INTEGER PRIMARY KEY, type_id INTEGER NOT NULL, tile TEXT NOT NULL,
+          lat REAL NOT NULL, lng REAL NOT NULL, radius_km REAL NOT NULL, cover_km REAL NOT NULL,
+          items TEXT NOT NULL, updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS tour_cover_tile ON tour_cover (type_id, tile);
+        """)
+        self._db.commit()
+        self.stats = {"covered": 0, "uncovered": 0, "stored": 0}
+
+    def _candidates(self, lat: float, lng: float, type_id: int, since: float) -> List[tuple]:
+        tiles = _tiles_near(lat, lng, MAX_COVER_KM)
+        with self._lock:
+            return self._db.execute(
+                f"SELECT id, lat, lng, cover_km, items, updated_at FROM tour_cover "
+                f"WHERE type_id=? AND updated_at>=? AND tile IN ({','.join('?' * len(tiles))})",
+                (type_id, since, *tiles)).fetchall()
+
+    def lookup(self, lat: float, lng: float, radius_km: float, type_id: int) -> Optional[List[Dict[str, Any]]]:
+        """요청 원을 완전히 덮는 (TTL 안) 저장 원이 있으면 그 항목을 새 중심 기준 거리순으로, 없으면 None"""
+        best = None
+        for cid, clat, clng, cover, items, updated in self._candidates(lat, lng, type_id, time.time() - self.ttl_sec):
+            if _hav_km(lat, lng, clat, clng) + radius_km <= cover + 1e-6:
+                if best is None or updated > best[1]:
+                    best = (items, updated)
+        if best is None:
+            self.stats["uncovered"] += 1
+            return None
+        self.stats["covered"] += 1
+        out = []
+        for it in json.loads(best[0]):
+            try:
+                d = _hav_km(lat, lng, float(it["lat"]), float(it["lng"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if d <= radius_km:
+                out.append({**it, "dist_km": round(d, 2)})
+        out.sort(key=lambda x: (x["dist_km"], x.get("title") or ""))
+        return out
+
+    def store(self, lat: float, lng: float, radius_km: float, type_id: int,
+              items: List[Dict[str, Any]], num: int) -> float:
+        """API 응답 저장. 반환: 빠짐없이 보장되는 반경(cover_km)"""
+        cover = min(radius_km, MAX_COVER_KM)
+        if len(items) >= num:
+            # 잘린 응답: 가장 먼 결과와 동률인 항목이 뒤에 더 있었을 수 있음 → 그보다 가까운 결과까지만 완전
+            ds = [_hav_km(lat, lng, float(it["lat"]), float(it["lng"]))
+                  for it in items if it.get("lat") is not None and it.get("lng") is not None]
+            far = max(ds) if ds else 0.0
+            inner = [d for d in ds if d < far - _TIE_KM]
+            cover = min(cover, max(inner)) if inner else 0.0
+        now = time.time()
+        inside = [cid for cid, clat, clng, ccover, _, _ in self._candidates(lat, lng, type_id, 0.0)
+                  if _hav_km(lat, lng, clat, clng) + ccover <= cover + 1e-6]
+        with self._lock, self._db:
+            if inside:
+                self._db.execute(f"DELETE FROM tour_cover WHERE id IN ({','.join('?' * len(inside))})", inside)
+            self._db.execute("INSERT INTO tour_cover (type_id, tile, lat, lng, radius_km, cover_km, items, updated_at) "
+                             "VALUES (?,?,?,?,?,?,?,?)",
+                             (type_id, _tile(lat, lng), lat, lng, radius_km, cover,
+                              json.dumps(items, ensure_ascii=False), now))
+        self.stats["stored"] += 1
+        return cover
+
+    def compact(self, keep_sec: float) -> int:
+        with self._lock, self._db:
+            n = self._db.execute("DELETE FROM tour_cover WHERE updated_at < ?", (time.time() - keep_sec,)).rowcount
+        if n:
+            print(f"[tour_geo] compacted {n} expired circles")
+        return n